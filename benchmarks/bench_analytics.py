@@ -0,0 +1,161 @@
+"""
+Dashboard queries from CohortAnalytics rollups vs raw scans of the progress table.
+
+Fills a database with synthetic sessions spread over --days days, builds the
+rollups from scratch, times an incremental refresh after more answers, then
+times each dashboard query (school-wide and for one 30-learner class) from
+the rollups and as a GROUP BY scan of `progress`, checking both agree.
+--pandas also times the scan as a pandas read + groupby. Run from the
+repository root (the 10M-row default needs ~1.5GB of disk and several minutes):
+
+    python benchmarks/bench_analytics.py --rows 10000000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics import CohortAnalytics, RT_BUCKETS  # noqa: E402
+from tracker import CREATE_PROGRESS, CREATE_PROGRESS_INDEX, INSERT_PROGRESS  # noqa: E402
+
+LEVELS = np.array(["Easy", "Medium", "Hard"])
+ROWS_PER_SESSION = 50
+EPOCH = np.datetime64("2025-01-01T08:00:00")
+
+
+def fill(db_name, n_rows, first_session, days, seed, chunk_sessions=20_000):
+    """n_rows answers in sessions of ROWS_PER_SESSION; each session starts at a random time within `days`."""
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(CREATE_PROGRESS)
+    conn.execute(CREATE_PROGRESS_INDEX)
+    n_sessions = n_rows // ROWS_PER_SESSION
+    for s0 in range(0, n_sessions, chunk_sessions):
+        k = min(chunk_sessions, n_sessions - s0)
+        starts = EPOCH + rng.integers(0, days * 86_400, k).astype("timedelta64[s]")
+        offsets = np.cumsum(rng.integers(5, 40, (k, ROWS_PER_SESSION)), axis=1).astype("timedelta64[s]")
+        stamps = np.datetime_as_string(starts[:, None] + offsets).ravel()
+        levels = LEVELS[np.minimum(np.arange(ROWS_PER_SESSION) // 15, 2)][None, :].repeat(k, 0)
+        levels = np.where(rng.random((k, ROWS_PER_SESSION)) < 0.2, LEVELS[rng.integers(0, 3, (k, ROWS_PER_SESSION))],
+                          levels).ravel()
+        correct = (rng.random(k * ROWS_PER_SESSION) < 0.7).astype(int)
+        response_time = rng.lognormal(1.6, 0.6, k * ROWS_PER_SESSION).round(2)
+        sessions = np.repeat([f"session_{first_session + s0 + i:08x}" for i in range(k)], ROWS_PER_SESSION)
+        rows = zip(sessions.tolist(), np.char.replace(stamps, "T", " ").tolist(), levels.tolist(), correct.tolist(),
+                   response_time.tolist(), [1] * len(sessions), [50.0] * len(sessions), [None] * len(sessions))
+        with conn:
+            conn.executemany(INSERT_PROGRESS, rows)
+    conn.close()
+    return first_session + n_sessions
+
+
+def timed(fn, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return np.median(samples) * 1000, result
+
+
+SCAN_ACCURACY = """
+    SELECT substr(timestamp, 1, 10) AS period, difficulty, COUNT(*), TOTAL(correct)
+    FROM progress {where} GROUP BY period, difficulty ORDER BY period, difficulty
+"""
+SCAN_RESPONSE = """
+    SELECT difficulty, COUNT(*), AVG(response_time), {buckets} FROM progress {where}
+    GROUP BY difficulty ORDER BY difficulty
+"""
+SCAN_TRANSITIONS = """
+    SELECT from_level, to_level, COUNT(*) FROM (
+        SELECT LAG(difficulty) OVER (PARTITION BY session_id ORDER BY id) AS from_level, difficulty AS to_level
+        FROM progress {where}
+    ) WHERE from_level IS NOT NULL GROUP BY from_level, to_level
+"""
+
+
+def scans(conn, cohort):
+    where = "" if cohort is None else "WHERE session_id IN (%s)" % ",".join("?" * len(cohort))
+    params = () if cohort is None else tuple(cohort)
+    bucket_sql = ", ".join(f"SUM(response_time <= {edge})" for edge in RT_BUCKETS)
+    return {
+        "accuracy by day": lambda: conn.execute(SCAN_ACCURACY.format(where=where), params).fetchall(),
+        "response times": lambda: conn.execute(SCAN_RESPONSE.format(where=where, buckets=bucket_sql),
+                                               params).fetchall(),
+        "level transitions": lambda: conn.execute(SCAN_TRANSITIONS.format(where=where), params).fetchall(),
+    }
+
+
+def rollups(analytics, cohort):
+    return {
+        "accuracy by day": lambda: analytics.accuracy_over_time("daily", sessions=cohort),
+        "response times": lambda: analytics.response_times("daily", sessions=cohort),
+        "level transitions": lambda: analytics.level_transitions(sessions=cohort),
+    }
+
+
+def agree(name, scan, rollup):
+    if name == "accuracy by day":
+        return [(p, d, n, int(c)) for p, d, n, c in scan] == list(
+            rollup[["period", "difficulty", "attempts", "correct"]].itertuples(index=False, name=None))
+    if name == "response times":
+        return [(d, n, round(m, 6)) for d, n, m, *_ in scan] == [
+            (d, n, round(m, 6)) for d, n, m in rollup[["difficulty", "attempts", "mean"]].itertuples(index=False)]
+    return all(rollup.loc[a, b] == n for a, b, n in scan) and rollup.to_numpy().sum() == sum(n for *_, n in scan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--new-rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--pandas", action="store_true", help="also time a pandas read_sql + groupby scan")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "progress.db")
+        t0 = time.perf_counter()
+        next_session = fill(db_name, args.rows, 0, args.days, seed=0)
+        print(f"filled {args.rows:,} rows in {time.perf_counter() - t0:.1f}s")
+
+        analytics = CohortAnalytics(db_name)
+        t0 = time.perf_counter()
+        analytics.refresh()
+        print(f"initial rollup build: {time.perf_counter() - t0:.1f}s")
+        fill(db_name, args.new_rows, next_session, args.days, seed=1)
+        t0 = time.perf_counter()
+        added = analytics.refresh()
+        print(f"incremental refresh of {added:,} new rows: {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+        conn = sqlite3.connect(db_name)
+        cohort = [f"session_{i:08x}" for i in range(0, 30 * 997, 997)]
+        print(f"\n{'query':<20} {'scope':<8} {'raw scan':>12} {'rollups':>10} {'speedup':>9}  match")
+        for scope, members in (("school", None), ("class", cohort)):
+            scan_fns, rollup_fns = scans(conn, members), rollups(analytics, members)
+            for name in scan_fns:
+                scan_ms, scan_result = timed(scan_fns[name], 1 if members is None else args.repeats)
+                rollup_ms, rollup_result = timed(rollup_fns[name], args.repeats)
+                print(f"{name:<20} {scope:<8} {scan_ms:10.1f}ms {rollup_ms:8.2f}ms {scan_ms / rollup_ms:8.1f}x  "
+                      f"{agree(name, scan_result, rollup_result)}")
+
+        if args.pandas:
+            t0 = time.perf_counter()
+            df = pd.read_sql_query("SELECT timestamp, difficulty, correct FROM progress", conn)
+            df.groupby([df["timestamp"].str.slice(0, 10), "difficulty"])["correct"].agg(["size", "mean"])
+            print(f"\npandas read + groupby (accuracy by day): {(time.perf_counter() - t0) * 1000:.0f}ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
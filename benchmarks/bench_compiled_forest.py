@@ -0,0 +1,92 @@
+"""
+Checks that the compiled forest reproduces RandomForestClassifier.predict exactly
+and compares per-prediction cost and footprint. Run from the repository root:
+
+    python benchmarks/bench_compiled_forest.py --rows 200000
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from forest_compiler import CompiledForest  # noqa: E402
+
+MODEL_PATH = "artifacts/level_recommender_model.pkl"
+DATA_PATH = "data/math_quiz_dataset.csv"
+
+
+def sample_inputs(model, n: int, seed: int = 0) -> np.ndarray:
+    """Random rows plus rows sitting exactly on split thresholds."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(1, 4, n),
+        np.round(rng.uniform(0, 30, n), 2),
+        rng.integers(0, 2, n),
+        rng.integers(0, 25, n),
+        np.round(rng.uniform(0, 100, n), 2),
+    ]).astype(np.float64)
+
+    for estimator in model.estimators_[:10]:
+        tree = estimator.tree_
+        internal = tree.children_left != -1
+        for feat, thr in zip(tree.feature[internal], tree.threshold[internal]):
+            row = X[rng.integers(n)].copy()
+            row[feat] = thr
+            X = np.vstack([X, row])
+    return X
+
+
+def time_per_row(fn, X, repeats: int = 2000) -> float:
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(X[i % len(X):i % len(X) + 1])
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+    forest = CompiledForest.from_model(model)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    X = sample_inputs(model, args.rows)
+    if os.path.exists(DATA_PATH):
+        data = pd.read_csv(DATA_PATH)
+        X = np.vstack([X, data[list(model.feature_names_in_)].to_numpy(dtype=np.float64)])
+
+    expected = model.predict(X)
+    actual = forest.predict(X)
+    mismatches = int((expected != actual).sum())
+    print(f"rows checked: {len(X)}  mismatches: {mismatches}")
+
+    print(f"sklearn single row:   {time_per_row(model.predict, X, 500):10.1f} us/pred")
+    print(f"compiled single row:  {time_per_row(forest.predict, X):10.1f} us/pred")
+
+    start = time.perf_counter()
+    model.predict(X)
+    sk_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    forest.predict(X)
+    compiled_batch = time.perf_counter() - start
+    print(f"sklearn batch:        {sk_batch / len(X) * 1e6:10.3f} us/pred")
+    print(f"compiled batch:       {compiled_batch / len(X) * 1e6:10.3f} us/pred")
+
+    print(f"pickle size:          {len(pickle.dumps(model)):10d} bytes")
+    print(f"compiled arrays:      {forest.nbytes:10d} bytes")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Scalar vs vectorized confidence scoring, and the progress_io rescore backfill.
+
+Scores N random interactions with ProgressTracker.calculate_confidence in a
+loop and with calculate_confidence_many, checks that both agree exactly, then
+rescores a synthetic progress.db end to end. Run from the repository root:
+
+    python benchmarks/bench_confidence.py --rows 1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_progress_reads import fill  # noqa: E402
+from progress_io import rescore_confidence  # noqa: E402
+from tracker import ProgressTracker  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = np.random.default_rng(0)
+    n = args.rows
+    correct = rng.random(n) < 0.6
+    difficulty = rng.choice(np.array(["Easy", "Medium", "Hard"], dtype=object), n)
+    response_time = np.round(rng.lognormal(1.5, 0.6, n), 2)
+    streak = rng.integers(0, 30, n)
+    expected_time = rng.choice([5.0, 7.0, 8.0, 10.0, 12.0, 14.0], n)
+
+    start = time.perf_counter()
+    scalar = np.array([
+        ProgressTracker.calculate_confidence(c, d, r, s, e)
+        for c, d, r, s, e in zip(correct.tolist(), difficulty.tolist(), response_time.tolist(),
+                                 streak.tolist(), expected_time.tolist())
+    ])
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector = ProgressTracker.calculate_confidence_many(correct, difficulty, response_time, streak, expected_time)
+    vector_s = time.perf_counter() - start
+
+    print(f"scalar loop   {n / scalar_s:12.0f} rows/s")
+    print(f"vectorized    {n / vector_s:12.0f} rows/s ({scalar_s / vector_s:.0f}x)")
+    print(f"mismatches    {int((scalar != vector).sum())}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "progress.db")
+        fill(db_name, args.db_rows)
+        start = time.perf_counter()
+        result = rescore_confidence(db_name, approximate=True)  # fill() records no expected times
+        elapsed = time.perf_counter() - start
+        print(f"rescore       {result['rows'] / elapsed:12.0f} rows/s ({result['changed']} rows updated)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Cold-start import budget for the core modules, from `python -X importtime`.
+
+Imports each module in a fresh interpreter (in an empty working directory),
+--repeats times, and takes the median cumulative import time that
+-X importtime reports for it. Exits with status 1 if a module is over its
+budget, imports one of the heavy optional dependencies (pandas, sklearn,
+requests, streamlit, http.server) or leaves files behind in the working
+directory. The first run of each module only compiles bytecode and is not
+counted. Run from the repository root:
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --budget tracker=120 --repeats 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Cumulative import time in ms, about 1.5x what the modules cost on a 1-CPU
+# container (numpy alone is ~90ms of each, except logger and metrics).
+# Before imports were made lazy, tracker and learning_service took ~550ms.
+BUDGET_MS = {
+    "logger": 45,
+    "metrics": 50,
+    "puzzle_generator": 200,
+    "tracker": 220,
+    "adaptive_engine": 210,
+    "learning_service": 250,
+}
+# Loaded only by the code paths that need them
+HEAVY_MODULES = ("pandas", "sklearn", "requests", "streamlit", "http.server")
+
+PROBE = "import sys, {module}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def import_once(module: str):
+    """(cumulative ms, heavy modules loaded, files left in the working directory) for one cold import."""
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=workdir, env={**os.environ, "PYTHONPATH": SRC}, capture_output=True, text=True, check=True,
+        )
+        leftovers = os.listdir(workdir)
+    cumulative = next(
+        int(line.split("|")[1]) for line in reversed(result.stderr.splitlines())
+        if line.startswith("import time:") and line.split("|")[2].strip() == module
+    )
+    return cumulative / 1000, [m for m in result.stdout.strip().split(",") if m], leftovers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=9)
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="override or add a module budget")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGET_MS)
+    for item in args.budget:
+        module, _, ms = item.partition("=")
+        budgets[module] = float(ms)
+
+    failures = []
+    print(f"{'module':<18} {'median':>9} {'budget':>8}  heavy imports / files left")
+    for module, budget in budgets.items():
+        import_once(module)  # writes __pycache__ so later runs measure imports, not compilation
+        runs = [import_once(module) for _ in range(args.repeats)]
+        median = statistics.median(ms for ms, _, _ in runs)
+        heavy = sorted({m for _, loaded, _ in runs for m in loaded})
+        leftovers = sorted({f for _, _, files in runs for f in files})
+        print(f"{module:<18} {median:7.1f}ms {budget:6.0f}ms  {', '.join(heavy + leftovers) or '-'}")
+        if median > budget:
+            failures.append(f"{module}: {median:.1f}ms over its {budget:.0f}ms budget")
+        if heavy:
+            failures.append(f"{module}: imports {', '.join(heavy)} at import time")
+        if leftovers:
+            failures.append(f"{module}: creates {', '.join(leftovers)} on import")
+
+    if failures:
+        print("\nImport budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll modules within their import budgets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Latency/throughput benchmark for next-level recommendations.
+
+Compares the legacy single-row DataFrame path against AdaptiveEngine.recommend_many
+and the MicroBatcher front end. Run from the repository root:
+
+    python benchmarks/bench_inference.py --requests 2000 --clients 32
+"""
+import argparse
+import os
+import pickle
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from adaptive_engine import AdaptiveEngine  # noqa: E402
+from micro_batcher import MicroBatcher  # noqa: E402
+
+LEVELS = ["Easy", "Medium", "Hard"]
+
+
+def make_requests(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        (LEVELS[rng.integers(3)], bool(rng.integers(2)), float(rng.uniform(1, 20)),
+         int(rng.integers(0, 15)), float(np.round(rng.uniform(0, 100), 2)))
+        for _ in range(n)
+    ]
+
+
+def legacy_predict(engine, sk_model, level, correct, response_time, streak, confidence):
+    """The pre-batching path: one DataFrame and one sklearn predict() per request."""
+    input_data = pd.DataFrame([{
+        "difficulty": engine.difficulty_mapping.get(level, 2),
+        "response_time": response_time,
+        "correct": int(correct),
+        "streak": streak,
+        "confidence": confidence,
+    }])
+    return sk_model.predict(input_data)[0]
+
+
+def summarize(name, latencies, elapsed, n):
+    lat_ms = np.asarray(latencies) * 1000.0
+    print(f"{name:<28} p50={np.percentile(lat_ms, 50):8.3f}ms  "
+          f"p99={np.percentile(lat_ms, 99):8.3f}ms  {n / elapsed:12.0f} pred/s")
+
+
+def bench_sequential(name, fn, requests):
+    latencies = []
+    start = time.perf_counter()
+    for req in requests:
+        t0 = time.perf_counter()
+        fn(*req)
+        latencies.append(time.perf_counter() - t0)
+    summarize(name, latencies, time.perf_counter() - start, len(requests))
+
+
+def bench_concurrent(name, fn, requests, clients):
+    latencies = []
+    lock = threading.Lock()
+    chunks = [requests[i::clients] for i in range(clients)]
+
+    def worker(chunk):
+        local = []
+        for req in chunk:
+            t0 = time.perf_counter()
+            fn(*req)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    summarize(name, latencies, time.perf_counter() - start, len(requests))
+
+
+def bench_batch(engine, requests, batch_size):
+    rows = np.array([
+        (engine.difficulty_mapping[lvl], int(c), rt, s, conf) for lvl, c, rt, s, conf in requests
+    ], dtype=np.float64)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        t0 = time.perf_counter()
+        engine.recommend_many(rows[i:i + batch_size])
+        latencies.append(time.perf_counter() - t0)
+    summarize(f"recommend_many (batch={batch_size})", latencies, time.perf_counter() - start, len(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    engine = AdaptiveEngine()
+    engine.logger.setLevel("WARNING")
+    with open(engine.model_path, "rb") as f:
+        sk_model = pickle.load(f)
+    requests = make_requests(args.requests)
+
+    bench_sequential("legacy DataFrame per row", lambda *r: legacy_predict(engine, sk_model, *r), requests)
+    bench_sequential("recommend_next_level", engine.recommend_next_level, requests)
+    for batch_size in (1, 64, 1024):
+        bench_batch(engine, requests, batch_size)
+
+    bench_concurrent(f"legacy x{args.clients} threads", lambda *r: legacy_predict(engine, sk_model, *r),
+                     requests, args.clients)
+    batcher = MicroBatcher(engine, window_ms=args.window_ms)
+    try:
+        bench_concurrent(f"micro-batched x{args.clients}", batcher.recommend_next_level,
+                         requests, args.clients)
+    finally:
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Request-thread cost of the hot-path log lines, synchronous vs queued logging.
+
+Times PuzzleGenerator.generate_puzzle plus ProgressTracker.calculate_confidence
+(the INFO lines emitted per answer check) under three configurations: the old
+synchronous handlers, the QueueHandler/QueueListener pipeline, and the queued
+pipeline with 1-in-N sampling of those modules. Run from the repository root:
+
+    python benchmarks/bench_logging.py --calls 20000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import logger as log_config  # noqa: E402
+from puzzle_generator import PuzzleGenerator  # noqa: E402
+from tracker import ProgressTracker  # noqa: E402
+
+
+def answer_check(generator):
+    _, _, expected_time = generator.generate_puzzle("Medium", 5, 60.0)
+    ProgressTracker.calculate_confidence(True, "Medium", 4.2, 5, expected_time)
+
+
+def measure(name, generator, calls):
+    latencies = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        answer_check(generator)
+        latencies[i] = time.perf_counter() - start
+    drain = time.perf_counter()
+    log_config.stop_logging()
+    drain = time.perf_counter() - drain
+    us = latencies * 1e6
+    print(f"{name:<18} p50={np.percentile(us, 50):7.1f}us p99={np.percentile(us, 99):7.1f}us "
+          f"total={latencies.sum():6.2f}s (+{drain:.2f}s listener drain)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--sample", type=int, default=100)
+    args = parser.parse_args()
+
+    # Console output would dominate every configuration; measure the file sink only
+    sys.stderr = open(os.devnull, "w")
+    generator = PuzzleGenerator()
+    sample = f"puzzle_generator={args.sample},tracker={args.sample}"
+
+    for name, kwargs in [
+        ("sync", dict(async_mode=False)),
+        ("async", dict(async_mode=True)),
+        (f"async 1/{args.sample}", dict(async_mode=True, sample=sample)),
+    ]:
+        log_config.configure_logging(**kwargs)
+        measure(name, generator, args.calls)
+
+
+if __name__ == "__main__":
+    main()
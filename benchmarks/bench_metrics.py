@@ -0,0 +1,65 @@
+"""
+Overhead of the metrics.timed instrumentation, disabled and enabled.
+
+Times a trivial function bare, wrapped with metrics disabled and wrapped with
+metrics enabled, then prints the answer-check stages recorded for a few
+thousand simulated checks in Prometheus text format. Run from the repository
+root:
+
+    python benchmarks/bench_metrics.py --calls 1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import metrics  # noqa: E402
+from adaptive_engine import AdaptiveEngine  # noqa: E402
+from puzzle_generator import PuzzleGenerator  # noqa: E402
+from tracker import ProgressTracker  # noqa: E402
+
+
+def noop(x):
+    return x
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--checks", type=int, default=2_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    wrapped = metrics.timed("bench.noop")(noop)
+    bare = per_call_ns(noop, args.calls)
+    metrics.disable()
+    disabled = per_call_ns(wrapped, args.calls)
+    metrics.enable()
+    enabled = per_call_ns(wrapped, args.calls)
+    print(f"bare call                {bare:8.1f} ns")
+    print(f"timed, metrics disabled  {disabled:8.1f} ns (+{disabled - bare:.1f})")
+    print(f"timed, metrics enabled   {enabled:8.1f} ns (+{enabled - bare:.1f})")
+
+    metrics.reset()
+    generator, engine = PuzzleGenerator(), AdaptiveEngine()
+    for _ in range(args.checks):
+        with metrics.stage("app.check_answer"):
+            _, _, expected_time = generator.generate_puzzle("Medium", 4, 60.0)
+            confidence = ProgressTracker.calculate_confidence(True, "Medium", 5.0, 4, expected_time)
+            engine.recommend_next_level("Medium", True, 5.0, 4, confidence)
+    print()
+    print(metrics.render_prometheus())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Startup time and memory of the recommender model in 1 and N worker processes.
+
+Compares the legacy path (unpickle the sklearn forest in every process and on
+every Streamlit rerun) with the shared ModelRegistry (lazy, mmap-backed compiled
+forest). Memory is read from /proc, so this runs on Linux only. Run from the
+repository root:
+
+    python benchmarks/bench_model_loading.py --workers 1 4 8
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+MODEL_PATH = "artifacts/level_recommender_model.pkl"
+SAMPLE = [[1.0, 1.0, 4.2, 3.0, 72.5]]  # level, correct, response_time, streak, confidence
+
+
+def read_memory_kb():
+    """(RSS, PSS) of the current process in kB."""
+    rss = pss = 0
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def worker(mode, barrier, results):
+    sys.path.insert(0, SRC_DIR)
+    start = time.perf_counter()
+    if mode == "legacy":
+        import pickle
+        import pandas as pd
+
+        with open(MODEL_PATH, "rb") as f:
+            model = pickle.load(f)
+        row = pd.DataFrame([[1, 4.2, 1, 3, 72.5]], columns=model.feature_names_in_)
+        model.predict(row)
+    else:
+        import numpy as np
+        from adaptive_engine import AdaptiveEngine
+
+        AdaptiveEngine().recommend_many(np.array(SAMPLE))
+    startup = time.perf_counter() - start
+
+    barrier.wait()  # every worker is resident before memory is sampled
+    rss, pss = read_memory_kb()
+    results.put((startup, rss, pss))
+    barrier.wait()
+
+
+def run_workers(mode, n):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, barrier, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    samples = [results.get() for _ in range(n)]
+    for p in procs:
+        p.join()
+
+    startup = sorted(s[0] for s in samples)
+    total_rss = sum(s[1] for s in samples) / 1024
+    total_pss = sum(s[2] for s in samples) / 1024
+    print(f"{mode:<9} workers={n:<3} startup p50={startup[len(startup) // 2] * 1000:8.1f}ms  "
+          f"sum RSS={total_rss:8.1f}MB  sum PSS={total_pss:8.1f}MB")
+
+
+def per_rerun_cost(repeats):
+    """What a Streamlit rerun pays to get a usable model."""
+    import pickle
+    import numpy as np
+    from adaptive_engine import AdaptiveEngine
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        with open(MODEL_PATH, "rb") as f:
+            pickle.load(f)
+    legacy = (time.perf_counter() - start) / repeats
+
+    AdaptiveEngine().recommend_many(np.array(SAMPLE))  # first load
+    start = time.perf_counter()
+    for _ in range(repeats):
+        AdaptiveEngine().recommend_many(np.array(SAMPLE))
+    shared = (time.perf_counter() - start) / repeats
+
+    print(f"per rerun: legacy unpickle {legacy * 1000:.2f}ms | "
+          f"shared registry (engine + predict) {shared * 1000:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    for n in args.workers:
+        for mode in ("legacy", "registry"):
+            run_workers(mode, n)
+    per_rerun_cost(args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Queue hit rate and time-to-next-question with the puzzle prefetcher.
+
+Simulates learners that answer, get their new streak/confidence scored, think
+for a moment and press "Next Question". Compares generating the next puzzle on
+the click path with popping it from PuzzlePrefetcher. Run from the repository
+root:
+
+    python benchmarks/bench_prefetch.py --sessions 50 --questions 40
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from puzzle_generator import PuzzleGenerator  # noqa: E402
+from puzzle_prefetcher import PuzzlePrefetcher  # noqa: E402
+from tracker import ProgressTracker  # noqa: E402
+
+
+def learner(session_id, questions, think_s, next_puzzle, after_answer, latencies, lock):
+    rng = random.Random(session_id)
+    level, streak, confidence = "Easy", 1, 50.0
+    local = []
+    for _ in range(questions):
+        t0 = time.perf_counter()
+        _, _, expected_time = next_puzzle(session_id, level, streak, confidence)
+        local.append(time.perf_counter() - t0)
+
+        correct = rng.random() < 0.7
+        response_time = rng.uniform(2, 15)
+        confidence = ProgressTracker.calculate_confidence(correct, level, response_time, streak, expected_time)
+        streak = streak + 1 if correct else 0
+        after_answer(session_id, streak, confidence)
+        level = rng.choice(["Easy", "Medium", "Hard"])
+        time.sleep(think_s)
+    with lock:
+        latencies.extend(local)
+
+
+def run(name, sessions, questions, think_s, next_puzzle, after_answer):
+    latencies, lock = [], threading.Lock()
+    threads = [
+        threading.Thread(target=learner, args=(f"session_{i:08x}", questions, think_s,
+                                                next_puzzle, after_answer, latencies, lock))
+        for i in range(sessions)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lat_ms = np.asarray(latencies) * 1000
+    print(f"{name:<12} time-to-next-question p50={np.percentile(lat_ms, 50):.3f}ms "
+          f"p99={np.percentile(lat_ms, 99):.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--think-ms", type=float, default=20.0)
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    think_s = args.think_ms / 1000
+
+    generator = PuzzleGenerator()
+    run("on-demand", args.sessions, args.questions, think_s,
+        lambda sid, level, streak, conf: generator.generate_puzzle(level, streak, conf),
+        lambda sid, streak, conf: None)
+
+    prefetcher = PuzzlePrefetcher(depth=args.depth)
+    run("prefetched", args.sessions, args.questions, think_s, prefetcher.next_puzzle, prefetcher.prefetch)
+    prefetcher.shutdown()
+    stats = prefetcher.stats()
+    print(f"queue hit rate {stats['hit_rate']:.1%} over {stats['requests']} requests")
+
+
+if __name__ == "__main__":
+    main()
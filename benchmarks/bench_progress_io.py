@@ -0,0 +1,68 @@
+"""
+Bulk export/import throughput for progress.db.
+
+Fills a database with synthetic progress rows, then compares:
+
+  export  pandas read_sql of the whole table + to_csv  vs  progress_io.export_parquet
+  import  one commit per row (log_progress style, sampled)  vs  progress_io.import_rows
+
+Run from the repository root:
+
+    python benchmarks/bench_progress_io.py --rows 2000000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_progress_reads import fill  # noqa: E402
+from progress_io import export_parquet, import_rows  # noqa: E402
+from tracker import ProgressTracker  # noqa: E402
+
+
+def rate(rows, seconds):
+    return f"{rows / seconds:12.0f} rows/s ({seconds:7.2f}s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--row-by-row-sample", type=int, default=2_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.db")
+        fill(source, args.rows)
+
+        start = time.perf_counter()
+        conn = sqlite3.connect(source)
+        pd.read_sql_query("SELECT * FROM progress", conn).to_csv(os.path.join(tmp, "full.csv"), index=False)
+        conn.close()
+        print(f"export  pandas full read + CSV   {rate(args.rows, time.perf_counter() - start)}")
+
+        start = time.perf_counter()
+        export_parquet(source, os.path.join(tmp, "parquet"))
+        print(f"export  chunked Parquet          {rate(args.rows, time.perf_counter() - start)}")
+
+        tracker = ProgressTracker(os.path.join(tmp, "row_by_row.db"))
+        start = time.perf_counter()
+        for i in range(args.row_by_row_sample):
+            tracker.log_progress(f"session_{i // 50:08x}", "Easy", i % 2 == 0, 4.2, 1, 50.0)
+        print(f"import  commit per row (sampled) {rate(args.row_by_row_sample, time.perf_counter() - start)}")
+
+        start = time.perf_counter()
+        import_rows(os.path.join(tmp, "bulk.db"), os.path.join(tmp, "parquet"))
+        print(f"import  bulk from Parquet        {rate(args.rows, time.perf_counter() - start)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Sidebar render cost as the progress table grows.
+
+For each table size, fills a fresh database, then times one "sidebar render"
+(read a session's history and compute the four Live Tracker metrics):
+
+  legacy   new connection, unindexed SELECT * through pandas
+  cached   ProgressTracker.get_progress: (session_id, id) index + per-session
+           cache that only fetches rows added since the previous render
+
+Run from the repository root (the 10M-row case needs ~1GB of disk and a few minutes):
+
+    python benchmarks/bench_progress_reads.py --rows 10000 1000000 10000000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tracker import ProgressTracker, CREATE_PROGRESS, INSERT_PROGRESS  # noqa: E402
+
+ROWS_PER_SESSION = 50
+
+
+def fill(db_name, n_rows, chunk=200_000):
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(CREATE_PROGRESS)
+    rng = np.random.default_rng(0)
+    for start in range(0, n_rows, chunk):
+        ids = np.arange(start, min(start + chunk, n_rows))
+        correct = rng.integers(0, 2, len(ids))
+        rows = [
+            (f"session_{i // ROWS_PER_SESSION:08x}", "2025-01-01 00:00:00", "Easy", int(c), 4.2, 1, 50.0, None)
+            for i, c in zip(ids, correct)
+        ]
+        with conn:
+            conn.executemany(INSERT_PROGRESS, rows)
+    conn.close()
+
+
+def sidebar_metrics(df):
+    return (len(df), df["correct"].sum() / len(df) * 100, int(df["correct"].sum()), df["response_time"].mean())
+
+
+def legacy_render(db_name, session_id):
+    conn = sqlite3.connect(db_name)
+    try:
+        df = pd.read_sql_query("SELECT * FROM progress WHERE session_id = ?", conn, params=(session_id,))
+    finally:
+        conn.close()
+    return sidebar_metrics(df)
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return np.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            db_name = os.path.join(tmp, f"progress_{n_rows}.db")
+            fill(db_name, n_rows)
+            session_id = f"session_{(n_rows - 1) // ROWS_PER_SESSION // 2:08x}"
+
+            legacy_ms = timed(lambda: legacy_render(db_name, session_id), max(3, args.repeats // 4))
+
+            tracker = ProgressTracker(db_name)  # builds the index
+            tracker.get_progress(session_id)  # warm the session cache
+
+            def render():
+                tracker.log_progress(session_id, "Easy", True, 3.1, 2, 60.0)
+                return sidebar_metrics(tracker.get_progress(session_id))
+
+            cached_ms = timed(render, args.repeats)
+            print(f"rows={n_rows:<10} legacy render={legacy_ms:9.2f}ms  "
+                  f"indexed+cached render (incl. insert)={cached_ms:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Puzzles/sec for PuzzleGenerator.generate_batch vs repeated generate_puzzle calls,
+plus a check that both produce the same operator and operand distributions.
+
+Run from the repository root:
+
+    python benchmarks/bench_puzzle_generation.py --max-exp 6
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from puzzle_generator import PuzzleGenerator  # noqa: E402
+
+BANDS = [("Easy", 1, 30.0), ("Easy", 9, 60.0), ("Medium", 7, 60.0), ("Hard", 12, 90.0)]
+
+
+def compare_distributions(generator, n=20_000):
+    for level, streak, confidence in BANDS:
+        scalar = [generator.generate_puzzle(level, streak, confidence) for _ in range(n)]
+        questions, answers, times = generator.generate_batch(level, streak, confidence, n, seed=1)
+
+        scalar_ops = Counter(q.split()[1] for q, _, _ in scalar)
+        batch_ops = Counter(q.split()[1] for q in questions)
+        scalar_num2 = np.array([int(q.split()[2]) for q, _, _ in scalar])
+        batch_num2 = np.array([int(q.split()[2]) for q in questions])
+        print(f"{level:<6} streak={streak:<2} conf={confidence:<5} "
+              f"ops scalar={dict(sorted(scalar_ops.items()))} batch={dict(sorted(batch_ops.items()))} "
+              f"num2 mean scalar={scalar_num2.mean():.2f} batch={batch_num2.mean():.2f} "
+              f"mean time scalar={np.mean([t for _, _, t in scalar]):.3f} batch={times.mean():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-exp", type=int, default=6)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    generator = PuzzleGenerator()
+    compare_distributions(generator)
+
+    n = 10_000
+    start = time.perf_counter()
+    for _ in range(n):
+        generator.generate_puzzle("Medium", 7, 60.0)
+    print(f"generate_puzzle loop        {n / (time.perf_counter() - start):14.0f} puzzles/s")
+
+    for exp in range(args.max_exp + 1):
+        size = 10 ** exp
+        repeats = max(1, 10_000 // size)
+        start = time.perf_counter()
+        for i in range(repeats):
+            generator.generate_batch("Medium", 7, 60.0, size, seed=i)
+        elapsed = time.perf_counter() - start
+        print(f"generate_batch n={size:<9} {size * repeats / elapsed:14.0f} puzzles/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Counterfactual replay throughput, vectorized and parallel vs a per-answer loop.
+
+Fills a database with --rows synthetic answers (bench_analytics.fill), then
+replays it through the current policy and a candidate whose rules give
+harder levels longer expected times (per_level x2), first on one worker and
+then on --workers. The baseline re-drives --loop-sessions sessions one
+answer at a time with calculate_confidence and recommend_next_level, as a
+notebook replay would, and is extrapolated to the full database. Run from the
+repository root:
+
+    python benchmarks/bench_replay.py --rows 1000000 --workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from bench_analytics import ROWS_PER_SESSION, fill  # noqa: E402
+from adaptive_engine import AdaptiveEngine  # noqa: E402
+from puzzle_rules import DEFAULT_RULES_PATH, load_puzzle_rules  # noqa: E402
+from replay import ReplayPolicy, compare, iter_db_sessions, run_replay  # noqa: E402
+from tracker import ProgressTracker  # noqa: E402
+
+
+def loop_replay(db_name, n_sessions):
+    """Answer replays per second of a plain per-answer replay that only serves logged outcomes."""
+    engine = AdaptiveEngine()
+    rules = load_puzzle_rules()
+    chunk = next(iter_db_sessions(db_name, n_sessions * ROWS_PER_SESSION))
+    t0 = time.perf_counter()
+    level, streak, confidence, previous = "Easy", 1, 50.0, -1
+    for session, correct, response_time in zip(chunk["session"], chunk["correct"], chunk["response_time"]):
+        if session != previous:
+            level, streak, confidence, previous = "Easy", 1, 50.0, session
+        expected_time = rules.lookup(level, streak, confidence).mean_expected_time
+        confidence = ProgressTracker.calculate_confidence(bool(correct), level, response_time, streak, expected_time)
+        level, streak = engine.recommend_next_level(level, bool(correct), response_time, streak, confidence)
+    return len(chunk["session"]) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=200_000)
+    parser.add_argument("--loop-sessions", type=int, default=40)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "progress.db")
+        fill(db_name, args.rows, 0, 30, seed=0)
+        with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+            config = json.load(f)
+        config["expected_time"]["per_level"] *= 2
+        candidate_rules = os.path.join(tmp, "candidate_rules.json")
+        with open(candidate_rules, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        policies = [ReplayPolicy("current"), ReplayPolicy("slower_levels", rules_path=candidate_rules)]
+
+        loop_rate = loop_replay(db_name, args.loop_sessions)
+        print(f"{args.rows:,} answers, {len(policies)} policies, {os.cpu_count()} CPUs")
+        print(f"per-answer loop:            {loop_rate:9.0f} answer replays/s "
+              f"(~{args.rows * len(policies) / loop_rate:.0f}s for all)")
+        rates = {}
+        for workers in sorted({1, args.workers}):
+            report = run_replay(db_name, policies, workers, args.chunk_rows)
+            rates[workers] = report["answers_per_second"]
+            print(f"vectorized, {workers} worker(s): {rates[workers]:9.0f} answer replays/s "
+                  f"({report['seconds']:.1f}s for all, {rates[workers] / loop_rate:.0f}x loop)")
+        if len(rates) > 1:
+            print(f"parallel scaling: {rates[args.workers] / rates[1]:.2f}x on {args.workers} workers")
+        print()
+        print(compare(report).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
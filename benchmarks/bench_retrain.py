@@ -0,0 +1,89 @@
+"""
+Incremental retrain time vs new rows and vs table size.
+
+Fills a progress DB with synthetic sessions, takes a checkpoint at the end
+of it, appends `new` rows and times retrain.retrain. Repeated for several
+table sizes, so the output shows whether cost follows the new rows or the
+whole table. Works on a temporary copy of the model artifacts. Run from the
+repository root:
+
+    python benchmarks/bench_retrain.py --tables 200000 1000000 --new 10000 50000
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from retrain import retrain  # noqa: E402
+from tracker import CREATE_PROGRESS, CREATE_PROGRESS_INDEX, INSERT_PROGRESS  # noqa: E402
+
+LEVELS = np.array(["Easy", "Medium", "Hard"])
+ROWS_PER_SESSION = 50
+
+
+def append_sessions(db_name, n_rows, first_session, seed):
+    """n_rows synthetic answers in sessions of ROWS_PER_SESSION, levels drifting with streak."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for s in range(first_session, first_session + n_rows // ROWS_PER_SESSION):
+        level, streak = 0, 1
+        for _ in range(ROWS_PER_SESSION):
+            correct = rng.random() < 0.75 - 0.15 * level
+            response_time = float(rng.lognormal(1.6, 0.4))
+            confidence = float(np.clip(50 + (20 if correct else -20) + 2 * min(streak, 20), 0, 100))
+            streak = streak + 1 if correct else 0
+            rows.append((f"session_{s:08x}", "2025-01-01 00:00:00", LEVELS[level], int(correct),
+                         response_time, streak, confidence, 5.0 + 1.5 * level))
+            if correct and streak >= 3:
+                level = min(level + 1, 2)
+            elif not correct:
+                level = max(level - 1, 0)
+    conn = sqlite3.connect(db_name)
+    with conn:
+        conn.execute(CREATE_PROGRESS)
+        conn.execute(CREATE_PROGRESS_INDEX)
+        conn.executemany(INSERT_PROGRESS, rows)
+        last_id = conn.execute("SELECT MAX(id) FROM progress").fetchone()[0]
+    conn.close()
+    return first_session + n_rows // ROWS_PER_SESSION, last_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, nargs="+", default=[200_000, 1_000_000])
+    parser.add_argument("--new", type=int, nargs="+", default=[10_000, 50_000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    for table_rows in args.tables:
+        for new_rows in args.new:
+            with tempfile.TemporaryDirectory() as tmp:
+                model = os.path.join(tmp, "model.pkl")
+                shutil.copy(os.path.join(ROOT, "artifacts", "level_recommender_model.pkl"), model)
+                db_name = os.path.join(tmp, "progress.db")
+                checkpoint = os.path.join(tmp, "checkpoint.json")
+
+                next_session, last_id = append_sessions(db_name, table_rows, 0, seed=1)
+                with open(checkpoint, "w", encoding="utf-8") as f:
+                    json.dump({"last_id": last_id, "version": 0}, f)
+                append_sessions(db_name, new_rows, next_session, seed=2)
+
+                start = time.perf_counter()
+                meta = retrain(db_name, model, os.path.join(tmp, "forest"), os.path.join(tmp, "versions"),
+                               checkpoint, chunk_rows=50_000, trees_per_chunk=10)
+                elapsed = time.perf_counter() - start
+                print(f"table {table_rows:>9} rows + {new_rows:>7} new: retrain {elapsed:6.2f}s "
+                      f"({meta['trained_rows']} labelled rows, {meta['n_trees']} trees)")
+
+
+if __name__ == "__main__":
+    main()
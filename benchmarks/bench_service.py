@@ -0,0 +1,79 @@
+"""
+Concurrent learners against the async HTTP service (src/api.py).
+
+Each simulated learner creates a session, then loops: fetch puzzle, think,
+post an answer, read the summary. All learners run as asyncio tasks in one
+process via httpx's ASGI transport, so this measures the service rather than
+the network. Reports requests/sec and p50/p99 latency per endpoint. Run from
+the repository root:
+
+    python benchmarks/bench_service.py --learners 2000 --questions 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import learning_service  # noqa: E402
+from api import app  # noqa: E402
+
+
+async def learner(client, questions, think_s, latencies):
+    async def timed(name, method, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies[name].append(time.perf_counter() - start)
+        response.raise_for_status()
+        return response.json()
+
+    session_id = (await timed("POST /sessions", "POST", "/sessions"))["session_id"]
+    for _ in range(questions):
+        await timed("GET puzzle", "GET", f"/sessions/{session_id}/puzzle")
+        await asyncio.sleep(random.uniform(0, 2 * think_s))
+        await timed("POST answer", "POST", f"/sessions/{session_id}/answer",
+                    json={"answer": str(random.randint(0, 50)), "response_time": random.uniform(2, 12)})
+        await timed("GET summary", "GET", f"/sessions/{session_id}/summary")
+
+
+async def run(args):
+    latencies = defaultdict(list)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://service", timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(learner(client, args.questions, args.think_ms / 1000, latencies)
+                               for _ in range(args.learners)))
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{args.learners} concurrent learners: {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    for name, values in latencies.items():
+        ms = np.asarray(values) * 1000
+        print(f"  {name:<15} p50={np.percentile(ms, 50):8.2f}ms p99={np.percentile(ms, 99):8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--think-ms", type=float, default=200.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = learning_service._shared = learning_service.LearningService(os.path.join(tmp, "progress.db"))
+        service.engine.model  # the ASGI transport skips lifespan startup
+        asyncio.run(run(args))
+        service.tracker.flush()
+
+
+if __name__ == "__main__":
+    main()
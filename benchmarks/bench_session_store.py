@@ -0,0 +1,94 @@
+"""
+Memory per idle session and lookup cost for session_store.SessionStore.
+
+Holds N sessions, each with an open puzzle, as (a) one dict per learner like
+the old st.session_state and (b) __slots__ SessionState records in a
+SessionStore. Reports traced bytes per session, get() latency, and the time
+to evict and snapshot every session to SQLite. Run from the repository root:
+
+    python benchmarks/bench_session_store.py --sessions 100000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from session_store import SessionState, SessionStore  # noqa: E402
+
+LEVELS = ("Easy", "Medium", "Hard")
+
+
+def puzzle(i):
+    a, b = i % 97, i % 89
+    return f"{a} + {b}", float(a + b), 5.0
+
+
+def fill_dicts(n):
+    sessions = {}
+    for i in range(n):
+        question, answer, expected_time = puzzle(i)
+        session_id = f"session_{i:08x}"
+        sessions[session_id] = {
+            "session_id": session_id, "difficulty": LEVELS[i % 3], "recommended_level": LEVELS[i % 3],
+            "streak": i % 12, "confidence": 40.0 + i % 50, "current_puzzle": (question, answer),
+            "expected_time": expected_time, "question_start_time": time.time(), "show_answer": False,
+        }
+    return sessions
+
+
+def fill_store(n, db_name=None):
+    store = SessionStore(max_sessions=n, db_name=db_name)
+    for i in range(n):
+        state = SessionState(f"session_{i:08x}", LEVELS[i % 3], LEVELS[i % 3], i % 12, 40.0 + i % 50)
+        state.puzzle = puzzle(i)
+        state.issued_at, state.answered = time.time(), False
+        store.add(state)
+    return store
+
+
+def traced_bytes(build, n):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build(n)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    n = args.sessions
+
+    _, dict_bytes = traced_bytes(fill_dicts, n)
+    store, store_bytes = traced_bytes(fill_store, n)
+    print(f"dict per session         {dict_bytes / n:7.0f} B/session  {dict_bytes / 2**20:7.1f} MB for {n}")
+    print(f"SessionState + store     {store_bytes / n:7.0f} B/session  {store_bytes / 2**20:7.1f} MB for {n}")
+
+    ids = [f"session_{random.randrange(n):08x}" for _ in range(200_000)]
+    start = time.perf_counter()
+    for session_id in ids:
+        store.get(session_id)
+    print(f"get()                    {(time.perf_counter() - start) / len(ids) * 1e9:7.0f} ns/lookup")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = fill_store(n, os.path.join(tmp, "progress.db"))
+        store.ttl_seconds = 0
+        start = time.perf_counter()
+        evicted = store.evict_expired()
+        print(f"evict + snapshot         {evicted / (time.perf_counter() - start):7.0f} sessions/s")
+        start = time.perf_counter()
+        restored = sum(store.get(f"session_{i:08x}") is not None for i in range(0, n, max(1, n // 1000)))
+        print(f"restore from snapshot    {(time.perf_counter() - start) / restored * 1e6:7.1f} us/session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Write throughput of ShardedProgressTracker as the shard count grows.
+
+Starts --processes writer processes (like separate app workers), each
+logging answers for its own sessions with one commit per answer, for
+--seconds seconds, against 1, 2, 4 and 8 shards. Reports inserts/sec over
+all processes and p50/p99 log_progress latency. With one shard every commit
+waits for the same SQLite write lock; with N shards sessions only contend
+with the ~1/N of sessions that share their file. --synchronous FULL makes
+every commit wait for an fsync, which is where one write lock hurts most.
+Run from the repository root:
+
+    python benchmarks/bench_sharding.py --processes 8 --seconds 5 --shards 1 2 4 8
+    python benchmarks/bench_sharding.py --synchronous FULL
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+
+def writer(db_name, shards, worker, sessions, seconds, start_at, synchronous):
+    sys.path.insert(0, SRC)
+    logging.disable(logging.INFO)
+    from sharded_tracker import ShardedProgressTracker
+
+    tracker = ShardedProgressTracker(db_name, shards)
+    for shard in tracker.trackers:
+        # One thread per process, so the pool hands it this same connection back for every insert
+        with shard._connection() as conn:
+            conn.execute(f"PRAGMA synchronous={synchronous}")
+    session_ids = [f"session_{worker:03d}{i:05x}" for i in range(sessions)]
+    latencies = []
+    time.sleep(max(0.0, start_at - time.time()))  # all workers start together
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        tracker.log_progress(session_ids[i % sessions], "Easy", i % 3 != 0, 4.2, i % 7, 60.0)
+        latencies.append(time.perf_counter() - t0)
+        i += 1
+    return np.asarray(latencies)
+
+
+def run(shards, processes, sessions, seconds, synchronous):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "progress.db")
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes) as pool:
+            start_at = time.time() + 3.0  # after every worker has imported and opened its shards
+            latencies = np.concatenate(pool.starmap(
+                writer, [(db_name, shards, w, sessions, seconds, start_at, synchronous) for w in range(processes)]
+            )) * 1000
+    rate = len(latencies) / seconds
+    print(f"{shards:>3} shard(s): {rate:9.0f} inserts/s | log_progress p50={np.percentile(latencies, 50):6.2f}ms "
+          f"p99={np.percentile(latencies, 99):7.2f}ms")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=100, help="sessions per process")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--synchronous", choices=["NORMAL", "FULL"], default="NORMAL",
+                        help="FULL fsyncs every commit, as on a durability-first deployment")
+    args = parser.parse_args()
+
+    print(f"{args.processes} writer processes, {os.cpu_count()} CPUs, one commit per answer, "
+          f"synchronous={args.synchronous}")
+    rates = [run(shards, args.processes, args.sessions, args.seconds, args.synchronous) for shards in args.shards]
+    print("scaling vs first: " + ", ".join(f"{s} -> {r / rates[0]:.2f}x" for s, r in zip(args.shards, rates)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+End-to-end benchmark of the adaptive loop with a regression baseline.
+
+Runs simulation.run_simulation (generate puzzle -> answer -> confidence ->
+recommend -> log -> read progress) for synthetic learners on a process pool
+against a fresh progress DB. Then either records the report as the baseline
+or compares against it, exiting with status 1 when throughput or a stage's
+p50/p99 is worse than the tolerance, or when there is no baseline to compare
+against. The committed baseline was recorded with the defaults below on the
+host described in its "host" field. Run from the repository root:
+
+    python benchmarks/bench_simulation.py --update-baseline
+    python benchmarks/bench_simulation.py --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from exception import MathsException  # noqa: E402
+from simulation import STAGES, SimulationConfig, compare_to_baseline, load_baseline, run_simulation  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "simulation.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = SimulationConfig(learners=args.learners, questions=args.questions, workers=args.workers,
+                                  db_name=os.path.join(tmp, "simulation.db"))
+        report = run_simulation(config)
+    report["config"]["db_name"] = "<tmp>/simulation.db"
+
+    print(f"{report['answers']} answers in {report['wall_seconds']:.2f}s "
+          f"({report['answers_per_second']:.0f}/s), DB +{report['db_bytes_per_answer']:.0f} B/answer, "
+          f"worker RSS {report['worker_rss_mb']:.0f} MB")
+    for stage in STAGES:
+        s = report["stages"][stage]
+        print(f"  {stage:<10} p50={s['p50_ms']:8.3f}ms p95={s['p95_ms']:8.3f}ms p99={s['p99_ms']:8.3f}ms")
+
+    if args.update_baseline:
+        report["host"] = {"cpus": os.cpu_count(), "python": platform.python_version(),
+                          "platform": platform.platform()}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    try:
+        baseline = load_baseline(args.baseline)
+    except MathsException:
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        sys.exit(1)
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%} of {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"Within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Server CPU time per interaction of the Streamlit app under scripted sessions.
+
+Starts `streamlit run` on a script in a scratch directory (its own
+progress.db) and drives it over the app's websocket protocol like a
+browser would. Each session loads the page, then repeats: type an answer,
+press "Check Answer", press "Next Question". Fragment-scoped widgets are
+sent as fragment reruns, exactly as the frontend does. Reports the
+server's CPU seconds per interaction, measured with psutil after every
+session has loaded. Compare against an earlier version of the app with
+--before. Run from the repository root:
+
+    git show <rev>:src/main.py > /tmp/main_before.py
+    python benchmarks/bench_streamlit.py --sessions 20 --rounds 10 --before /tmp/main_before.py
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import psutil
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DONE = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+
+
+class Session:
+    """One browser tab: keeps the current widget ids (and their fragments) from the deltas."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}  # label -> (widget id, fragment id)
+
+    async def run(self, states=(), fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(states)
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self.ws.read_message()
+            if data is None:
+                raise RuntimeError("Streamlit closed the connection")
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            if forward.HasField("delta") and forward.delta.HasField("new_element"):
+                element = forward.delta.new_element
+                kind = element.WhichOneof("type")
+                if kind in ("button", "text_input"):
+                    widget = getattr(element, kind)
+                    self.widgets[widget.label] = (widget.id, forward.delta.fragment_id)
+            elif forward.HasField("script_finished") and forward.script_finished in DONE:
+                return
+
+    async def type_answer(self, text):
+        widget_id, fragment_id = self.widgets["✏️ Enter your answer:"]
+        await self.run([WidgetState(id=widget_id, string_value=text)], fragment_id)
+
+    async def press(self, label, text):
+        answer_id, _ = self.widgets["✏️ Enter your answer:"]
+        widget_id, fragment_id = self.widgets[label]
+        await self.run([WidgetState(id=answer_id, string_value=text),
+                        WidgetState(id=widget_id, trigger_value=True)], fragment_id)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _connect(port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                           subprotocols=["streamlit"], max_message_size=2**28)
+        except (ConnectionError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.25)
+
+
+async def drive(port, server, sessions, rounds):
+    tabs = [Session(await _connect(port)) for _ in range(sessions)]
+    await asyncio.gather(*(tab.run() for tab in tabs))  # first page load, incl. model load
+
+    proc = psutil.Process(server.pid)
+    cpu_before = sum(proc.cpu_times()[:2])
+    start = time.perf_counter()
+
+    async def learner(tab, seed):
+        for i in range(rounds):
+            answer = str((seed + i) % 20)
+            await tab.type_answer(answer)
+            await tab.press("✅ Check Answer", answer)
+            await tab.press("➡️ Next Question", "")
+
+    await asyncio.gather(*(learner(tab, n) for n, tab in enumerate(tabs)))
+    elapsed = time.perf_counter() - start
+    cpu = sum(proc.cpu_times()[:2]) - cpu_before
+    for tab in tabs:
+        tab.ws.close()
+    return cpu, elapsed, sessions * rounds * 3
+
+
+def measure(script, sessions, rounds):
+    workdir = tempfile.mkdtemp(prefix="bench_streamlit_")
+    for name in ("artifacts", "config"):
+        os.symlink(os.path.abspath(os.path.join(ROOT, name)), os.path.join(workdir, name))
+    shutil.copy(script, os.path.join(workdir, "app.py"))
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(os.path.join(ROOT, "src")), LOG_SAMPLE="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false",
+         "--logger.level", "error"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        return asyncio.run(drive(port, server, sessions, rounds))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def report(name, cpu, elapsed, interactions):
+    print(f"{name:<28} {interactions} interactions in {elapsed:6.2f}s | "
+          f"server CPU {cpu:6.2f}s = {cpu / interactions * 1000:7.2f} ms/interaction")
+    return cpu / interactions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default=os.path.join(ROOT, "src", "main.py"))
+    parser.add_argument("--before", help="an earlier main.py to compare against")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    results = []
+    if args.before:
+        results.append(report("before: " + os.path.basename(args.before),
+                              *measure(args.before, args.sessions, args.rounds)))
+    results.append(report("after:  " + os.path.relpath(args.script), *measure(args.script, args.sessions, args.rounds)))
+    if len(results) == 2:
+        print(f"CPU per interaction: {results[0] / results[1]:.1f}x less")
@@ -0,0 +1,101 @@
+"""
+Concurrent write load test for ProgressTracker.
+
+Simulates many sessions answering questions at once, each on its own thread,
+and reports inserts/sec and per-call commit latency for:
+
+  legacy        new connection + rollback journal + commit + close per row
+  pooled        shared pool of WAL connections, one commit per row
+  write-behind  queued rows group-committed by a background writer
+
+Run from the repository root:
+
+    python benchmarks/bench_tracker_writes.py --sessions 300 --answers 20
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tracker import ProgressTracker, CREATE_PROGRESS, INSERT_PROGRESS  # noqa: E402
+
+
+def legacy_log(db_name, row):
+    """The pre-pooling log_progress: connect, insert, commit, close."""
+    conn = sqlite3.connect(db_name, timeout=30)
+    try:
+        conn.execute(INSERT_PROGRESS, row)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def make_row(session_id, i):
+    return (session_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "Easy", i % 2, 4.2, i, 55.0, None)
+
+
+def run(mode, sessions, answers, db_name):
+    if mode == "legacy":
+        conn = sqlite3.connect(db_name)
+        conn.execute(CREATE_PROGRESS)
+        conn.close()
+        log = lambda row: legacy_log(db_name, row)  # noqa: E731
+    else:
+        tracker = ProgressTracker(db_name, write_behind=(mode == "write-behind"))
+        log = lambda row: tracker.log_progress(*row[:1], *row[2:])  # noqa: E731
+
+    latencies = []
+    lock = threading.Lock()
+
+    def session(idx):
+        local = []
+        session_id = f"session_{idx:08x}"
+        for i in range(answers):
+            t0 = time.perf_counter()
+            log(make_row(session_id, i))
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if mode == "write-behind":
+        tracker.flush()
+    elapsed = time.perf_counter() - start
+
+    count = sqlite3.connect(db_name).execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+    lat_ms = np.asarray(latencies) * 1000
+    line = (f"{mode:<13} rows={count:<7} {count / elapsed:10.0f} inserts/s  "
+            f"call p50={np.percentile(lat_ms, 50):7.3f}ms p99={np.percentile(lat_ms, 99):8.3f}ms")
+    if mode == "write-behind":
+        commits = np.asarray(tracker.writer.commit_latencies) * 1000
+        line += f"  group commit p50={np.percentile(commits, 50):.3f}ms ({len(commits)} commits)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--answers", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("legacy", "pooled", "write-behind"):
+            run(mode, args.sessions, args.answers, os.path.join(tmp, f"{mode}.db"))
+
+
+if __name__ == "__main__":
+    main()
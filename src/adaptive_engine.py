@@ -1,8 +1,11 @@
-import pickle
-import pandas as pd
-from typing import Tuple
+import numpy as np
+from typing import Optional, Tuple
 from logger import logger
 from exception import MathsException
+from forest_compiler import CompiledForest
+from level_table import LevelLookupTable
+from model_registry import ModelRegistry
+from metrics import timed
 
 
 class AdaptiveEngine:
@@ -12,30 +15,100 @@ class AdaptiveEngine:
     based on user performance and confidence.
     """
 
-    def __init__(self, model_path: str = "artifacts/level_recommender_model.pkl"):
+    # Column order accepted by recommend_many: (level, correct, response_time, streak, confidence)
+    BATCH_COLUMNS = ("level", "correct", "response_time", "streak", "confidence")
+    # Reorders BATCH_COLUMNS into the model's training order:
+    # difficulty, response_time, correct, streak, confidence
+    _MODEL_COLUMN_ORDER = [0, 2, 1, 3, 4]
+
+    def __init__(self, model_path: str = "artifacts/level_recommender_model.pkl",
+                 forest_path: str = "artifacts/level_recommender_forest",
+                 table_path: Optional[str] = None):
 
         self.logger = logger
         self.model_path = model_path
+        self.forest_path = forest_path
 
         self.difficulty_mapping = {"Easy": 1, "Medium": 2, "Hard": 3}
         self.reverse_difficulty_mapping = {v: k for k, v in self.difficulty_mapping.items()}
 
-        self.model = self._load_model()
+        # Process-wide and lazy: constructing an engine per rerun costs nothing
+        self._registry = ModelRegistry.get(model_path, forest_path)
+        # Optional "table mode": O(1) grid lookups with live-model fallback
+        self.table = self._load_table(table_path) if table_path else None
+        self._stale_table_warned = None
+
+    @property
+    def model(self) -> CompiledForest:
+        """The shared model, loaded on first use and hot-swapped on change."""
+        return self._registry.model
+
+    def _load_table(self, table_path: str) -> Optional[LevelLookupTable]:
+        """Loads the precomputed level table, staying on the live model if unusable."""
+        try:
+            table = LevelLookupTable.load(table_path)
+            self.logger.info(
+                f" Level table loaded from: {table_path} "
+                f"(disagreement {table.meta['disagreement_rate']:.4%})"
+            )
+            return table
+        except MathsException:
+            self.logger.warning("⚠ Level table unavailable, using live model only.")
+            return None
+
+    def _table_matches(self, model: CompiledForest) -> bool:
+        """Whether the table was built from the model the registry serves now (not before a hot-swap)."""
+        if self.table.meta.get("model_fingerprint") == model.fingerprint:
+            return True
+        if self._stale_table_warned != model.fingerprint:
+            self.logger.warning(
+                f"⚠ Level table was built from another model than the one now served "
+                f"({model.fingerprint}); using the live model until the table is rebuilt."
+            )
+            self._stale_table_warned = model.fingerprint
+        return False
+
+    def _predict_levels(self, features: np.ndarray) -> np.ndarray:
+        """Predicts encoded levels for rows in training column order."""
+        model = self.model
+        if self.table is None or not self._table_matches(model):
+            return model.predict(features)
+
+        levels, hit = self.table.lookup(features)
+        if not hit.all():
+            levels[~hit] = model.predict(features[~hit])
+        return levels
+
+    @timed("engine.recommend_many")
+    def recommend_many(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts next difficulty for a batch of interactions in one model call.
+
+        :param batch: (n, 5) array with columns in BATCH_COLUMNS order, where
+                      level is already encoded as 1 (Easy), 2 (Medium) or 3 (Hard)
+        :return: encoded next levels and updated streaks, both of shape (n,)
+        """
+        batch = np.ascontiguousarray(batch, dtype=np.float64)
+        if batch.ndim != 2 or batch.shape[1] != len(self.BATCH_COLUMNS):
+            raise MathsException(f"Batch must have shape (n, {len(self.BATCH_COLUMNS)}), got {batch.shape}")
+
+        levels = batch[:, 0].astype(np.int64)
+        correct = batch[:, 1] != 0
+        new_streaks = np.where(correct, batch[:, 3].astype(np.int64) + 1, 0)
+
+        if len(batch) == 0:
+            return levels, new_streaks
 
-    def _load_model(self):
-        """Loads the ML model safely."""
         try:
-            with open(self.model_path, "rb") as f:
-                model = pickle.load(f)
-            self.logger.info(f" Model loaded successfully from: {self.model_path}")
-            return model
-        except FileNotFoundError:
-            self.logger.error(f" Model file not found: {self.model_path}")
-            raise MathsException("Model file missing! Ensure trained model exists.")
+            next_levels = self._predict_levels(batch[:, self._MODEL_COLUMN_ORDER]).astype(np.int64)
         except Exception as e:
-            self.logger.error(f" Failed to load model: {e}")
-            raise MathsException("Model loading failed!") from e
+            self.logger.error(f" Batch prediction failed: {e}")
+            next_levels = levels  # fallback
+            self.logger.warning("⚠ Falling back to current difficulty for the whole batch.")
+
+        return next_levels, new_streaks
 
+    @timed("engine.recommend_next_level")
     def recommend_next_level(
         self,
         current_level: str,
@@ -49,21 +122,20 @@ class AdaptiveEngine:
         try:
             level_encoded = self.difficulty_mapping.get(current_level, 2)
 
-            input_data = pd.DataFrame([{
-                "difficulty": level_encoded,
-                "response_time": response_time,
-                "correct": int(correct),
-                "streak": streak,
-                "confidence": confidence
-            }])
+            input_data = np.array([[
+                level_encoded,
+                response_time,
+                int(correct),
+                streak,
+                confidence
+            ]], dtype=np.float64)
 
             self.logger.info(
-                f"🧠 Predicting -> "
-                f"Level: {current_level}, Correct: {correct}, Time: {response_time:.2f}s, "
-                f"Streak: {streak}, Conf: {confidence:.2f}"
+                "🧠 Predicting -> Level: %s, Correct: %s, Time: %.2fs, Streak: %s, Conf: %.2f",
+                current_level, correct, response_time, streak, confidence
             )
 
-            predicted_level_num = self.model.predict(input_data)[0]
+            predicted_level_num = int(self._predict_levels(input_data)[0])
             next_level = self.reverse_difficulty_mapping.get(predicted_level_num, current_level)
 
         except MathsException:
@@ -76,5 +148,5 @@ class AdaptiveEngine:
         # Update streak logic
         new_streak = streak + 1 if correct else 0
 
-        self.logger.info(f"Output → Next Level: {next_level} | New Streak: {new_streak}")
+        self.logger.info("Output → Next Level: %s | New Streak: %s", next_level, new_streak)
         return next_level, new_streak
@@ -0,0 +1,339 @@
+import argparse
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from logger import configure_logging, logger
+from exception import MathsException
+from tracker import POOL
+
+LEVELS = ("Easy", "Medium", "Hard")
+
+# Upper edges (seconds) of the response-time histogram; the last bucket is "> 60s"
+RT_BUCKETS = (1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+HIST_COLUMNS = [f"hist_{i}" for i in range(len(RT_BUCKETS) + 1)]
+HIST_LABELS = [f"≤{edge:g}s" for edge in RT_BUCKETS] + [f">{RT_BUCKETS[-1]:g}s"]
+
+# Period key = prefix of the progress timestamp ("YYYY-MM-DD HH:MM:SS")
+GRAINS = {"hourly": 13, "daily": 10}
+
+# Session id of the rows that aggregate every session
+ALL_SESSIONS = "*"
+# Key of rows whose session_id, timestamp or difficulty is NULL or empty, so no row drops out of a rollup
+UNKNOWN = "unknown"
+
+# session_id leads the key, so both the all-sessions rows and a cohort's rows
+# are short range scans
+CREATE_ROLLUP = """
+    CREATE TABLE IF NOT EXISTS rollup_{grain} (
+        session_id TEXT NOT NULL,
+        period TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        correct_count INTEGER NOT NULL,
+        rt_sum REAL NOT NULL,
+        rt_sumsq REAL NOT NULL,
+        {hist},
+        PRIMARY KEY (session_id, period, difficulty)
+    ) WITHOUT ROWID
+""".replace("{hist}", ",\n        ".join(f"{c} INTEGER NOT NULL" for c in HIST_COLUMNS))
+
+UPSERT_ROLLUP = """
+    INSERT INTO rollup_{grain} VALUES ({placeholders})
+    ON CONFLICT(session_id, period, difficulty) DO UPDATE SET
+        attempts = attempts + excluded.attempts,
+        correct_count = correct_count + excluded.correct_count,
+        rt_sum = rt_sum + excluded.rt_sum,
+        rt_sumsq = rt_sumsq + excluded.rt_sumsq,
+        {hist}
+""".replace("{placeholders}", ", ".join("?" * (7 + len(HIST_COLUMNS)))).replace(
+    "{hist}", ",\n        ".join(f"{c} = {c} + excluded.{c}" for c in HIST_COLUMNS))
+
+CREATE_TRANSITIONS = """
+    CREATE TABLE IF NOT EXISTS rollup_transitions (
+        session_id TEXT NOT NULL,
+        period TEXT NOT NULL,
+        from_level TEXT NOT NULL,
+        to_level TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (session_id, period, from_level, to_level)
+    ) WITHOUT ROWID
+"""
+
+UPSERT_TRANSITIONS = """
+    INSERT INTO rollup_transitions VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(session_id, period, from_level, to_level) DO UPDATE SET count = count + excluded.count
+"""
+
+CREATE_ROLLUP_STATE = """
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL
+    )
+"""
+
+NEW_PROGRESS_ROWS = """
+    SELECT id, session_id, timestamp, difficulty, correct, response_time
+    FROM progress WHERE id > ? ORDER BY id LIMIT ?
+"""
+
+PREVIOUS_LEVEL = """
+    SELECT difficulty FROM progress WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT 1
+"""
+
+
+class CohortAnalytics:
+    """
+    Class- and school-wide dashboards from rollups of the progress table.
+
+    refresh() folds progress rows added since its last run into hourly and
+    daily rollup tables in the same database: attempts, correct answers, sum
+    and sum of squares of response time, and a response-time histogram per
+    (session, period, difficulty), plus per-day level transitions. Every
+    measure is also kept for ALL_SESSIONS, so school-wide queries read a few
+    hundred rollup rows instead of scanning progress. Pass `sessions` to a
+    query to restrict it to a cohort (a class).
+    """
+
+    def __init__(self, db_name: str = "progress.db"):
+        self.db_name = db_name
+        try:
+            with POOL.connection(db_name) as conn, conn:
+                for grain in GRAINS:
+                    conn.execute(CREATE_ROLLUP.format(grain=grain))
+                conn.execute(CREATE_TRANSITIONS)
+                conn.execute(CREATE_ROLLUP_STATE)
+        except Exception as e:
+            logger.error(f"❌ Failed to create rollup tables: {e}")
+            raise MathsException("Failed to initialize analytics rollups") from e
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def refresh(self, batch_rows: int = 100_000) -> int:
+        """
+        Folds new progress rows into the rollups; returns how many were added.
+
+        Each batch is aggregated in pandas and upserted in one IMMEDIATE
+        transaction together with the checkpoint, so concurrent refreshers
+        (or a crash) never count a row twice. Cost follows the new rows only.
+        """
+        start = time.perf_counter()
+        last_levels: Dict[str, str] = {}
+        total = 0
+        try:
+            with POOL.connection(self.db_name) as conn:
+                while True:
+                    with conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        row = conn.execute("SELECT last_id FROM rollup_state WHERE name = 'progress'").fetchone()
+                        last_id = row[0] if row else 0
+                        rows = conn.execute(NEW_PROGRESS_ROWS, (last_id, batch_rows)).fetchall()
+                        if not rows:
+                            break
+                        batch = pd.DataFrame(rows, columns=["id", "session_id", "timestamp", "difficulty",
+                                                            "correct", "response_time"])
+                        batch["difficulty"] = batch["difficulty"].fillna(UNKNOWN)
+                        for grain, width in GRAINS.items():
+                            conn.executemany(UPSERT_ROLLUP.format(grain=grain), _rollup_rows(batch, width))
+                        conn.executemany(UPSERT_TRANSITIONS, self._transition_rows(conn, batch, last_levels))
+                        conn.execute("INSERT OR REPLACE INTO rollup_state VALUES ('progress', ?)", (rows[-1][0],))
+                    total += len(rows)
+                    logger.debug("Rolled up %d progress rows (up to id %d)", len(rows), rows[-1][0])
+        except Exception as e:
+            logger.error(f"❌ Rollup refresh failed: {e}")
+            raise MathsException("Failed to refresh analytics rollups") from e
+
+        if total:
+            logger.info(f"📊 Rolled up {total} progress rows in {time.perf_counter() - start:.2f}s")
+        return total
+
+    @staticmethod
+    def _transition_rows(conn, batch: pd.DataFrame, last_levels: Dict[str, str]) -> List[tuple]:
+        """
+        (session, day, from, to, count) for every answer after the first of its session.
+
+        Answers without a session_id belong to no sequence and have no transitions.
+        """
+        batch = batch[batch["session_id"].notna()]
+        previous = batch.groupby("session_id", sort=False)["difficulty"].shift()
+        first = previous.isna()
+        if first.any():
+            # A session's first row in this batch continues from its last level before it
+            heads = batch.loc[first, ["session_id", "id"]]
+            carried = []
+            for session_id, first_id in heads.itertuples(index=False):
+                level = last_levels.get(session_id)
+                if level is None:
+                    found = conn.execute(PREVIOUS_LEVEL, (session_id, first_id)).fetchone()
+                    level = (found[0] or UNKNOWN) if found else None
+                carried.append(level)
+            previous[first] = carried
+        last_levels.update(batch.groupby("session_id", sort=False)["difficulty"].last())
+
+        moves = pd.DataFrame({
+            "session_id": batch["session_id"],
+            "period": _periods(batch["timestamp"], GRAINS["daily"]),
+            "from_level": previous,
+            "to_level": batch["difficulty"],
+        }).dropna()
+        per_session = moves.groupby(["session_id", "period", "from_level", "to_level"]).size()
+        overall = per_session.groupby(level=["period", "from_level", "to_level"]).sum()
+        return list(per_session.reset_index().itertuples(index=False, name=None)) + [
+            (ALL_SESSIONS, *key, int(count)) for key, count in overall.items()
+        ]
+
+    # ------------------------------------------------------------------
+    # Dashboard queries
+    # ------------------------------------------------------------------
+    def _query(self, sql: str, params: tuple) -> list:
+        try:
+            with POOL.connection(self.db_name) as conn:
+                return conn.execute(sql, params).fetchall()
+        except Exception as e:
+            logger.error(f"❌ Analytics query failed: {e}")
+            raise MathsException("Failed to query analytics rollups") from e
+
+    def accuracy_over_time(self, grain: str = "daily", start: Optional[str] = None, end: Optional[str] = None,
+                           sessions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Attempts and accuracy (%) per period and difficulty; periods in [start, end)."""
+        where, params = _filters(start, end, sessions)
+        rows = self._query(
+            f"SELECT period, difficulty, SUM(attempts), SUM(correct_count) FROM {_table(grain)} "
+            f"WHERE {where} GROUP BY period, difficulty ORDER BY period, difficulty",
+            params,
+        )
+        df = pd.DataFrame(rows, columns=["period", "difficulty", "attempts", "correct"])
+        df["accuracy"] = df["correct"] / df["attempts"] * 100
+        return df
+
+    def response_times(self, grain: str = "daily", start: Optional[str] = None, end: Optional[str] = None,
+                       sessions: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Per difficulty: attempts, mean/std response time, approximate p50/p90 and the histogram."""
+        where, params = _filters(start, end, sessions)
+        hist_sums = ", ".join(f"SUM({c})" for c in HIST_COLUMNS)
+        rows = self._query(
+            f"SELECT difficulty, SUM(attempts), SUM(rt_sum), SUM(rt_sumsq), {hist_sums} FROM {_table(grain)} "
+            f"WHERE {where} GROUP BY difficulty ORDER BY difficulty",
+            params,
+        )
+        df = pd.DataFrame(rows, columns=["difficulty", "attempts", "rt_sum", "rt_sumsq"] + HIST_LABELS)
+        mean = df["rt_sum"] / df["attempts"]
+        df.insert(2, "mean", mean)
+        df.insert(3, "std", np.sqrt(np.maximum(df["rt_sumsq"] / df["attempts"] - mean ** 2, 0.0)))
+        counts = df[HIST_LABELS].to_numpy(dtype=float)
+        df.insert(4, "p50", [_hist_quantile(c, 0.5) for c in counts])
+        df.insert(5, "p90", [_hist_quantile(c, 0.9) for c in counts])
+        return df.drop(columns=["rt_sum", "rt_sumsq"])
+
+    def level_transitions(self, start: Optional[str] = None, end: Optional[str] = None,
+                          sessions: Optional[Iterable[str]] = None, normalize: bool = False) -> pd.DataFrame:
+        """Level-to-next-level counts (rows: from, columns: to), or row-normalised rates."""
+        where, params = _filters(start, end, sessions)
+        rows = self._query(
+            f"SELECT from_level, to_level, SUM(count) FROM rollup_transitions "
+            f"WHERE {where} GROUP BY from_level, to_level",
+            params,
+        )
+        labels = list(LEVELS) + sorted({level for row in rows for level in row[:2]} - set(LEVELS))
+        matrix = pd.DataFrame(0, index=pd.Index(labels, name="from"), columns=pd.Index(labels, name="to"))
+        for from_level, to_level, count in rows:
+            matrix.loc[from_level, to_level] = count
+        if normalize:
+            matrix = matrix.div(matrix.sum(axis=1).replace(0, 1), axis=0)
+        return matrix
+
+
+def _rollup_rows(batch: pd.DataFrame, width: int) -> List[tuple]:
+    """Rollup upsert rows for one batch: one per (session, period, difficulty), plus ALL_SESSIONS."""
+    rt = batch["response_time"].fillna(0.0).to_numpy(dtype=float)
+    frame = pd.DataFrame({
+        "session_id": batch["session_id"].fillna(UNKNOWN),
+        "period": _periods(batch["timestamp"], width),
+        "difficulty": batch["difficulty"],
+        "attempts": 1,
+        "correct_count": batch["correct"].fillna(0).astype(int),
+        "rt_sum": rt,
+        "rt_sumsq": rt * rt,
+    })
+    bucket = np.searchsorted(RT_BUCKETS, rt, side="left")
+    for i, column in enumerate(HIST_COLUMNS):
+        frame[column] = (bucket == i).astype(np.int64)
+
+    per_session = frame.groupby(["session_id", "period", "difficulty"], sort=False).sum()
+    overall = per_session.groupby(level=["period", "difficulty"], sort=False).sum()
+    overall.index = pd.MultiIndex.from_tuples([(ALL_SESSIONS, *key) for key in overall.index])
+    both = pd.concat([per_session, overall]).reset_index()
+    return list(both.itertuples(index=False, name=None))
+
+
+def _periods(timestamps: pd.Series, width: int) -> pd.Series:
+    """Period keys; NULL and empty timestamps share the UNKNOWN period (as in progress_io exports)."""
+    return timestamps.fillna("").str.slice(0, width).replace("", UNKNOWN)
+
+
+def _table(grain: str) -> str:
+    if grain not in GRAINS:
+        raise MathsException(f"Unknown rollup grain: {grain} (expected one of {', '.join(GRAINS)})")
+    return f"rollup_{grain}"
+
+
+def _filters(start: Optional[str], end: Optional[str], sessions: Optional[Iterable[str]]) -> Tuple[str, tuple]:
+    if sessions is None:
+        clauses, params = ["session_id = ?"], [ALL_SESSIONS]
+    else:
+        clauses, params = ["session_id IN (SELECT value FROM json_each(?))"], [json.dumps(list(sessions))]
+    if start is not None:
+        clauses.append("period >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("period < ?")
+        params.append(end)
+    return " AND ".join(clauses), tuple(params)
+
+
+def _hist_quantile(counts: np.ndarray, q: float) -> float:
+    """Quantile interpolated linearly inside its histogram bucket (the open last bucket gives its lower edge)."""
+    total = counts.sum()
+    if not total:
+        return float("nan")
+    cumulative = np.cumsum(counts)
+    i = int(np.searchsorted(cumulative, q * total))
+    if i >= len(RT_BUCKETS):
+        return RT_BUCKETS[-1]
+    lower = RT_BUCKETS[i - 1] if i else 0.0
+    before = cumulative[i - 1] if i else 0.0
+    return lower + (RT_BUCKETS[i] - lower) * (q * total - before) / counts[i]
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Cohort analytics rollups over progress.db.")
+    parser.add_argument("command", choices=["refresh", "accuracy", "response-times", "transitions"])
+    parser.add_argument("--db", default="progress.db")
+    parser.add_argument("--grain", choices=list(GRAINS), default="daily")
+    parser.add_argument("--start", help="first period, e.g. 2025-01-01 or '2025-01-01 09'")
+    parser.add_argument("--end", help="end period (exclusive)")
+    parser.add_argument("--sessions", nargs="+", help="restrict to these session ids (a cohort)")
+    parser.add_argument("--every", type=float, help="with refresh: keep refreshing every N seconds")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    analytics = CohortAnalytics(args.db)
+    if args.command == "refresh":
+        while True:
+            analytics.refresh()
+            if not args.every:
+                return
+            time.sleep(args.every)
+    if args.command == "accuracy":
+        result = analytics.accuracy_over_time(args.grain, args.start, args.end, args.sessions)
+    elif args.command == "response-times":
+        result = analytics.response_times(args.grain, args.start, args.end, args.sessions)
+    else:
+        result = analytics.level_transitions(args.start, args.end, args.sessions)
+    print(result.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from logger import configure_logging, logger
+from exception import MathsException
+from learning_service import SessionNotFound, get_service
+import metrics
+
+# Model inference and SQLite calls block; they run here, off the event loop
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SERVICE_WORKERS", "32")),
+                               thread_name_prefix="learning-service")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    # Load the model and rules before the first learner arrives
+    await asyncio.get_running_loop().run_in_executor(_executor, lambda: get_service().engine.model)
+    logger.info("✅ Math Adventures service started.")
+    yield
+    get_service().tracker.flush()
+    get_service().sessions.snapshot_all()
+    _executor.shutdown(wait=True)
+
+
+app = FastAPI(title="Math Adventures", version="1.0", lifespan=lifespan)
+
+
+class SessionCreated(BaseModel):
+    session_id: str
+
+
+class Puzzle(BaseModel):
+    question: str
+    difficulty: str
+    expected_time: float
+    issued_at: float
+
+
+class Answer(BaseModel):
+    answer: str
+    response_time: Optional[float] = None  # seconds; measured server-side when omitted
+
+
+class Feedback(BaseModel):
+    correct: bool
+    valid_input: bool
+    correct_answer: float
+    response_time: float
+    confidence: float
+    streak: int
+    next_level: str
+
+
+class Summary(BaseModel):
+    attempts: int
+    correct: int
+    accuracy: float
+    avg_response_time: float
+    score: int
+    streak: int
+    confidence: float
+
+
+class Progress(BaseModel):
+    attempt: List[int]
+    score: List[int]
+    streak: List[int]
+
+
+async def _call(func, *args):
+    """Runs a blocking service call in the executor, mapping errors to HTTP statuses."""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, partial(func, *args))
+    except SessionNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {e.args[0]}") from e
+    except MathsException as e:
+        logger.error(f"Maths Exception: {e}")
+        raise HTTPException(status_code=400, detail=e.args[0]) from e
+
+
+@app.post("/sessions", response_model=SessionCreated, status_code=201)
+async def create_session():
+    return await _call(get_service().create_session)
+
+
+@app.get("/sessions/{session_id}/puzzle", response_model=Puzzle)
+async def get_puzzle(session_id: str):
+    return await _call(get_service().current_puzzle, session_id)
+
+
+@app.post("/sessions/{session_id}/puzzle", response_model=Puzzle)
+async def post_puzzle(session_id: str):
+    return await _call(get_service().next_puzzle, session_id)
+
+
+@app.post("/sessions/{session_id}/answer", response_model=Feedback)
+async def post_answer(session_id: str, body: Answer):
+    return await _call(get_service().submit_answer, session_id, body.answer, body.response_time)
+
+
+@app.get("/sessions/{session_id}/summary", response_model=Summary)
+async def get_summary(session_id: str):
+    return await _call(get_service().summary, session_id)
+
+
+@app.get("/sessions/{session_id}/progress", response_model=Progress)
+async def get_progress(session_id: str, max_points: int = 200):
+    return await _call(get_service().progress, session_id, max_points)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return metrics.render_prometheus()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("SERVICE_HOST", "127.0.0.1"), port=int(os.getenv("SERVICE_PORT", "8000")))
@@ -3,6 +3,8 @@ import sys
 
 def error_message_detail(error, error_detail: sys):
     _, _, exc_tb = error_detail.exc_info()
+    if exc_tb is None:  # raised outside an except block
+        return "Error occurred error message [{0}]".format(str(error))
 
     file_name = exc_tb.tb_frame.f_code.co_filename
 
@@ -14,7 +16,7 @@ def error_message_detail(error, error_detail: sys):
 
 
 class MathsException(Exception):
-    def __init__(self, error_message, error_detail:sys):
+    def __init__(self, error_message, error_detail: sys = sys):
         """
         :param error_message: error message in string format
         """
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+from typing import Optional
+from logger import configure_logging, logger
+from exception import MathsException
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into plain NumPy arrays.
+
+    All trees share one node table and leaves point to themselves, so a
+    whole batch walks every tree level by level in a few vectorised steps.
+    Predictions match sklearn exactly: inputs are cast to float32 like
+    sklearn trees do, leaf probabilities are summed tree by tree in fit
+    order, and ties resolve to the first class.
+    """
+
+    ARRAYS = ("feature", "threshold", "children_left", "children_right", "value", "roots", "classes")
+
+    def __init__(self, feature, threshold, children_left, children_right, value, roots, classes,
+                 max_depth: int, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+        self._fingerprint = None
+        self.is_leaf = np.asarray(children_left) == np.arange(len(children_left))
+        self.n_trees = len(roots)
+        self.n_features = int(feature.max()) + 1 if len(feature) else 0
+        if self.feature_names is not None:
+            self.n_features = len(self.feature_names)
+
+    @classmethod
+    def from_model(cls, model) -> "CompiledForest":
+        """Flattens a fitted single-output RandomForestClassifier."""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise MathsException("Only single-output forests can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            own_index = np.arange(offset, offset + n, dtype=np.int32)
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own_index, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, own_index, tree.children_right + offset).astype(np.int32))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children_left=np.concatenate(lefts),
+            children_right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+            feature_names=getattr(model, "feature_names_in_", None),
+        )
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities for rows in training column order."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise MathsException(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+
+        n = len(X)
+        flat_x = X.ravel()
+        # One slot per (sample, tree); only slots still on an internal node are walked
+        node = np.tile(self.roots.astype(np.intp), n)
+        x_offset = np.repeat(np.arange(n, dtype=np.intp) * self.n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+
+        while len(active):
+            current = node[active]
+            go_left = flat_x[x_offset[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+
+        # cumsum adds trees sequentially, matching sklearn's accumulation order
+        total = np.cumsum(self.value[node].reshape(n, self.n_trees, -1), axis=1)[:, -1]
+        return total / self.n_trees
+
+    def predict(self, X) -> np.ndarray:
+        """Predicted class labels, identical to RandomForestClassifier.predict."""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+    @staticmethod
+    def _array_path(directory: str, name: str, version: Optional[str]) -> str:
+        """Arrays are stamped with their version; artifacts from before versioning have plain names."""
+        return os.path.join(directory, f"{name}.{version}.npy" if version else f"{name}.npy")
+
+    @staticmethod
+    def _read_meta(directory: str) -> dict:
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, directory: str):
+        """
+        Writes one .npy file per array plus a small JSON header.
+
+        Array files are named after the forest's fingerprint and never
+        overwritten, and meta.json, which names the version to read, is
+        replaced atomically last. A concurrent load therefore sees either the
+        old or the new set of arrays, never a mix. The previous version's
+        files are kept for loads that read the old meta.json just before the
+        switch; older versions are removed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        try:
+            previous = self._read_meta(directory).get("version")
+        except (FileNotFoundError, ValueError):
+            previous = None
+        version = self.fingerprint
+        for name in self.ARRAYS:
+            path = self._array_path(directory, name, version)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + ".tmp", path)
+        meta_path = os.path.join(directory, "meta.json")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": version, "max_depth": self.max_depth, "feature_names": self.feature_names}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        keep = {os.path.basename(self._array_path(directory, name, v))
+                for name in self.ARRAYS for v in (version, previous)}
+        for file_name in os.listdir(directory):
+            if file_name.endswith(".npy") and file_name.split(".")[0] in self.ARRAYS and file_name not in keep:
+                os.remove(os.path.join(directory, file_name))
+        logger.info(f"Compiled forest {version} saved to: {directory} ({self.nbytes} bytes)")
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = None) -> "CompiledForest":
+        """Loads the arrays of the version named in meta.json; mmap_mode is passed to np.load."""
+        try:
+            meta = cls._read_meta(directory)
+            version = meta.get("version")
+            arrays = {
+                name: np.load(cls._array_path(directory, name, version), mmap_mode=mmap_mode, allow_pickle=False)
+                for name in cls.ARRAYS
+            }
+        except FileNotFoundError:
+            logger.error(f"Compiled forest not found: {directory}")
+            raise MathsException("Compiled forest artifact missing!")
+        forest = cls(**arrays, max_depth=meta["max_depth"], feature_names=meta.get("feature_names"))
+        forest._fingerprint = version  # saved as the fingerprint; legacy artifacts hash on demand
+        return forest
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of the arrays; the same model gives the same value however it was loaded."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for name in self.ARRAYS:
+                array = np.ascontiguousarray(getattr(self, name))
+                digest.update(f"{name}:{array.dtype}:{array.shape}".encode())
+                digest.update(array.tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+
+def export_forest(model_path: str, output_dir: str) -> CompiledForest:
+    """Compiles a pickled RandomForestClassifier into an array artifact."""
+    import pickle
+
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    forest = CompiledForest.from_model(model)
+    forest.save(output_dir)
+    return forest
+
+
+if __name__ == "__main__":
+    # Usage: python src/forest_compiler.py [model.pkl] [output_dir]
+    configure_logging()
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "artifacts/level_recommender_model.pkl"
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else "artifacts/level_recommender_forest"
+    export_forest(model_path, output_dir)
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+from logger import logger
+from exception import MathsException
+from adaptive_engine import AdaptiveEngine
+from puzzle_prefetcher import get_prefetcher
+from puzzle_generator import PuzzleGenerator
+from sharded_tracker import make_tracker
+from session_store import SessionState, SessionStore
+
+
+class SessionNotFound(KeyError):
+    """Raised for a session id the service does not know (or has forgotten)."""
+
+
+class LearningService:
+    """
+    The adaptive loop behind the UI: issue puzzle, score answer, recommend, log.
+
+    One instance holds the generator, engine, tracker and prefetcher for the
+    whole process, plus a SessionStore of per-learner state snapshotted to
+    the same database. With PROGRESS_SHARDS=N, progress rows are spread
+    over N database files by session (see sharded_tracker). Methods are
+    blocking and thread-safe per session; the HTTP layer runs them in an
+    executor, and the Streamlit app can also call them in-process.
+    """
+
+    def __init__(self, db_name: str = "progress.db", write_behind: bool = False,
+                 max_sessions: int = 100_000, session_ttl: float = 3600.0,
+                 shards: int = int(os.getenv("PROGRESS_SHARDS", "1"))):
+        self.prefetcher = get_prefetcher()
+        self.generator: PuzzleGenerator = self.prefetcher.generator
+        self.engine = AdaptiveEngine()
+        self.tracker = make_tracker(db_name, shards, write_behind=write_behind)
+        self.sessions = SessionStore(max_sessions, session_ttl, db_name)
+
+    def _session(self, session_id: str) -> SessionState:
+        state = self.sessions.get(session_id)
+        if state is None:
+            raise SessionNotFound(session_id)
+        return state
+
+    def create_session(self) -> dict:
+        session_id = f"session_{uuid.uuid4().hex[:8]}"
+        self.sessions.add(SessionState(session_id))
+        logger.info(f"New session started: {session_id}")
+        return {"session_id": session_id}
+
+    def current_puzzle(self, session_id: str) -> dict:
+        """The unanswered puzzle, or a new one at the recommended level once the last was answered."""
+        return self._puzzle(session_id, skip=False)
+
+    def next_puzzle(self, session_id: str) -> dict:
+        """A new puzzle at the recommended level, skipping the current one if unanswered."""
+        return self._puzzle(session_id, skip=True)
+
+    def _puzzle(self, session_id: str, skip: bool) -> dict:
+        state = self._session(session_id)
+        with self.sessions.lock_for(session_id):
+            if state.answered or skip:
+                state.difficulty = state.recommended_level
+                state.puzzle = self.prefetcher.next_puzzle(
+                    session_id, state.difficulty, state.streak, state.confidence
+                )
+                state.issued_at = time.time()
+                state.answered = False
+                logger.info("🧮 New puzzle generated | Level: %s | Expected time: %.2fs",
+                            state.difficulty, state.puzzle[2])
+            question, _, expected_time = state.puzzle
+            return {
+                "question": question,
+                "difficulty": state.difficulty,
+                "expected_time": expected_time,
+                "issued_at": state.issued_at,
+            }
+
+    def submit_answer(self, session_id: str, answer: str, response_time: Optional[float] = None) -> dict:
+        """Scores the answer to the current puzzle, updates streak/confidence/level and logs it."""
+        state = self._session(session_id)
+        with self.sessions.lock_for(session_id):
+            if state.answered or state.puzzle is None:
+                raise MathsException("No open puzzle for this session; request one first.")
+            _, correct_answer, expected_time = state.puzzle
+            if response_time is None:
+                response_time = time.time() - state.issued_at
+
+            valid = True
+            try:
+                correct = int(answer) == int(correct_answer)
+            except (TypeError, ValueError):
+                correct, valid = False, False
+                logger.warning(f"Wrong input format: {answer}")
+
+            confidence = self.tracker.calculate_confidence(
+                correct, state.difficulty, response_time, state.streak, expected_time
+            )
+            next_level, streak = self.engine.recommend_next_level(
+                state.difficulty, correct, response_time, state.streak, confidence
+            )
+            # Warm the next puzzles while the learner reads the feedback
+            self.prefetcher.prefetch(session_id, streak, confidence)
+            self.tracker.log_progress(
+                session_id, state.difficulty, correct, response_time, streak, confidence, expected_time
+            )
+
+            state.confidence, state.streak = confidence, streak
+            state.recommended_level = next_level
+            state.answered = True
+            logger.info("Answer processed successfully")
+            return {
+                "correct": correct,
+                "valid_input": valid,
+                "correct_answer": correct_answer,
+                "response_time": response_time,
+                "confidence": confidence,
+                "streak": streak,
+                "next_level": next_level,
+            }
+
+    def summary(self, session_id: str) -> dict:
+        """Live Tracker numbers: stored aggregates plus the in-memory streak and confidence."""
+        state = self._session(session_id)
+        summary = self.tracker.get_session_summary(session_id)
+        summary.update(streak=state.streak, confidence=state.confidence)
+        return summary
+
+    def progress(self, session_id: str, max_points: int = 200) -> dict:
+        """Downsampled score and streak series for the progress chart, column-wise, with each point's attempt."""
+        self._session(session_id)
+        series = self.tracker.get_progress_series(session_id, max_points)
+        return {"attempt": series.index.tolist(), "score": series["score"].tolist(),
+                "streak": series["streak"].tolist()}
+
+
+_shared: Optional[LearningService] = None
+_shared_lock = threading.Lock()
+
+
+def get_service() -> LearningService:
+    """Process-wide service shared by the HTTP app and in-process Streamlit sessions."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = LearningService()
+    return _shared
@@ -0,0 +1,172 @@
+import json
+import os
+import sys
+import numpy as np
+from typing import Tuple
+from logger import configure_logging, logger
+from exception import MathsException
+
+
+class LevelLookupTable:
+    """
+    Next-level recommendations precomputed over a quantized feature grid.
+
+    The grid covers difficulty 1-3, correct 0/1, integer streaks up to
+    streak_max, response times 0..rt_max in rt_step seconds and confidence
+    0-100 in conf_step points. A lookup snaps response time and confidence to
+    the nearest grid point, so answers can differ from the live model near
+    split thresholds. build() measures that disagreement rate on random
+    in-range inputs and the training CSV; a table whose rate exceeds
+    TOLERANCE is rejected at load time and the engine stays on the live model.
+    Rows outside the grid are reported as misses so callers can fall back.
+    meta["model_fingerprint"] records the forest the table was built from.
+    """
+
+    TOLERANCE = 0.02  # max accepted disagreement rate against the live model
+
+    def __init__(self, table: np.ndarray, meta: dict):
+        self.table = table
+        self.meta = meta
+        self.streak_max = int(meta["streak_max"])
+        self.rt_step = float(meta["rt_step"])
+        self.rt_max = float(meta["rt_max"])
+        self.conf_step = float(meta["conf_step"])
+        self.classes = np.asarray(meta["classes"])
+
+        self._flat = table.reshape(-1)
+        self._strides = np.array([
+            int(np.prod(table.shape[axis + 1:])) for axis in range(table.ndim)
+        ], dtype=np.intp)
+
+    @staticmethod
+    def grid_shape(streak_max: int, rt_max: float, rt_step: float, conf_step: float) -> Tuple[int, ...]:
+        """(difficulty, correct, streak, response_time, confidence) axis sizes."""
+        return (
+            3,
+            2,
+            streak_max + 1,
+            int(round(rt_max / rt_step)) + 1,
+            int(round(100 / conf_step)) + 1,
+        )
+
+    @classmethod
+    def build(cls, model, streak_max: int = 30, rt_max: float = 60.0, rt_step: float = 0.5,
+              conf_step: float = 1.0, chunk_size: int = 200_000,
+              validation_rows: int = 100_000, data_path: str = "data/math_quiz_dataset.csv") -> "LevelLookupTable":
+        """Evaluates model (training column order) at every grid point."""
+        shape = cls.grid_shape(streak_max, rt_max, rt_step, conf_step)
+        axes = [
+            np.arange(1, 4, dtype=np.float64),
+            np.arange(2, dtype=np.float64),
+            np.arange(streak_max + 1, dtype=np.float64),
+            np.arange(shape[3], dtype=np.float64) * rt_step,
+            np.arange(shape[4], dtype=np.float64) * conf_step,
+        ]
+        classes = np.asarray(model.classes if hasattr(model, "classes") else model.classes_)
+
+        size = int(np.prod(shape))
+        table = np.empty(size, dtype=np.uint8)
+        logger.info(f"Building level table over {size} grid points")
+        for start in range(0, size, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, size))
+            d, c, s, rt, conf = np.unravel_index(flat, shape)
+            X = np.column_stack([axes[0][d], axes[3][rt], axes[1][c], axes[2][s], axes[4][conf]])
+            table[start:start + len(flat)] = np.searchsorted(classes, model.predict(X))
+
+        from forest_compiler import CompiledForest
+
+        forest = model if isinstance(model, CompiledForest) else CompiledForest.from_model(model)
+        meta = {
+            "streak_max": streak_max, "rt_max": rt_max, "rt_step": rt_step,
+            "conf_step": conf_step, "classes": classes.tolist(),
+            "model_fingerprint": forest.fingerprint,
+        }
+        lookup = cls(table.reshape(shape), meta)
+        lookup.meta["disagreement_rate"] = lookup.disagreement_rate(model, validation_rows, data_path)
+        return lookup
+
+    def lookup(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Looks up rows in training column order
+        (difficulty, response_time, correct, streak, confidence).
+
+        :return: predicted levels and a boolean mask of rows found in the grid;
+                 levels for rows outside the grid are undefined
+        """
+        X = np.asarray(X, dtype=np.float64)
+        d = X[:, 0].astype(np.intp) - 1
+        rt = np.rint(X[:, 1] / self.rt_step).astype(np.intp)
+        c = X[:, 2].astype(np.intp)
+        s = X[:, 3].astype(np.intp)
+        conf = np.rint(X[:, 4] / self.conf_step).astype(np.intp)
+
+        hit = (
+            (X[:, 0] == d + 1) & (d >= 0) & (d < 3)
+            & ((c == 0) | (c == 1))
+            & (X[:, 3] == s) & (s >= 0) & (s <= self.streak_max)
+            & (X[:, 1] >= 0) & (X[:, 1] <= self.rt_max)
+            & (X[:, 4] >= 0) & (X[:, 4] <= 100)
+        )
+        index = np.stack([d, c, s, rt, conf], axis=1)[hit] @ self._strides
+        levels = np.zeros(len(X), dtype=self.classes.dtype)
+        levels[hit] = self.classes[self._flat[index]]
+        return levels, hit
+
+    def disagreement_rate(self, model, n: int = 100_000, data_path: str = "data/math_quiz_dataset.csv") -> float:
+        """Fraction of in-grid rows where the table and the live model differ."""
+        rng = np.random.default_rng(0)
+        X = np.column_stack([
+            rng.integers(1, 4, n),
+            np.round(rng.uniform(0, self.rt_max, n), 2),
+            rng.integers(0, 2, n),
+            rng.integers(0, self.streak_max + 1, n),
+            np.round(rng.uniform(0, 100, n), 2),
+        ]).astype(np.float64)
+        if data_path and os.path.exists(data_path):
+            import pandas as pd
+
+            columns = ["difficulty", "response_time", "correct", "streak", "confidence"]
+            X = np.vstack([X, pd.read_csv(data_path)[columns].to_numpy(dtype=np.float64)])
+
+        levels, hit = self.lookup(X)
+        if not hit.any():
+            return 0.0
+        rate = float((levels[hit] != model.predict(X[hit])).mean())
+        logger.info(f"Level table disagreement: {rate:.4%} over {int(hit.sum())} in-grid rows")
+        return rate
+
+    def save(self, path: str):
+        """Writes the grid as .npy with a sidecar .json holding the axes."""
+        np.save(path, self.table)
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+        logger.info(f"Level table saved to: {path} ({self.table.nbytes} bytes)")
+
+    @classmethod
+    def load(cls, path: str, tolerance: float = TOLERANCE) -> "LevelLookupTable":
+        """Memory-maps a saved table; rejects it if it exceeds tolerance."""
+        try:
+            with open(os.path.splitext(path)[0] + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            table = np.load(path, mmap_mode="r", allow_pickle=False)
+        except FileNotFoundError:
+            logger.error(f"Level table not found: {path}")
+            raise MathsException("Level table artifact missing!")
+
+        rate = meta.get("disagreement_rate")
+        if rate is None or rate > tolerance:
+            logger.error(f"Level table disagreement {rate} exceeds tolerance {tolerance}")
+            raise MathsException("Level table is outside the accepted accuracy tolerance")
+        return cls(table, meta)
+
+
+if __name__ == "__main__":
+    # Usage: python src/level_table.py [output.npy]
+    configure_logging()
+    from forest_compiler import CompiledForest
+
+    output_path = sys.argv[1] if len(sys.argv) > 1 else "artifacts/level_recommender_table.npy"
+    forest = CompiledForest.load("artifacts/level_recommender_forest")
+    lookup = LevelLookupTable.build(forest)
+    lookup.save(output_path)
+    print(f"Disagreement rate vs live model: {lookup.meta['disagreement_rate']:.4%}")
@@ -1,23 +1,191 @@
 # -*- coding: utf-8 -*-
+import abc
+import atexit
+import itertools
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from typing import Dict, Optional
 
 LOG_DIR = os.path.join(os.getcwd(), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json" (JSON lines)
+LOG_ASYNC = os.getenv("LOG_ASYNC", "1") != "0"
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# "module=N,..." keeps 1 in N INFO/DEBUG records from that module
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")
+# "module=N,..." keeps at most N INFO/DEBUG records per second from that module
+LOG_RATE_LIMIT = os.getenv("LOG_RATE_LIMIT", "")
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-LOG_FILE_PATH = os.path.join(LOG_DIR, LOG_FILE)
+# Set by the first configure_logging(): one timestamped file per process
+LOG_FILE_PATH: Optional[str] = None
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="[ %(asctime)s ] [%(levelname)s] %(name)s:%(lineno)d - %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE_PATH, encoding="utf-8"),  # ✅ File log
-        logging.StreamHandler()  # ✅ Console log
-    ],
-)
+TEXT_FORMAT = "[ %(asctime)s ] [%(levelname)s] %(name)s:%(lineno)d - %(message)s"
 
-logger = logging.getLogger(__name__)
 
+def _parse_limits(spec: str) -> Dict[str, int]:
+    """'tracker=10,puzzle_generator=100' -> {'tracker': 10, 'puzzle_generator': 100}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        module, _, value = item.partition("=")
+        limits[module.strip()] = max(1, int(value))
+    return limits
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers and jq."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _HotPathFilter(logging.Filter, abc.ABC):
+    """
+    Base for per-module filters on INFO/DEBUG records; warnings and errors always pass.
+
+    The decision is stored on the record so a filter shared by several
+    handlers counts each record once.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        super().__init__()
+        self.limits = limits
+        self._attr = f"_keep_{id(self)}"
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or record.module not in self.limits:
+            return True
+        keep = getattr(record, self._attr, None)
+        if keep is None:
+            keep = self._decide(record.module, self.limits[record.module])
+            setattr(record, self._attr, keep)
+        return keep
+
+    @abc.abstractmethod
+    def _decide(self, module: str, limit: int) -> bool:
+        """True to keep this module's next record, given its configured limit."""
+
+
+class SamplingFilter(_HotPathFilter):
+    """Keeps every Nth INFO/DEBUG record per module."""
+
+    def __init__(self, limits: Dict[str, int]):
+        super().__init__(limits)
+        self._counters = {module: itertools.count() for module in limits}
+
+    def _decide(self, module: str, every: int) -> bool:
+        return next(self._counters[module]) % every == 0
+
+
+class RateLimitFilter(_HotPathFilter):
+    """Keeps at most N INFO/DEBUG records per second per module."""
+
+    def __init__(self, limits: Dict[str, int]):
+        super().__init__(limits)
+        self._windows = {module: [0, 0] for module in limits}  # [second, count]
+        self._lock = threading.Lock()
+
+    def _decide(self, module: str, per_second: int) -> bool:
+        now = int(time.monotonic())
+        with self._lock:
+            window = self._windows[module]
+            if window[0] != now:
+                window[0], window[1] = now, 0
+            window[1] += 1
+            return window[1] <= per_second
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves %-formatting to the listener thread.
+
+    The stock prepare() renders the message on the caller's thread; here the
+    record is enqueued as is, so with lazy `logger.info("%s", value)` calls
+    the request path only pays for building the LogRecord. Pass immutable
+    values as arguments, since they are formatted later.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def stop_logging():
+    """Drain queued records and stop the background writer (also runs at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(async_mode: bool = LOG_ASYNC, log_format: str = LOG_FORMAT,
+                      sample: str = LOG_SAMPLE, rate_limit: str = LOG_RATE_LIMIT,
+                      level: int = logging.INFO):
+    """
+    Sets up the root logger: size-rotated file (text or JSON lines) plus console.
+
+    In async mode the request thread only enqueues records; a QueueListener
+    thread formats and writes them. Sampling and rate limits drop hot-path
+    INFO/DEBUG records before they are queued. This is the explicit init
+    for entry points and CLIs; importing the module creates no files or
+    threads and leaves the root logger untouched.
+    """
+    global _listener, LOG_FILE_PATH
+    stop_logging()
+
+    if LOG_FILE_PATH is None:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.{'jsonl' if log_format == 'json' else 'log'}"
+        LOG_FILE_PATH = os.path.join(LOG_DIR, log_file)
+        atexit.register(stop_logging)
+
+    formatter = JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )  # ✅ File log
+    console_handler = logging.StreamHandler()  # ✅ Console log
+    sinks = [file_handler, console_handler]
+    for handler in sinks:
+        handler.setFormatter(formatter)
+
+    filters = []
+    if sample:
+        filters.append(SamplingFilter(_parse_limits(sample)))
+    if rate_limit:
+        filters.append(RateLimitFilter(_parse_limits(rate_limit)))
+
+    if async_mode:
+        queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(queue_handler.queue, *sinks, respect_handler_level=True)
+        _listener.start()
+        handlers = [queue_handler]
+    else:
+        handlers = sinks
+
+    for handler in handlers:
+        for log_filter in filters:
+            handler.addFilter(log_filter)
+
+    logging.basicConfig(level=level, handlers=handlers, force=True)
+
+
+logger = logging.getLogger(__name__)
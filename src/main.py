@@ -1,19 +1,11 @@
 import streamlit as st
-import time
-import uuid
-from puzzle_generator import PuzzleGenerator
-from adaptive_engine import AdaptiveEngine
-from tracker import ProgressTracker
-from logger import logger 
+from service_client import get_client
+from learning_service import SessionNotFound
+from logger import configure_logging, logger
+import metrics
 
 from exception import MathsException
 
-# -------------------------------------------------------------------------
-# Initialize Logger
-# -------------------------------------------------------------------------
-
-logger.info("✅ Math Adventures app started.")
-
 # -------------------------------------------------------------------------
 # Streamlit page setup
 # -------------------------------------------------------------------------
@@ -21,48 +13,61 @@ st.set_page_config(page_title="Math Adventures", page_icon="🧮", layout="cente
 st.title("🧮 Math Adventures — Adaptive Learning")
 
 # -------------------------------------------------------------------------
-# Initialize database and session
+# Learning service: in-process by default, or the HTTP API when MATH_API_URL is set
 # -------------------------------------------------------------------------
-if "session_id" not in st.session_state:
-    st.session_state["session_id"] = f"session_{uuid.uuid4().hex[:8]}"
-    st.session_state['confidence'] = 50.0
-    logger.info(f"New session started: {st.session_state['session_id']}")
+@st.cache_resource
+def load_client():
+    """One client per server process, shared by every browser session and rerun."""
+    configure_logging()
+    logger.info("✅ Math Adventures app started.")
+    if metrics.is_enabled():
+        metrics.start_http_server()
+    return get_client()
+
 
-tracker= ProgressTracker()
-engine = AdaptiveEngine()
-generator = PuzzleGenerator()
+client = load_client()
+
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = client.create_session()["session_id"]
 
 defaults = {
-    "difficulty": "Easy",
-    "question_start_time": None,
     "current_puzzle": None,
-    "show_answer": False,
-    "recommended_level": "Easy",
-    "streak": 1,
-    "expected_time": None,
+    "feedback": None,
+    "progress_version": 0,
 }
 for key, val in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = val
 
 # -------------------------------------------------------------------------
-# Helper to generate new puzzle
+# Helpers
 # -------------------------------------------------------------------------
-def new_puzzle(level: str ):
-    question, answer, expected_time = generator.generate_puzzle(level, st.session_state["streak"],st.session_state['confidence'])
-    st.session_state["current_puzzle"] = (question, answer)
-    st.session_state["question_start_time"] = time.time()
-    st.session_state["expected_time"] = expected_time
-    st.session_state["show_answer"] = False
-    logger.info(f"🧮 New puzzle generated | Level: {level} | Expected time: {expected_time:.2f}s")
+def new_puzzle():
+    # The service picks the level it recommended after the last answer
+    try:
+        puzzle = client.next_puzzle(st.session_state["session_id"])
+    except SessionNotFound:
+        # The service restarted and forgot this session; start a fresh one
+        st.session_state["session_id"] = client.create_session()["session_id"]
+        st.session_state["progress_version"] += 1
+        puzzle = client.next_puzzle(st.session_state["session_id"])
+    st.session_state["current_puzzle"] = puzzle
+    st.session_state["feedback"] = None
+
+
+def session_view(name: str, fetch):
+    """fetch(session_id), queried again only after this session logged a new answer."""
+    version = st.session_state["progress_version"]
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] != version:
+        cached = st.session_state[name] = (version, fetch(st.session_state["session_id"]))
+    return cached[1]
 
 # -------------------------------------------------------------------------
 # First puzzle
 # -------------------------------------------------------------------------
 if st.session_state["current_puzzle"] is None:
-    new_puzzle(st.session_state["difficulty"])
-
-question, correct_answer = st.session_state["current_puzzle"]
+    new_puzzle()
 
 # -------------------------------------------------------------------------
 # UI: Puzzle Card
@@ -83,125 +88,115 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-st.markdown(
-    f"""
+
+@st.fragment
+def puzzle_card():
+    # Typing and "Next Question" rerun only this fragment
+    puzzle = st.session_state["current_puzzle"]
+    question = puzzle["question"]
+    st.markdown(
+        f"""
 <div class="card">
-    <h4>Difficulty: {st.session_state['difficulty']}</h4>
+    <h4>Difficulty: {puzzle['difficulty']}</h4>
     <p><strong>Question:</strong> {question}</p>
 </div>
 """,
-    unsafe_allow_html=True,
-)
-
-# -------------------------------------------------------------------------
-# User Answer Input
-# -------------------------------------------------------------------------
-user_answer = st.text_input("✏️ Enter your answer:", key=f"answer_{question}")
-
-col1, col2 = st.columns([1, 1])
-with col1:
-    check_btn = st.button("✅ Check Answer")
-with col2:
-    next_btn = st.button("➡️ Next Question")
-
-# -------------------------------------------------------------------------
-# Check Answer
-# -------------------------------------------------------------------------
-if check_btn and not st.session_state["show_answer"]:
-    try:
-        end_time = time.time()
-        response_time = end_time - st.session_state["question_start_time"]
-
-        try:
-            user_answer_int = int(user_answer)
-            correct = (user_answer_int == int(correct_answer))
-        except ValueError:
-            correct = False
-            logger.warning(f"Wrong input format: {user_answer}")
+        unsafe_allow_html=True,
+    )
+
+    user_answer = st.text_input("✏️ Enter your answer:", key=f"answer_{question}")
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        check_btn = st.button("✅ Check Answer")
+    with col2:
+        st.button("➡️ Next Question", on_click=new_puzzle)
+
+    if check_btn and st.session_state["feedback"] is None:
+        logged = False
+        with metrics.stage("app.check_answer"):
+            try:
+                st.session_state["feedback"] = client.submit_answer(st.session_state["session_id"], user_answer)
+                st.session_state["progress_version"] += 1
+                logged = True
+            except MathsException as me:
+                logger.error(f"Maths Exception: {str(me)}")
+                st.error("⚠️ A math-related error occurred. Please try again.")
+            except Exception as e:
+                logger.error(f"Unexpected Error: {str(e)}")
+                st.error("⚠️ Something went wrong! Try again.")
+        if logged:
+            # A new row was logged: redraw the sidebar and chart once
+            st.rerun()
+
+    feedback = st.session_state["feedback"]
+    if feedback is not None:
+        if not feedback["valid_input"]:
             st.warning("⚠️ Please enter a valid number.")
-
-
-        confidence_score = tracker.calculate_confidence(
-            correct,
-            st.session_state["difficulty"],
-            response_time,
-            st.session_state["streak"],
-            st.session_state["expected_time"],
-        )
-        st.session_state['confidence'] = confidence_score
-
-
-        next_level, st.session_state["streak"] = engine.recommend_next_level(
-            st.session_state["difficulty"],
-            correct,
-            response_time,
-            st.session_state["streak"],
-            confidence_score,
-        )
-        st.session_state["recommended_level"] = next_level
-        st.session_state["show_answer"] = True
-
-        
-        tracker.log_progress(
-            st.session_state["session_id"],
-            st.session_state["difficulty"],
-            correct,
-            response_time,
-            st.session_state["streak"],
-            confidence_score,
-        )
-
-        
-        if correct:
-            st.success(f"✅ Correct! Time: {response_time:.2f}s")
+        if feedback["correct"]:
+            st.success(f"✅ Correct! Time: {feedback['response_time']:.2f}s")
         else:
-            st.error(f"❌ Incorrect. Correct Answer: **{correct_answer}**")
-
-        logger.info("Answer processed successfully")
+            st.error(f"❌ Incorrect. Correct Answer: **{feedback['correct_answer']}**")
 
-    except MathsException as me:
-        logger.error(f"Maths Exception: {str(me)}")
-        st.error("⚠️ A math-related error occurred. Please try again.")
-    except Exception as e:
-        logger.error(f"Unexpected Error: {str(e)}")
-        st.error("⚠️ Something went wrong! Try again.")
 
-    
-
-# -------------------------------------------------------------------------
-# Next Question Button
-# -------------------------------------------------------------------------
-if next_btn:
-    st.session_state["difficulty"] = st.session_state["recommended_level"]
-    new_puzzle(st.session_state["difficulty"])
-    st.rerun()
+puzzle_card()
 
 # -------------------------------------------------------------------------
 # Sidebar Tracker
 # -------------------------------------------------------------------------
 st.markdown("---")
-df = tracker.get_progress(st.session_state["session_id"])
 
-with st.sidebar:
+
+@st.fragment
+def live_tracker():
+    summary = session_view("summary", client.summary)
     st.header("📊 Live Tracker")
 
-    if not df.empty:
-        accuracy = (df["correct"].sum() / len(df)) * 100
-        avg_time = df["response_time"].mean()
-        st.metric("Questions Attempted", len(df))
-        st.metric("Accuracy", f"{accuracy:.1f}%")
-        st.metric("Correct Answers", int(df["correct"].sum()))
-        st.metric("Avg Time", f"{avg_time:.2f}s")
-        st.metric("Current Streak", st.session_state["streak"])
-        st.metric("Confidence", f"{st.session_state['confidence']:.2f}%")
+    if summary["attempts"]:
+        st.metric("Questions Attempted", summary["attempts"])
+        st.metric("Accuracy", f"{summary['accuracy']:.1f}%")
+        st.metric("Correct Answers", summary["correct"])
+        st.metric("Avg Time", f"{summary['avg_response_time']:.2f}s")
+        st.metric("Current Streak", summary["streak"])
+        st.metric("Confidence", f"{summary['confidence']:.2f}%")
 
     else:
         st.info("No progress yet — start answering questions!")
 
+    # Per-stage latency; enable with METRICS_ENABLED=1 (also served at /metrics)
+    if metrics.is_enabled():
+        with st.expander("🔧 Debug: stage timings"):
+            st.dataframe(metrics.snapshot(), hide_index=True)
+
+
+with st.sidebar:
+    live_tracker()
+
 # -------------------------------------------------------------------------
 # Progress Graph
 # -------------------------------------------------------------------------
-if not df.empty:
-    df["score"] = df["correct"].cumsum()
-    st.subheader("📈 Your Progress Over Time")
-    st.line_chart(df[["score", "streak"]], width="stretch")
+# A fixed Vega-Lite spec: st.line_chart rebuilds an Altair chart on every run,
+# which cost more server CPU than the rest of the page together
+PROGRESS_CHART = {
+    "transform": [{"fold": ["score", "streak"], "as": ["series", "value"]}],
+    "mark": "line",
+    "encoding": {
+        # Thinned series skip attempts, so plot against the attempt number, not the row position
+        "x": {"field": "attempt", "type": "quantitative", "title": "answer"},
+        "y": {"field": "value", "type": "quantitative"},
+        "color": {"field": "series", "type": "nominal"},
+    },
+}
+
+
+@st.fragment
+def progress_chart():
+    if session_view("summary", client.summary)["attempts"]:
+        import pandas as pd  # not needed until the first answer
+
+        series = pd.DataFrame(session_view("progress", client.progress))
+        st.subheader("📈 Your Progress Over Time")
+        st.vega_lite_chart(series, PROGRESS_CHART, width="stretch")
+
+
+progress_chart()
@@ -0,0 +1,229 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from logger import logger
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Upper bounds in seconds, Prometheus-style; the last bucket is +Inf
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+           0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PREFIX = "math_adventures_stage"
+
+_enabled = os.getenv("METRICS_ENABLED", "0") == "1"
+
+
+class StageMetrics:
+    """Latency histogram plus call and error counts for one named stage."""
+
+    __slots__ = ("name", "counts", "total", "calls", "errors", "lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.counts = [0] * (len(BUCKETS) + 1)
+            self.total = 0.0
+            self.calls = 0
+            self.errors = 0
+
+    def observe(self, seconds: float, failed: bool = False):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.calls += 1
+            if failed:
+                self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if beyond the last bucket)."""
+        with self.lock:
+            counts, calls = list(self.counts), self.calls
+        if not calls:
+            return 0.0
+        rank, seen = q * calls, 0
+        for bound, count in zip(BUCKETS + (float("inf"),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+_stages: Dict[str, StageMetrics] = {}
+_stages_lock = threading.Lock()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def get_stage(name: str) -> StageMetrics:
+    stage = _stages.get(name)
+    if stage is None:
+        with _stages_lock:
+            stage = _stages.setdefault(name, StageMetrics(name))
+    return stage
+
+
+def reset():
+    """Zeroes every stage; decorated functions keep their stage objects."""
+    for stage_metrics in list(_stages.values()):
+        stage_metrics.clear()
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator recording latency, calls and errors of a function under `name`.
+
+    When metrics are disabled the wrapper is a single flag check before the
+    call; exceptions are counted as errors and re-raised unchanged.
+    """
+    def decorator(func: Callable) -> Callable:
+        observe = get_stage(name).observe
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                observe(perf_counter() - start, failed=True)
+                raise
+            observe(perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage(name: str):
+    """Context manager form of timed() for blocks of code, e.g. a whole Streamlit flow."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        get_stage(name).observe(time.perf_counter() - start, failed=True)
+        raise
+    get_stage(name).observe(time.perf_counter() - start)
+
+
+def snapshot() -> List[dict]:
+    """One row per stage: calls, errors, mean and bucketed p50/p99 in milliseconds."""
+    rows = []
+    for name in sorted(_stages):
+        s = _stages[name]
+        if not s.calls:
+            continue
+        rows.append({
+            "stage": name,
+            "calls": s.calls,
+            "errors": s.errors,
+            "mean_ms": s.total / s.calls * 1000 if s.calls else 0.0,
+            "p50_ms": s.quantile(0.50) * 1000,
+            "p99_ms": s.quantile(0.99) * 1000,
+        })
+    return rows
+
+
+def render_prometheus() -> str:
+    """All stages in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {PREFIX}_latency_seconds Latency of instrumented stages.",
+        f"# TYPE {PREFIX}_latency_seconds histogram",
+    ]
+    totals = []
+    for name in sorted(_stages):
+        s = _stages[name]
+        with s.lock:
+            counts, total, calls, errors = list(s.counts), s.total, s.calls, s.errors
+        if not calls:
+            continue
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{PREFIX}_latency_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'{PREFIX}_latency_seconds_sum{{stage="{name}"}} {total}')
+        lines.append(f'{PREFIX}_latency_seconds_count{{stage="{name}"}} {calls}')
+        totals.append((name, calls, errors))
+
+    lines.append(f"# HELP {PREFIX}_calls_total Calls of instrumented stages.")
+    lines.append(f"# TYPE {PREFIX}_calls_total counter")
+    lines.extend(f'{PREFIX}_calls_total{{stage="{name}"}} {calls}' for name, calls, _ in totals)
+    lines.append(f"# HELP {PREFIX}_errors_total Calls of instrumented stages that raised.")
+    lines.append(f"# TYPE {PREFIX}_errors_total counter")
+    lines.extend(f'{PREFIX}_errors_total{{stage="{name}"}} {errors}' for name, _, errors in totals)
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_handler():
+    """The /metrics request handler; http.server is only imported once the endpoint starts."""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes would otherwise flood the console
+
+    return MetricsHandler
+
+
+_server: Optional["ThreadingHTTPServer"] = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port: int = int(os.getenv("METRICS_PORT", "9464")),
+                      host: str = "127.0.0.1") -> Optional["ThreadingHTTPServer"]:
+    """Serves /metrics from a daemon thread; safe to call on every Streamlit rerun."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            from http.server import ThreadingHTTPServer
+
+            try:
+                _server = ThreadingHTTPServer((host, port), _metrics_handler())
+            except OSError as e:
+                logger.warning(f"⚠ Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"📈 Metrics endpoint at http://{host}:{port}/metrics")
+    return _server
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+from typing import List, Tuple
+from logger import logger
+from exception import MathsException
+
+
+class MicroBatcher:
+    """
+    Gathers recommendation requests from many sessions and answers them
+    with a single AdaptiveEngine.recommend_many call per time window.
+    """
+
+    def __init__(self, engine, window_ms: float = 2.0, max_batch_size: int = 512):
+        if window_ms < 0:
+            raise MathsException("window_ms must be non-negative")
+        if max_batch_size < 1:
+            raise MathsException("max_batch_size must be at least 1")
+
+        self.engine = engine
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        # Orders submits against close: no request can be queued behind the shutdown marker
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+        logger.info(f"Micro-batcher started | window: {window_ms}ms | max batch: {max_batch_size}")
+
+    def submit(self, current_level: str, correct: bool, response_time: float,
+               streak: int, confidence: float) -> Future:
+        """Queues one request; the future resolves to (next_level, new_streak)."""
+        future: Future = Future()
+        level_encoded = self.engine.difficulty_mapping.get(current_level, 2)
+        row = (level_encoded, int(correct), response_time, streak, confidence)
+        with self._lock:
+            if self._closed:
+                raise MathsException("Micro-batcher is closed")
+            self._queue.put((row, current_level, future))
+        return future
+
+    def recommend_next_level(self, current_level: str, correct: bool, response_time: float,
+                             streak: int, confidence: float) -> Tuple[str, int]:
+        """Blocking drop-in for AdaptiveEngine.recommend_next_level."""
+        return self.submit(current_level, correct, response_time, streak, confidence).result()
+
+    def close(self):
+        """Stops the worker after answering everything already queued."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+        # Nothing should be left behind the marker; never leave a caller blocked on .result()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[2].set_exception(MathsException("Micro-batcher is closed"))
+        logger.info("Micro-batcher stopped")
+
+    def _collect(self, first) -> List:
+        """Collects requests that arrive within one window of the first one."""
+        pending = [first]
+        deadline = time.perf_counter() + self.window
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let _run see the shutdown marker
+                break
+            pending.append(item)
+        return pending
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            pending = self._collect(first)
+            batch = np.array([row for row, _, _ in pending], dtype=np.float64)
+            try:
+                next_levels, new_streaks = self.engine.recommend_many(batch)
+            except Exception as e:
+                logger.error(f"❌ Micro-batch of {len(pending)} failed: {e}")
+                for _, _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            reverse = self.engine.reverse_difficulty_mapping
+            for (_, current_level, future), level_num, new_streak in zip(pending, next_levels, new_streaks):
+                future.set_result((reverse.get(int(level_num), current_level), int(new_streak)))
@@ -2,6 +2,7 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import pickle
+from forest_compiler import CompiledForest
 
 data=pd.read_csv("../data/learning_progress_expanded.csv")
 
@@ -19,3 +20,6 @@ print("Predicted next level:", pred[0])
 
 with open("../artifacts/level_recommender_model.pkl", "wb") as f:
     pickle.dump(model, f)
+
+# Flat NumPy export used by AdaptiveEngine at serving time
+CompiledForest.from_model(model).save("../artifacts/level_recommender_forest")
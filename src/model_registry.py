@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from logger import logger
+from exception import MathsException
+from forest_compiler import CompiledForest
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the recommender model.
+
+    One registry exists per artifact pair, so every AdaptiveEngine in the
+    process (one per Streamlit rerun) shares a single loaded model. The model
+    is loaded lazily on first use. The compiled forest is memory-mapped
+    read-only, so worker processes share the same page-cache copy of the
+    arrays. The forest version named in meta.json is re-checked at most every
+    check_interval seconds and a changed artifact is loaded aside and swapped
+    in atomically. The pickle is only served without a forest, or when
+    mark_pickle_newer() recorded that it supersedes the current forest.
+    """
+
+    _instances: Dict[Tuple[str, str], "ModelRegistry"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model_path: str, forest_path: str, mmap_mode: Optional[str] = "r",
+                 check_interval: float = 1.0):
+        self.model_path = model_path
+        self.forest_path = forest_path
+        self.mmap_mode = mmap_mode
+        self.check_interval = check_interval
+
+        self._model = None
+        self._version = None
+        self._legacy_version = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_path: str = "artifacts/level_recommender_model.pkl",
+            forest_path: str = "artifacts/level_recommender_forest") -> "ModelRegistry":
+        """Returns the shared registry for this artifact pair."""
+        key = (os.path.abspath(model_path), os.path.abspath(forest_path) if forest_path else "")
+        registry = cls._instances.get(key)
+        if registry is None:
+            with cls._instances_lock:
+                registry = cls._instances.setdefault(key, cls(model_path, forest_path))
+        return registry
+
+    @property
+    def model(self) -> CompiledForest:
+        """The current model, loading or hot-swapping it if needed."""
+        now = time.monotonic()
+        if self._model is not None and now < self._next_check:
+            return self._model
+
+        with self._lock:
+            if self._model is None or now >= self._next_check:
+                try:
+                    version = self._current_version()
+                    if self._model is None or version != self._version:
+                        self._model, self._version = self._load(version)
+                except MathsException:
+                    if self._model is None:
+                        raise
+                    logger.warning("⚠ Model reload failed, keeping the current model.")
+                self._next_check = time.monotonic() + self.check_interval
+        return self._model
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.forest_path, "meta.json") if self.forest_path else ""
+
+    def _forest_version(self) -> Optional[str]:
+        """The version named in meta.json, or the fingerprint of an unversioned legacy forest."""
+        meta_path = self._meta_path()
+        if not meta_path or not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            version = json.load(f).get("version")
+        if version:
+            return version
+        # Legacy forests are rewritten in place: hash the arrays again only when meta.json changes
+        stat = os.stat(meta_path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        if self._legacy_version is None or self._legacy_version[0] != key:
+            self._legacy_version = (key, CompiledForest.load(self.forest_path, mmap_mode="r").fingerprint)
+        return self._legacy_version[1]
+
+    def _current_version(self) -> Tuple[str, str]:
+        """Which artifact to serve and its version; the compiled forest wins unless superseded."""
+        try:
+            forest_version = self._forest_version()
+            has_pickle = os.path.exists(self.model_path)
+            if forest_version is not None and not (has_pickle and _supersedes(self.model_path) == forest_version):
+                return "forest", forest_version
+            if has_pickle:
+                stat = os.stat(self.model_path)
+                return "pickle", f"{stat.st_size}:{stat.st_mtime_ns}"
+        except Exception as e:
+            logger.error(f" Failed to read model metadata: {e}")
+            raise MathsException("Model loading failed!") from e
+        logger.error(f" Model file not found: {self.model_path}")
+        raise MathsException("Model file missing! Ensure trained model exists.")
+
+    def _load(self, version: Tuple[str, str]) -> Tuple[CompiledForest, Tuple[str, str]]:
+        """Loads the artifact, retrying if it was rewritten while loading."""
+        try:
+            for _ in range(3):
+                start = time.perf_counter()
+                if version[0] == "forest":
+                    model = CompiledForest.load(self.forest_path, mmap_mode=self.mmap_mode)
+                else:
+                    import pickle  # legacy artifact only; unpickling pulls in sklearn
+
+                    with open(self.model_path, "rb") as f:
+                        model = CompiledForest.from_model(pickle.load(f))
+
+                latest = self._current_version()
+                if latest == version:
+                    action = "swapped" if self._model is not None else "loaded"
+                    logger.info(
+                        f" Model {action} from {version[0]} artifact in "
+                        f"{(time.perf_counter() - start) * 1000:.1f}ms"
+                    )
+                    return model, version
+                version = latest
+        except MathsException:
+            raise
+        except Exception as e:
+            logger.error(f" Failed to load model: {e}")
+            raise MathsException("Model loading failed!") from e
+
+        logger.error(" Model artifact kept changing while loading")
+        raise MathsException("Model loading failed!")
+
+
+def _marker_path(model_path: str) -> str:
+    return model_path + ".json"
+
+
+def _supersedes(model_path: str) -> Optional[str]:
+    """The forest version the pickle was marked as replacing, if any."""
+    marker_path = _marker_path(model_path)
+    if not os.path.exists(marker_path):
+        return None
+    with open(marker_path, encoding="utf-8") as f:
+        return json.load(f).get("supersedes")
+
+
+def mark_pickle_newer(model_path: str = "artifacts/level_recommender_model.pkl",
+                      forest_path: str = "artifacts/level_recommender_forest"):
+    """
+    Serves the pickle instead of the current compiled forest.
+
+    Records the forest version the pickle replaces next to the pickle. Saving
+    a new forest changes its version, so the forest is preferred again.
+    """
+    try:
+        with open(os.path.join(forest_path, "meta.json"), encoding="utf-8") as f:
+            version = json.load(f).get("version") or CompiledForest.load(forest_path, mmap_mode="r").fingerprint
+        with open(_marker_path(model_path) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"supersedes": version}, f)
+        os.replace(_marker_path(model_path) + ".tmp", _marker_path(model_path))
+    except Exception as e:
+        logger.error(f" Failed to mark {model_path} as newer than {forest_path}: {e}")
+        raise MathsException("Failed to mark the model pickle as newer") from e
+    logger.info(f" {model_path} now supersedes forest version {version}")
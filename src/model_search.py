@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from logger import configure_logging, logger
+from exception import MathsException
+from forest_compiler import CompiledForest
+from retrain import FEATURES
+
+FORESTS = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+def candidates(seed: int = 0) -> List[tuple]:
+    """(name, unfitted estimator) pairs: forest sizes and depths plus a few other model families."""
+    grid = []
+    for cls, tag in ((RandomForestClassifier, "rf"), (ExtraTreesClassifier, "et")):
+        for n_estimators in (10, 25, 50, 100, 200):
+            for max_depth in (4, 8, 12, 30, None):
+                grid.append((f"{tag}_n{n_estimators}_d{max_depth}",
+                             cls(n_estimators=n_estimators, max_depth=max_depth, random_state=seed, n_jobs=1)))
+    for max_depth in (4, 8, 12, None):
+        grid.append((f"tree_d{max_depth}", DecisionTreeClassifier(max_depth=max_depth, random_state=seed)))
+    for max_iter in (50, 100, 200):
+        grid.append((f"hgb_i{max_iter}", HistGradientBoostingClassifier(max_iter=max_iter, random_state=seed)))
+    grid.append(("logreg", make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))))
+    return grid
+
+
+def _fit(name: str, estimator, X_train, y_train) -> tuple:
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    return name, estimator, time.perf_counter() - start
+
+
+def _serving_form(estimator):
+    """What AdaptiveEngine would serve: the compiled arrays for forests, the estimator otherwise."""
+    return CompiledForest.from_model(estimator) if isinstance(estimator, FORESTS) else estimator
+
+
+def _latency_us(predict, X: np.ndarray, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(X)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def measure(name: str, estimator, fit_seconds: float, X_test: pd.DataFrame, y_test: np.ndarray,
+            batch: np.ndarray, repeats: int) -> dict:
+    """Accuracy, artifact size, load time and single-row/batched latency of one fitted candidate."""
+    served = _serving_form(estimator)
+    X_eval = X_test.to_numpy() if isinstance(served, CompiledForest) else X_test
+    accuracy = float((np.asarray(served.predict(X_eval)) == y_test).mean())
+
+    if isinstance(served, CompiledForest):
+        with tempfile.TemporaryDirectory() as tmp:
+            served.save(tmp)
+            artifact_bytes = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            start = time.perf_counter()
+            CompiledForest.load(tmp, mmap_mode="r")
+            load_ms = (time.perf_counter() - start) * 1000
+        single, batched = batch[:1], batch
+    else:
+        blob = pickle.dumps(estimator)
+        artifact_bytes = len(blob)
+        start = time.perf_counter()
+        pickle.loads(blob)
+        load_ms = (time.perf_counter() - start) * 1000
+        single = pd.DataFrame(batch[:1], columns=FEATURES)
+        batched = pd.DataFrame(batch, columns=FEATURES)
+
+    return {
+        "name": name,
+        "family": type(estimator).__name__,
+        "accuracy": accuracy,
+        "artifact_bytes": artifact_bytes,
+        "load_ms": load_ms,
+        "single_row_us": _latency_us(served.predict, single, repeats),
+        "batched_us_per_row": _latency_us(served.predict, batched, max(1, repeats // 20)) / len(batch),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def pareto_front(rows: List[dict]) -> List[dict]:
+    """Marks rows not dominated on (higher accuracy, lower single-row latency, smaller artifact)."""
+    for row in rows:
+        row["pareto"] = not any(
+            other is not row
+            and other["accuracy"] >= row["accuracy"]
+            and other["single_row_us"] <= row["single_row_us"]
+            and other["artifact_bytes"] <= row["artifact_bytes"]
+            and (other["accuracy"] > row["accuracy"]
+                 or other["single_row_us"] < row["single_row_us"]
+                 or other["artifact_bytes"] < row["artifact_bytes"])
+            for other in rows
+        )
+    return rows
+
+
+def write_report(rows: List[dict], out_dir: str, meta: dict):
+    os.makedirs(out_dir, exist_ok=True)
+    rows = sorted(rows, key=lambda r: (-r["accuracy"], r["single_row_us"]))
+    with open(os.path.join(out_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump({**meta, "candidates": rows}, f, indent=2)
+
+    lines = [
+        "# Recommender model search",
+        "",
+        f"{meta['train_rows']} training / {meta['test_rows']} held-out rows from `{meta['data']}`. "
+        "Forests are measured as the compiled arrays AdaptiveEngine serves. "
+        "★ = Pareto-optimal on accuracy, single-row latency and artifact size.",
+        "",
+        "| | model | accuracy | artifact KB | load ms | 1-row µs | batched µs/row | fit s |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {'★' if r['pareto'] else ''} | {r['name']} | {r['accuracy']:.3f} | {r['artifact_bytes'] / 1024:.0f} "
+            f"| {r['load_ms']:.2f} | {r['single_row_us']:.0f} | {r['batched_us_per_row']:.2f} "
+            f"| {r['fit_seconds']:.2f} |"
+        )
+    with open(os.path.join(out_dir, "report.md"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def search(data_path: str = "data/math_quiz_dataset.csv", out_dir: str = "reports/model_search",
+           test_size: float = 0.25, seed: int = 0, n_jobs: int = -1, repeats: int = 200) -> List[dict]:
+    """
+    Fits every candidate in parallel on one split, measures each serially, writes the Pareto report.
+
+    Fitting runs across cores with joblib (one single-threaded estimator per
+    job). Latency is measured afterwards one candidate at a time, so the
+    timings are not distorted by the other fits.
+    """
+    try:
+        data = pd.read_csv(data_path)
+        X, y = data[FEATURES], data["next_level"].to_numpy()
+    except Exception as e:
+        logger.error(f"❌ Could not read training data {data_path}: {e}")
+        raise MathsException("Failed to load training data") from e
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed, stratify=y)
+    grid = candidates(seed)
+    logger.info(f"🔍 Fitting {len(grid)} candidates on {len(X_train)} rows")
+    fitted = Parallel(n_jobs=n_jobs)(delayed(_fit)(name, est, X_train, y_train) for name, est in grid)
+
+    batch = X_test.sample(1024, replace=True, random_state=seed).to_numpy()
+    rows = [measure(name, est, seconds, X_test, y_test, batch, repeats) for name, est, seconds in fitted]
+    rows = pareto_front(rows)
+    write_report(rows, out_dir, {"data": data_path, "train_rows": len(X_train), "test_rows": len(X_test),
+                                 "seed": seed})
+    best = [r["name"] for r in sorted(rows, key=lambda r: -r["accuracy"]) if r["pareto"]]
+    logger.info(f"✅ Model search report written to {out_dir} | Pareto front: {', '.join(best)}")
+    return rows
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Parallel model search with a quality/speed Pareto report.")
+    parser.add_argument("--data", default="data/math_quiz_dataset.csv")
+    parser.add_argument("--out", default="reports/model_search")
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args(argv)
+    configure_logging()
+    search(args.data, args.out, args.test_size, args.seed, args.jobs, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
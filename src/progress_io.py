@@ -0,0 +1,343 @@
+import argparse
+import os
+import sqlite3
+import time
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from logger import configure_logging, logger
+from exception import MathsException
+from tracker import (
+    PRAGMAS, INSERT_PROGRESS, CREATE_SESSION_STATS_TRIGGER, DIFFICULTY_SCORE, MERGE_SESSION_STATS, ProgressTracker
+)
+from puzzle_rules import DEFAULT_RULES_PATH, load_puzzle_rules
+
+PROGRESS_COLUMNS = [
+    "session_id", "timestamp", "difficulty", "correct", "response_time", "streak", "confidence", "expected_time"
+]
+# Sources exported before a column existed are imported with NULLs in its place
+OPTIONAL_COLUMNS = {"expected_time"}
+
+PROGRESS_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("session_id", pa.string()),
+    ("timestamp", pa.string()),
+    ("difficulty", pa.string()),
+    ("correct", pa.int64()),
+    ("response_time", pa.float64()),
+    ("streak", pa.int64()),
+    ("confidence", pa.float64()),
+    ("expected_time", pa.float64()),
+])
+
+
+def _connect(db_name: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_name)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def iter_progress_chunks(db_name: str, chunk_rows: int = 500_000, since_id: int = 0) -> Iterator[pa.Table]:
+    """Streams the progress table in id order as Arrow tables of chunk_rows rows."""
+    conn = _connect(db_name)
+    try:
+        cursor = conn.execute(
+            "SELECT id, " + ", ".join(PROGRESS_COLUMNS) + " FROM progress WHERE id > ? ORDER BY id",
+            (since_id,)
+        )
+        names = PROGRESS_SCHEMA.names
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                return
+            columns = list(zip(*rows))
+            yield pa.Table.from_arrays(
+                [pa.array(col, type=PROGRESS_SCHEMA.field(name).type) for name, col in zip(names, columns)],
+                schema=PROGRESS_SCHEMA,
+            )
+    finally:
+        conn.close()
+
+
+def export_parquet(db_name: str, output_dir: str, chunk_rows: int = 500_000, since_id: int = 0) -> int:
+    """
+    Writes progress rows to output_dir/date=YYYY-MM-DD/part-<n>.parquet.
+
+    Rows are read and written chunk by chunk, so memory stays bounded by
+    chunk_rows whatever the table size. since_id allows incremental exports.
+    Returns the number of rows written.
+    """
+    start = time.perf_counter()
+    writers = {}
+    total = 0
+    run_tag = int(time.time())
+    try:
+        for table in iter_progress_chunks(db_name, chunk_rows, since_id):
+            dates = pc.utf8_slice_codeunits(table["timestamp"], 0, 10)
+            for date in pc.unique(dates).to_pylist():
+                # Comparing with null yields null, not true: NULL timestamps need is_null
+                part = table.filter(pc.is_null(dates) if date is None else pc.equal(dates, date))
+                partition = date or "unknown"  # NULL and empty timestamps share one partition
+                writer = writers.get(partition)
+                if writer is None:
+                    directory = os.path.join(output_dir, f"date={partition}")
+                    os.makedirs(directory, exist_ok=True)
+                    writer = pq.ParquetWriter(
+                        os.path.join(directory, f"part-{run_tag}-{since_id}.parquet"), PROGRESS_SCHEMA
+                    )
+                    writers[partition] = writer
+                writer.write_table(part)
+            total += table.num_rows
+    except Exception as e:
+        logger.error(f"❌ Progress export failed: {e}")
+        raise MathsException("Failed to export progress data") from e
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    logger.info(
+        f"📦 Exported {total} progress rows to {output_dir} "
+        f"({len(writers)} partitions) in {time.perf_counter() - start:.2f}s"
+    )
+    return total
+
+
+def _iter_source_batches(path: str, batch_rows: int) -> Iterator[pa.RecordBatch]:
+    """Record batches from a Parquet file/directory or a CSV file."""
+    if path.lower().endswith(".csv"):
+        import pyarrow.csv as pacsv
+
+        text_columns = {name: pa.string() for name in ("session_id", "timestamp", "difficulty")}
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=64 << 20),
+            convert_options=pacsv.ConvertOptions(column_types=text_columns),
+        )
+        yield from reader
+    else:
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        columns = [c for c in PROGRESS_COLUMNS if c in dataset.schema.names or c not in OPTIONAL_COLUMNS]
+        yield from dataset.to_batches(columns=columns, batch_size=batch_rows)
+
+
+def import_rows(db_name: str, path: str, transaction_rows: int = 1_000_000, batch_rows: int = 100_000) -> int:
+    """
+    Bulk-loads progress rows from Parquet (file or partitioned directory) or CSV.
+
+    Rows get new ids in progress.db. Inserts go through executemany inside
+    transactions of about transaction_rows rows, and session_stats is updated
+    once per transaction instead of per row. Returns rows imported.
+    """
+    ProgressTracker(db_name)  # make sure tables, index and trigger exist
+    start = time.perf_counter()
+    conn = _connect(db_name)
+    conn.isolation_level = None  # transactions are managed explicitly below
+    total = 0
+    in_transaction = 0
+
+    def begin():
+        # The per-row session_stats trigger would triple insert cost; it is
+        # dropped and recreated inside the same transaction, so concurrent
+        # writers (blocked on the write lock meanwhile) never run without it.
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DROP TRIGGER IF EXISTS trg_progress_session_stats")
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM progress").fetchone()[0]
+
+    def commit(first_id):
+        conn.execute(MERGE_SESSION_STATS, (first_id,))
+        conn.execute(CREATE_SESSION_STATS_TRIGGER)
+        conn.execute("COMMIT")
+
+    try:
+        first_id = begin()
+        for batch in _iter_source_batches(path, batch_rows):
+            missing = [c for c in PROGRESS_COLUMNS if c not in batch.schema.names and c not in OPTIONAL_COLUMNS]
+            if missing:
+                raise MathsException(f"Source is missing progress columns: {missing}")
+            columns: List[list] = [
+                batch.column(c).to_pylist() if c in batch.schema.names else [None] * batch.num_rows
+                for c in PROGRESS_COLUMNS
+            ]
+            conn.executemany(INSERT_PROGRESS, zip(*columns))
+            total += batch.num_rows
+            in_transaction += batch.num_rows
+            if in_transaction >= transaction_rows:
+                commit(first_id)
+                first_id = begin()
+                in_transaction = 0
+        commit(first_id)
+    except MathsException:
+        conn.execute("ROLLBACK")
+        raise
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        logger.error(f"❌ Progress import failed: {e}")
+        raise MathsException("Failed to import progress data") from e
+    finally:
+        conn.close()
+
+    logger.info(f"📥 Imported {total} progress rows from {path} in {time.perf_counter() - start:.2f}s")
+    return total
+
+
+def rescore_confidence(db_name: str, chunk_rows: int = 200_000, expected_time: Optional[float] = None,
+                       dry_run: bool = False, approximate: bool = False,
+                       rules_path: str = DEFAULT_RULES_PATH) -> dict:
+    """
+    Recomputes progress.confidence with ProgressTracker.calculate_confidence_many.
+
+    Rows are streamed in (session_id, id) order by keyset pagination over the
+    session index. Each row is rescored with the streak it was answered on
+    (the previous row's logged streak, 1 for a session's first answer) and
+    the expected time recorded with it, so an unchanged formula reproduces
+    the logged scores. Changed scores are written back with one executemany
+    UPDATE per chunk, and session_stats.last_confidence is refreshed at the end.
+
+    Rows logged before expected_time was recorded can only be approximated:
+    they get expected_time if given, otherwise the operator-weighted mean of
+    the rules cell for their level and the band they were served in (the
+    previous row's streak and confidence). Such rows are only written with
+    approximate=True. Returns row, change and approximation counts.
+    """
+    ProgressTracker(db_name)  # make sure tables, index and expected_time column exist
+    start = time.perf_counter()
+    conn = _connect(db_name)
+    conn.isolation_level = None  # one explicit transaction per chunk
+    total = changed = approximated = 0
+    abs_change = 0.0
+    last_key, last_streak, last_confidence = ("", 0), None, None
+
+    try:
+        if not dry_run and not approximate:
+            unrecorded = conn.execute("SELECT COUNT(*) FROM progress WHERE expected_time IS NULL").fetchone()[0]
+            if unrecorded:
+                raise MathsException(
+                    f"{unrecorded} progress rows have no recorded expected_time; "
+                    "rescoring them would approximate it, pass approximate=True (--approximate) to allow that"
+                )
+        rules = None
+        while True:
+            rows = conn.execute(
+                "SELECT id, session_id, difficulty, correct, response_time, streak, confidence, expected_time "
+                "FROM progress WHERE (session_id, id) > (?, ?) ORDER BY session_id, id LIMIT ?",
+                (*last_key, chunk_rows)
+            ).fetchall()
+            if not rows:
+                break
+            df = pd.DataFrame(rows, columns=["id", "session_id", "difficulty", "correct",
+                                             "response_time", "streak", "confidence", "expected_time"])
+
+            # State before the answer = the session's previous logged streak and confidence
+            sessions = df.groupby("session_id", sort=False)
+            prior = sessions["streak"].shift(1)
+            prior_confidence = sessions["confidence"].shift(1)
+            if last_streak is not None:
+                first_of_carried = (df["session_id"] == last_key[0]) & prior.isna()
+                prior[first_of_carried] = last_streak
+                prior_confidence[first_of_carried] = last_confidence
+            prior = prior.fillna(1)
+            prior_confidence = prior_confidence.fillna(50.0)
+
+            times = df["expected_time"].to_numpy(np.float64)
+            unknown = np.isnan(times)
+            if unknown.any():
+                if expected_time is not None:
+                    times[unknown] = expected_time
+                else:
+                    rules = rules or load_puzzle_rules(rules_path)
+                    levels = df["difficulty"].map(DIFFICULTY_SCORE).fillna(1).to_numpy()
+                    times[unknown] = rules.mean_expected_times(
+                        levels[unknown], prior.to_numpy()[unknown], prior_confidence.to_numpy()[unknown]
+                    )
+                approximated += int(unknown.sum())
+            scores = ProgressTracker.calculate_confidence_many(
+                df["correct"], df["difficulty"], df["response_time"], prior, times
+            )
+
+            diff = scores != df["confidence"].to_numpy(np.float64)
+            total += len(df)
+            changed += int(diff.sum())
+            abs_change += float(np.nansum(np.abs(scores[diff] - df["confidence"].to_numpy(np.float64)[diff])))
+            if diff.any() and not dry_run:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "UPDATE progress SET confidence = ? WHERE id = ?",
+                    zip(scores[diff].tolist(), df["id"][diff].tolist())
+                )
+                conn.execute("COMMIT")
+
+            last_key = (rows[-1][1], rows[-1][0])
+            last_streak, last_confidence = rows[-1][5], rows[-1][6]
+
+        if changed and not dry_run:
+            with conn:
+                conn.execute(
+                    "UPDATE session_stats SET last_confidence = ("
+                    "SELECT confidence FROM progress p WHERE p.session_id = session_stats.session_id "
+                    "ORDER BY id DESC LIMIT 1)"
+                )
+    except MathsException:
+        raise
+    except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        logger.error(f"❌ Confidence rescore failed: {e}")
+        raise MathsException("Failed to rescore confidence") from e
+    finally:
+        conn.close()
+
+    logger.info(
+        f"🔁 Rescored {total} rows in {time.perf_counter() - start:.2f}s: {changed} changed, "
+        f"{approximated} with an approximated expected time{' (dry run)' if dry_run else ''}"
+    )
+    return {
+        "rows": total,
+        "changed": changed,
+        "approximated": approximated,
+        "mean_abs_change": abs_change / changed if changed else 0.0,
+    }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Bulk export/import and confidence rescoring of progress.db rows.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export", help="stream progress rows to date-partitioned Parquet")
+    export_cmd.add_argument("--db", default="progress.db")
+    export_cmd.add_argument("--out", default="exports/progress")
+    export_cmd.add_argument("--chunk-rows", type=int, default=500_000)
+    export_cmd.add_argument("--since-id", type=int, default=0)
+
+    import_cmd = sub.add_parser("import", help="bulk-load Parquet or CSV rows into progress.db")
+    import_cmd.add_argument("source")
+    import_cmd.add_argument("--db", default="progress.db")
+    import_cmd.add_argument("--transaction-rows", type=int, default=1_000_000)
+
+    rescore_cmd = sub.add_parser("rescore", help="recompute the confidence column with the current formula")
+    rescore_cmd.add_argument("--db", default="progress.db")
+    rescore_cmd.add_argument("--chunk-rows", type=int, default=200_000)
+    rescore_cmd.add_argument("--expected-time", type=float, default=None,
+                             help="seconds, for rows without a recorded expected time; "
+                                  "defaults to the rules' mean for the row's level and band")
+    rescore_cmd.add_argument("--dry-run", action="store_true", help="count changes without writing them")
+    rescore_cmd.add_argument("--approximate", action="store_true",
+                             help="also write rows whose expected time was not recorded and is approximated")
+
+    args = parser.parse_args(argv)
+    configure_logging()
+    if args.command == "export":
+        export_parquet(args.db, args.out, args.chunk_rows, args.since_id)
+    elif args.command == "import":
+        import_rows(args.db, args.source, args.transaction_rows)
+    else:
+        print(rescore_confidence(args.db, args.chunk_rows, args.expected_time, args.dry_run, args.approximate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Optional, Tuple
+import numpy as np
+from logger import logger
+from metrics import timed
+from puzzle_generator import PuzzleGenerator
+
+Puzzle = Tuple[str, float, float]
+
+
+class PuzzlePrefetcher:
+    """
+    Per-session queues of pre-generated puzzles.
+
+    After an answer is scored, prefetch() fills up to `depth` puzzles for each
+    difficulty in a background thread pool, using the session's new streak and
+    confidence. next_puzzle() then pops a ready puzzle instead of generating
+    one on the click path. Every queued puzzle remembers the PuzzleRule cell
+    it was drawn from; when streak or confidence move the session into a
+    different cell, those puzzles are discarded and the request is a miss.
+    """
+
+    LEVELS = ("Easy", "Medium", "Hard")
+
+    def __init__(self, generator: Optional[PuzzleGenerator] = None, depth: int = 3,
+                 max_workers: int = 2, max_sessions: int = 10_000):
+        self.generator = generator or PuzzleGenerator()
+        self.depth = depth
+        self.max_sessions = max_sessions
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="puzzle-prefetch")
+        self._queues: "OrderedDict[str, Dict[str, Deque]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.latencies = deque(maxlen=10_000)
+
+    def _session_queues(self, session_id: str) -> Dict[str, Deque]:
+        queues = self._queues.get(session_id)
+        if queues is None:
+            queues = self._queues[session_id] = {level: deque() for level in self.LEVELS}
+            while len(self._queues) > self.max_sessions:
+                self._queues.popitem(last=False)
+        self._queues.move_to_end(session_id)
+        return queues
+
+    @timed("prefetcher.next_puzzle")
+    def next_puzzle(self, session_id: str, level: str, streak: int, confidence: float) -> Puzzle:
+        """A ready puzzle for this band if one is queued, otherwise a freshly generated one."""
+        start = time.perf_counter()
+        level = level.capitalize()
+        rule = self.generator.rules.lookup(level, streak, confidence) if level in self.LEVELS else None
+
+        puzzle = None
+        with self._lock:
+            queue = self._session_queues(session_id).get(level)
+            while queue:
+                queued_rule, queued_puzzle = queue.popleft()
+                if queued_rule is rule:
+                    puzzle = queued_puzzle
+                    break
+            if puzzle is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if puzzle is None:
+            puzzle = self.generator.generate_puzzle(level, streak, confidence)
+        self.latencies.append(time.perf_counter() - start)
+        return puzzle
+
+    def prefetch(self, session_id: str, streak: int, confidence: float):
+        """Tops up every level's queue for the session's current streak/confidence band."""
+        with self._lock:
+            queues = self._session_queues(session_id)
+            for level in self.LEVELS:
+                rule = self.generator.rules.lookup(level, streak, confidence)
+                queue = queues[level]
+                # Drop puzzles drawn for a band the session has left
+                fresh = [item for item in queue if item[0] is rule]
+                queue.clear()
+                queue.extend(fresh)
+                missing = self.depth - len(queue)
+                if missing > 0:
+                    self._pool.submit(self._fill, queue, level, streak, confidence, rule, missing)
+
+    def _fill(self, queue: Deque, level: str, streak: int, confidence: float, rule, count: int):
+        try:
+            puzzles = [self.generator.generate_puzzle(level, streak, confidence) for _ in range(count)]
+        except Exception as e:
+            logger.error(f"❌ Puzzle prefetch failed for {level}: {e}")
+            return
+        with self._lock:
+            room = self.depth - len(queue)
+            queue.extend((rule, puzzle) for puzzle in puzzles[:max(room, 0)])
+
+    def stats(self) -> dict:
+        """Queue hit rate and time-to-next-question percentiles (ms)."""
+        with self._lock:
+            hits, total = self.hits, self.hits + self.misses
+        latencies = np.asarray(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "requests": total,
+            "hit_rate": hits / total if total else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_shared: Optional[PuzzlePrefetcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_prefetcher(depth: int = 3) -> PuzzlePrefetcher:
+    """Process-wide prefetcher shared by all Streamlit sessions."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = PuzzlePrefetcher(depth=depth)
+    return _shared
@@ -0,0 +1,205 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+import numpy as np
+from typing import Dict, Tuple
+from logger import logger
+from exception import MathsException
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "puzzle_rules.json")
+
+Range = Tuple[int, int]
+
+
+class PuzzleRule:
+    """Precomputed parameters of one (level, confidence band, streak band) cell."""
+
+    __slots__ = ("ops", "cum_weights", "op_codes", "op_cum_probs", "num1", "num2",
+                 "expected_time", "expected_times", "mean_expected_time")
+
+    def __init__(self, ops: Dict[str, float], num1: Range, num2: Range, operations: Tuple[str, ...],
+                 base_time: Dict[str, float], level_offset: float):
+        self.ops = tuple(ops)
+        weights = np.array([ops[op] for op in self.ops], dtype=np.float64)
+        self.cum_weights = tuple(np.cumsum(weights).tolist())
+        self.op_codes = np.array([operations.index(op) for op in self.ops])
+        self.op_cum_probs = np.cumsum(weights / weights.sum())
+        self.num1 = tuple(num1)
+        self.num2 = tuple(num2)
+        self.expected_time = {op: base_time[op] + level_offset for op in self.ops}
+        # Indexed by position in PuzzleRules.OPERATIONS, for vectorized lookups
+        self.expected_times = np.array([base_time[op] + level_offset for op in operations], dtype=np.float64)
+        # Expected time of a puzzle drawn from this cell, over its operator mix
+        self.mean_expected_time = float(np.dot(weights / weights.sum(), self.expected_times[self.op_codes]))
+
+
+class PuzzleRules:
+    """
+    Puzzle curriculum loaded from a JSON config and compiled into a flat table.
+
+    The config is validated once when it is loaded. Every (level, confidence
+    band, streak band) cell becomes a PuzzleRule holding operand ranges,
+    cumulative operator probabilities and expected times, so generating a
+    puzzle is one dict lookup plus random draws.
+    """
+
+    OPERATIONS = ("+", "-", "*", "/")
+    LEVELS = ("Easy", "Medium", "Hard")
+
+    def __init__(self, config: dict):
+        try:
+            self._compile(config)
+        except MathsException as e:
+            logger.error(f"❌ Invalid puzzle rules: {e}")
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"❌ Invalid puzzle rules: {e!r}")
+            raise MathsException(f"Invalid puzzle rules: {e!r}") from e
+
+    def _compile(self, config: dict):
+        bands = config["confidence"]
+        self.high_min = float(bands["high_min"])
+        self.low_max = float(bands["low_max"])
+        if not 0 <= self.low_max < self.high_min <= 100:
+            raise MathsException("Confidence bands need 0 <= low_max < high_min <= 100")
+
+        timing = config["expected_time"]
+        base_time = {op: float(timing["base"][op]) for op in self.OPERATIONS}
+        per_level = float(timing["per_level"])
+        self.base_time = base_time
+        self.per_level = per_level
+
+        self.division_multiplier = tuple(int(v) for v in config["division_multiplier"])
+        self._check_range("division_multiplier", self.division_multiplier, minimum=1)
+
+        self._rules: Dict[Tuple[str, str, int], PuzzleRule] = {}
+        self._streak_max: Dict[str, list] = {}
+        for difficulty, level in enumerate(self.LEVELS, start=1):
+            spec = config["levels"][level]
+            offset = (difficulty - 1) * per_level
+
+            for band in ("high", "low"):
+                self._rules[(level, band, 0)] = self._compile_rule(f"{level}.{band}", spec[band], base_time, offset)
+
+            maxes = []
+            for i, cell in enumerate(spec["streak"]):
+                is_last = i == len(spec["streak"]) - 1
+                if (cell["max"] is None) != is_last:
+                    raise MathsException(f"{level}.streak: only the last band may (and must) have max null")
+                upper = math.inf if cell["max"] is None else int(cell["max"])
+                if maxes and upper <= maxes[-1]:
+                    raise MathsException(f"{level}.streak: band maxima must increase")
+                maxes.append(upper)
+                self._rules[(level, "normal", i)] = self._compile_rule(
+                    f"{level}.streak[{i}]", cell, base_time, offset
+                )
+            self._streak_max[level] = maxes
+
+    def _compile_rule(self, name: str, cell: dict, base_time: Dict[str, float], offset: float) -> PuzzleRule:
+        ops = {op: float(w) for op, w in cell["ops"].items()}
+        unknown = set(ops) - set(self.OPERATIONS)
+        if unknown:
+            raise MathsException(f"{name}: unknown operations {sorted(unknown)}")
+        if not ops or any(w < 0 for w in ops.values()) or sum(ops.values()) <= 0:
+            raise MathsException(f"{name}: operation weights must be non-negative with a positive total")
+        ops = {op: w for op, w in ops.items() if w > 0}
+
+        num1, num2 = tuple(cell["num1"]), tuple(cell["num2"])
+        self._check_range(f"{name}.num1", num1)
+        # Division puzzles are built as num2 * k / num2, so num2 must not include 0
+        self._check_range(f"{name}.num2", num2, minimum=1 if "/" in ops else None)
+        return PuzzleRule(ops, num1, num2, self.OPERATIONS, base_time, offset)
+
+    @staticmethod
+    def _check_range(name: str, bounds: tuple, minimum=None):
+        if len(bounds) != 2 or any(not isinstance(v, int) for v in bounds) or bounds[0] > bounds[1]:
+            raise MathsException(f"{name}: expected [low, high] integers with low <= high")
+        if minimum is not None and bounds[0] < minimum:
+            raise MathsException(f"{name}: lower bound must be at least {minimum}")
+
+    def lookup(self, level: str, streak: int, confidence: float) -> PuzzleRule:
+        """Rule for a validated level and confidence."""
+        if confidence >= self.high_min:
+            return self._rules[(level, "high", 0)]
+        if confidence <= self.low_max:
+            return self._rules[(level, "low", 0)]
+        return self._rules[(level, "normal", bisect.bisect_left(self._streak_max[level], streak))]
+
+    def mean_expected_times(self, levels: np.ndarray, streaks: np.ndarray, confidences: np.ndarray) -> np.ndarray:
+        """
+        lookup(...).mean_expected_time for whole columns.
+
+        levels are encoded 1 (Easy) to 3 (Hard); bands are resolved exactly as
+        in lookup, one level at a time.
+        """
+        levels = np.asarray(levels)
+        streaks = np.asarray(streaks)
+        confidences = np.asarray(confidences, dtype=np.float64)
+        times = np.full(len(levels), np.nan)
+        for code, level in enumerate(self.LEVELS, start=1):
+            at = levels == code
+            if not at.any():
+                continue
+            maxes = self._streak_max[level]
+            normal = np.array([self._rules[(level, "normal", i)].mean_expected_time for i in range(len(maxes))])
+            cell = normal[np.searchsorted(maxes, streaks[at], side="left")]
+            conf = confidences[at]
+            cell = np.where(conf <= self.low_max, self._rules[(level, "low", 0)].mean_expected_time, cell)
+            times[at] = np.where(conf >= self.high_min, self._rules[(level, "high", 0)].mean_expected_time, cell)
+        return times
+
+    @classmethod
+    def from_file(cls, path: str) -> "PuzzleRules":
+        try:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read puzzle rules from {path}: {e}")
+            raise MathsException("Failed to load puzzle rules") from e
+        rules = cls(config)
+        logger.info(f"✅ Puzzle rules loaded from: {path}")
+        return rules
+
+
+# Seconds between mtime checks of a cached rules file, as ModelRegistry.check_interval
+CHECK_INTERVAL = 1.0
+
+_cache: Dict[str, Tuple[float, PuzzleRules]] = {}
+_next_check: Dict[str, float] = {}
+_cache_lock = threading.Lock()
+
+
+def load_puzzle_rules(path: str = DEFAULT_RULES_PATH, check_interval: float = CHECK_INTERVAL) -> PuzzleRules:
+    """
+    Compiled rules for path, shared per process and reloaded when the file changes.
+
+    The file's mtime is checked at most every check_interval seconds, so hot
+    paths can call this per puzzle without a stat call each time.
+    """
+    path = os.path.abspath(path)
+    cached = _cache.get(path)
+    if cached is not None and time.monotonic() < _next_check.get(path, 0.0):
+        return cached[1]
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as e:
+        logger.error(f"❌ Puzzle rules file not found: {path}")
+        raise MathsException("Puzzle rules file missing!") from e
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = (mtime, PuzzleRules.from_file(path))
+            except MathsException:
+                if cached is None:
+                    raise
+                logger.warning("⚠ Keeping previous puzzle rules; edited file is invalid.")
+                cached = (mtime, cached[1])
+            _cache[path] = cached
+        _next_check[path] = time.monotonic() + check_interval
+    return cached[1]
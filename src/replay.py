@@ -0,0 +1,517 @@
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from logger import configure_logging, logger
+from exception import MathsException
+from puzzle_rules import DEFAULT_RULES_PATH, load_puzzle_rules
+from tracker import DIFFICULTY_SCORE, PRAGMAS
+
+LEVEL_NAMES = np.array(["", "Easy", "Medium", "Hard"], dtype=object)
+# Mean level per step is reported for the first TRAJECTORY_STEPS answers of a session
+TRAJECTORY_STEPS = 100
+# Pseudo-answers pulling a session's accuracy towards what its levels predict
+ABILITY_PRIOR = 5.0
+DEFAULT_MODEL_PATH = "artifacts/level_recommender_model.pkl"
+DEFAULT_FOREST_PATH = "artifacts/level_recommender_forest"
+
+
+@dataclass
+class ReplayPolicy:
+    """
+    A candidate adaptive policy, described by paths and import names so that
+    worker processes can rebuild it.
+
+    confidence is a "module:attr" function with the signature of
+    ProgressTracker.calculate_confidence_many. recommend, if set, is a
+    "module:attr" function taking AdaptiveEngine.recommend_many's (n, 5)
+    batch; otherwise an AdaptiveEngine on model_path/forest_path (and
+    table_path, for table mode) is used. The default forest is the compiled
+    default model, so a policy given another model_path but no forest_path
+    serves that pickle, not the default forest.
+    """
+
+    name: str = "current"
+    model_path: str = DEFAULT_MODEL_PATH
+    forest_path: Optional[str] = DEFAULT_FOREST_PATH
+    table_path: Optional[str] = None
+    rules_path: str = DEFAULT_RULES_PATH
+    confidence: str = "tracker:ProgressTracker.calculate_confidence_many"
+    recommend: Optional[str] = None
+
+    def __post_init__(self):
+        # The registry serves a forest newer than the pickle, whichever model it was compiled from
+        if self.model_path != DEFAULT_MODEL_PATH and self.forest_path == DEFAULT_FOREST_PATH:
+            self.forest_path = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "ReplayPolicy":
+        """"name" or "name:model=...,forest=...,table=...,rules=...,confidence=...,recommend=..." (CLI form)."""
+        name, _, options = spec.partition(":")
+        keys = {"model": "model_path", "forest": "forest_path", "table": "table_path", "rules": "rules_path",
+                "confidence": "confidence", "recommend": "recommend"}
+        kwargs = {}
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key not in keys:
+                raise MathsException(f"Unknown policy option '{key}' (expected one of {', '.join(keys)})")
+            kwargs[keys[key]] = value
+        return cls(name=name, **kwargs)
+
+
+def _import(path: str):
+    module, _, attr = path.partition(":")
+    target = importlib.import_module(module)
+    for part in attr.split("."):
+        target = getattr(target, part)
+    return target
+
+
+class _LoadedPolicy:
+    def __init__(self, policy: ReplayPolicy):
+        from adaptive_engine import AdaptiveEngine
+
+        self.name = policy.name
+        self.confidence = _import(policy.confidence)
+        if policy.recommend:
+            self.recommend = _import(policy.recommend)
+        else:
+            if not os.path.exists(policy.model_path):
+                raise MathsException(f"Model {policy.model_path} of policy '{policy.name}' does not exist")
+            self.recommend = AdaptiveEngine(policy.model_path, policy.forest_path, policy.table_path).recommend_many
+        self.rules = load_puzzle_rules(policy.rules_path)
+
+
+# ----------------------------------------------------------------------
+# Sources: chunks of whole sessions as columnar arrays
+# ----------------------------------------------------------------------
+def _encode_levels(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    return values.map(DIFFICULTY_SCORE).fillna(0).to_numpy(dtype=np.int64)
+
+
+def _chunk(df: pd.DataFrame) -> dict:
+    """Columnar chunk; rows must be grouped by session and in answer order."""
+    df = df[_encode_levels(df["difficulty"]) > 0]
+    sessions = df["session_id"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+    chunk = {
+        "session": np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(df)])),
+        "level": _encode_levels(df["difficulty"]),
+        "correct": df["correct"].fillna(0).to_numpy(dtype=np.int64),
+        "response_time": df["response_time"].fillna(0.0).to_numpy(dtype=np.float64),
+    }
+    for column in ("start_streak", "start_confidence", "next_level"):
+        if column in df:
+            chunk[column] = df[column].to_numpy()
+    # The streak and confidence logged after each answer: the band of the session's next puzzle
+    if "streak" in df and "confidence" in df:
+        chunk["logged_streak"] = df["streak"].fillna(1).to_numpy(dtype=np.int64)
+        chunk["logged_confidence"] = df["confidence"].fillna(50.0).to_numpy(dtype=np.float64)
+    return chunk
+
+
+def _whole_sessions(frames: Iterator[pd.DataFrame], full: int) -> Iterator[dict]:
+    """Holds back the trailing session of each full frame so no session is split across chunks."""
+    pending = None
+    for frame in frames:
+        df = frame if pending is None else pd.concat([pending, frame], ignore_index=True)
+        if len(frame) < full:
+            pending = df
+            continue
+        last = df["session_id"].iloc[-1]
+        tail = df["session_id"].to_numpy() == last
+        if tail.all():
+            pending = df
+            continue
+        yield _chunk(df[~tail])
+        pending = df[tail]
+    if pending is not None and len(pending):
+        yield _chunk(pending)
+
+
+def iter_db_sessions(db_name: str, chunk_rows: int = 200_000) -> Iterator[dict]:
+    """Sessions from progress, in (session_id, id) order by keyset pagination over the session index."""
+    conn = sqlite3.connect(db_name)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+    def frames():
+        last_key = ("", 0)
+        while True:
+            rows = conn.execute(
+                "SELECT session_id, id, difficulty, correct, response_time, streak, confidence FROM progress "
+                "WHERE (session_id, id) > (?, ?) ORDER BY session_id, id LIMIT ?",
+                (*last_key, chunk_rows)
+            ).fetchall()
+            if not rows:
+                return
+            last_key = rows[-1][:2]
+            yield pd.DataFrame(rows, columns=["session_id", "id", "difficulty", "correct", "response_time",
+                                              "streak", "confidence"])
+            if len(rows) < chunk_rows:
+                return
+
+    try:
+        yield from _whole_sessions(frames(), chunk_rows)
+    finally:
+        conn.close()
+
+
+def iter_csv_sessions(path: str, chunk_rows: int = 200_000) -> Iterator[dict]:
+    """
+    Sessions from a CSV. With a session_id column, rows are taken as grouped by
+    session in answer order. Without one (data/math_quiz_dataset.csv), each
+    row is a one-answer session starting from its logged streak and
+    confidence, and its next_level label is scored against the policy.
+    """
+    reader = pd.read_csv(path, chunksize=chunk_rows)
+    first = next(reader, None)
+    if first is None:
+        return
+    if "session_id" in first:
+        yield from _whole_sessions(_chain(first, reader), chunk_rows)
+        return
+    offset = 0
+    for frame in _chain(first, reader):
+        frame = frame.assign(session_id=np.arange(offset, offset + len(frame)),
+                             start_streak=frame.get("streak", 1), start_confidence=frame.get("confidence", 50.0))
+        offset += len(frame)
+        yield _chunk(frame)
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def iter_sessions(source: str, chunk_rows: int = 200_000) -> Iterator[dict]:
+    if source.endswith(".csv"):
+        return iter_csv_sessions(source, chunk_rows)
+    return iter_db_sessions(source, chunk_rows)
+
+
+def level_accuracy(source: str) -> np.ndarray:
+    """Logged accuracy per level (index 1..3), the base of the counterfactual outcome model."""
+    if source.endswith(".csv"):
+        df = pd.read_csv(source, usecols=["difficulty", "correct"])
+        stats = df.groupby(_encode_levels(df["difficulty"]))["correct"].agg(["sum", "count"])
+        rows = [(level, s, n) for level, (s, n) in stats.iterrows()]
+    else:
+        conn = sqlite3.connect(source)
+        try:
+            rows = [(DIFFICULTY_SCORE.get(d, 0), s, n) for d, s, n in conn.execute(
+                "SELECT difficulty, TOTAL(correct), COUNT(*) FROM progress GROUP BY difficulty")]
+        finally:
+            conn.close()
+    accuracy = np.full(4, 0.5)
+    for level, correct, count in rows:
+        if 1 <= level <= 3 and count:
+            # Smoothed so that an unseen or always-right level stays inside (0, 1)
+            accuracy[level] = (correct + 1) / (count + 2)
+    return accuracy
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+def _logit(p):
+    return np.log(p / (1 - p))
+
+
+class _Totals:
+    """Additive outcome counters of one policy, merged across chunks."""
+
+    FIELDS = ("sessions", "steps", "agreed", "predicted_correct", "replayed_correct", "response_time",
+              "confidence", "moves_up", "moves_down", "reached_hard", "label_agreed", "labelled")
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, 0.0)
+        self.level_steps = np.zeros(4)
+        self.level_runs = np.zeros(4)
+        self.final_level = np.zeros(4)
+        self.trajectory_sum = np.zeros(TRAJECTORY_STEPS)
+        self.trajectory_count = np.zeros(TRAJECTORY_STEPS)
+
+    def merge(self, other: "_Totals"):
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in ("level_steps", "level_runs", "final_level", "trajectory_sum", "trajectory_count"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def report(self) -> dict:
+        steps = max(self.steps, 1)
+        counted = self.trajectory_count > 0
+        result = {
+            "sessions": int(self.sessions),
+            "steps": int(self.steps),
+            "agreement_with_log": self.agreed / steps,
+            "predicted_accuracy": self.predicted_correct / steps,
+            "replayed_accuracy": self.replayed_correct / steps,
+            "mean_response_time": self.response_time / steps,
+            "mean_confidence": self.confidence / steps,
+            "level_share": {LEVEL_NAMES[i]: self.level_steps[i] / steps for i in (1, 2, 3)},
+            "mean_time_in_level": {LEVEL_NAMES[i]: self.level_steps[i] / self.level_runs[i]
+                                   if self.level_runs[i] else 0.0 for i in (1, 2, 3)},
+            "moves_up_per_100": 100 * self.moves_up / steps,
+            "moves_down_per_100": 100 * self.moves_down / steps,
+            "reached_hard": self.reached_hard / max(self.sessions, 1),
+            "final_level_share": {LEVEL_NAMES[i]: self.final_level[i] / max(self.sessions, 1) for i in (1, 2, 3)},
+            "mean_level_by_step": (self.trajectory_sum[counted] / self.trajectory_count[counted]).round(4).tolist(),
+        }
+        if self.labelled:
+            result["label_agreement"] = self.label_agreed / self.labelled
+        return result
+
+
+def logged_expected_times(chunk: dict, rules) -> np.ndarray:
+    """
+    Mean expected time of each logged puzzle under rules: the operator-weighted
+    mean of its level's cell for the band it was served in, i.e. the session's
+    previous logged streak and confidence (1 and 50 at session start, or the
+    chunk's start_streak/start_confidence).
+    """
+    session = chunk["session"]
+    if not len(session):
+        return np.zeros(0)
+    first = np.r_[True, session[1:] != session[:-1]]
+    streak = np.ones(len(session), dtype=np.int64)
+    confidence = np.full(len(session), 50.0)
+    if "logged_streak" in chunk:
+        streak[1:], confidence[1:] = chunk["logged_streak"][:-1], chunk["logged_confidence"][:-1]
+    if "start_streak" in chunk:
+        streak[first], confidence[first] = chunk["start_streak"][first], chunk["start_confidence"][first]
+    else:
+        streak[first], confidence[first] = 1, 50.0
+    return rules.mean_expected_times(chunk["level"], streak, confidence)
+
+
+def replay_chunk(policy: _LoadedPolicy, chunk: dict, level_logit: np.ndarray, seed: int = 0) -> _Totals:
+    """
+    Re-drives every session of a chunk through one policy, all sessions in lockstep.
+
+    At each step the policy serves a level from its own state. Where that is
+    the logged level, the logged answer and response time are replayed as
+    they happened. Elsewhere the answer is drawn from the learner's estimated
+    chance at the served level (logged accuracy per level, shifted by the
+    session's own smoothed accuracy), and the response time is the logged one
+    rescaled from the logged puzzle's mean expected time (chunk
+    "logged_expected_time", see logged_expected_times) to the served puzzle's.
+    Confidence and the next level come from the policy's functions.
+    """
+    session = chunk["session"]
+    n_sessions = int(session[-1]) + 1 if len(session) else 0
+    totals = _Totals()
+    if not n_sessions:
+        return totals
+    lengths = np.bincount(session, minlength=n_sessions)
+
+    # Learner ability: smoothed own accuracy relative to what the logged levels predict
+    level_p = 1 / (1 + np.exp(-level_logit))
+    expected = np.bincount(session, level_p[chunk["level"]], n_sessions) / lengths
+    own = (np.bincount(session, chunk["correct"], n_sessions) + ABILITY_PRIOR * expected) / (lengths + ABILITY_PRIOR)
+    shift = _logit(np.clip(own, 1e-4, 1 - 1e-4)) - _logit(np.clip(expected, 1e-4, 1 - 1e-4))
+
+    # Sessions sorted longest first, so the sessions still answering at step t are a prefix
+    order = np.argsort(-lengths, kind="stable")
+    rank = np.empty(n_sessions, dtype=np.int64)
+    rank[order] = np.arange(n_sessions)
+    lengths, shift = lengths[order], shift[order]
+    starts = np.r_[0, np.cumsum(np.bincount(session, minlength=n_sessions))[:-1]]
+    step_of_row = np.arange(len(session)) - starts[session]
+    width = int(lengths[0])
+
+    def grid(values, fill=0):
+        out = np.full((n_sessions, width), fill, dtype=np.asarray(values).dtype)
+        out[rank[session], step_of_row] = values
+        return out
+
+    logged_level = grid(chunk["level"])
+    logged_correct = grid(chunk["correct"])
+    logged_time = grid(chunk["response_time"], 0.0)
+    speed = logged_time / grid(chunk["logged_expected_time"], 1.0)
+    labels = grid(_encode_levels(pd.Series(chunk["next_level"]))) if "next_level" in chunk else None
+
+    level = np.ones(n_sessions, dtype=np.int64)
+    streak = np.ones(n_sessions, dtype=np.int64)
+    confidence = np.full(n_sessions, 50.0)
+    if "start_streak" in chunk:
+        first = step_of_row == 0
+        level[rank[session[first]]] = chunk["level"][first]
+        streak[rank[session[first]]] = chunk["start_streak"][first]
+        confidence[rank[session[first]]] = chunk["start_confidence"][first]
+    reached_hard = level == 3
+
+    rng = np.random.default_rng(seed)
+    active_counts = np.searchsorted(-lengths, -np.arange(1, width + 1), side="right")
+    totals.sessions = n_sessions
+    totals.level_runs += np.bincount(level, minlength=4)
+
+    for t in range(width):
+        n = int(active_counts[t])
+        served = level[:n]
+        agreed = served == logged_level[:n, t]
+        p = 1 / (1 + np.exp(-(level_logit[served] + shift[:n])))
+        correct = np.where(agreed, logged_correct[:n, t], rng.random(n) < p).astype(np.int64)
+        expected_time = policy.rules.mean_expected_times(served, streak[:n], confidence[:n])
+        response_time = np.where(agreed, logged_time[:n, t], speed[:n, t] * expected_time)
+
+        scores = np.asarray(policy.confidence(correct, LEVEL_NAMES[served], response_time, streak[:n],
+                                              expected_time), dtype=np.float64)
+        batch = np.column_stack([served, correct, response_time, streak[:n], scores])
+        next_level, next_streak = policy.recommend(batch)
+        next_level = np.asarray(next_level, dtype=np.int64)
+
+        totals.steps += n
+        totals.agreed += int(agreed.sum())
+        totals.predicted_correct += float(p.sum())
+        totals.replayed_correct += int(correct.sum())
+        totals.response_time += float(response_time.sum())
+        totals.confidence += float(scores.sum())
+        totals.level_steps += np.bincount(served, minlength=4)
+        moved = next_level != served
+        totals.moves_up += int((next_level > served).sum())
+        totals.moves_down += int((next_level < served).sum())
+        if t + 1 < width:
+            # A run starts wherever a still-active session changes level
+            totals.level_runs += np.bincount(next_level[:int(active_counts[t + 1])][moved[:int(active_counts[t + 1])]],
+                                             minlength=4)
+        if t < TRAJECTORY_STEPS:
+            totals.trajectory_sum[t] += float(served.sum())
+            totals.trajectory_count[t] += n
+        if labels is not None:
+            labelled = labels[:n, t] > 0
+            totals.label_agreed += int((next_level[labelled] == labels[:n, t][labelled]).sum())
+            totals.labelled += int(labelled.sum())
+
+        level[:n], streak[:n], confidence[:n] = next_level, next_streak, scores
+        reached_hard[:n] |= next_level == 3
+
+    # The level each session would be served next
+    totals.final_level += np.bincount(level, minlength=4)
+    totals.reached_hard = int(reached_hard.sum())
+    return totals
+
+
+_worker_policies: List[_LoadedPolicy] = []
+
+
+def _init_worker(policies: List[ReplayPolicy]):
+    logging.disable(logging.INFO)
+    _worker_policies[:] = [_LoadedPolicy(policy) for policy in policies]
+
+
+def _replay_task(chunk: dict, level_logit: np.ndarray, seed: int) -> List[_Totals]:
+    return [replay_chunk(policy, chunk, level_logit, seed) for policy in _worker_policies]
+
+
+def run_replay(source: str, policies: List[ReplayPolicy], workers: int = os.cpu_count() or 1,
+               chunk_rows: int = 200_000, seed: int = 0) -> dict:
+    """
+    Replays every logged session of source (progress.db or a CSV) through each policy.
+
+    Chunks of whole sessions are streamed to a spawn process pool, at most
+    two per worker in flight, and every worker replays each chunk through
+    all policies, so the policies see identical learners and random draws.
+    Returns a JSON-serialisable report with per-policy outcome metrics.
+    """
+    start = time.perf_counter()
+    try:
+        level_logit = _logit(level_accuracy(source))
+        # Logged response times are relative to the puzzles the current rules served
+        logged_rules = load_puzzle_rules(DEFAULT_RULES_PATH)
+    except Exception as e:
+        logger.error(f"❌ Could not read replay source {source}: {e}")
+        raise MathsException("Failed to read replay source") from e
+
+    for policy in policies:
+        # Fail here with a clear error rather than in every worker's initializer
+        try:
+            _LoadedPolicy(policy)
+        except Exception as e:
+            logger.error(f"❌ Could not load policy {policy.name}: {e}")
+            raise MathsException(f"Failed to load replay policy '{policy.name}'") from e
+
+    totals = [_Totals() for _ in policies]
+    rows = 0
+    context = multiprocessing.get_context("spawn")
+    logger.info(f"⏪ Replaying {source} through {', '.join(p.name for p in policies)} on {workers} workers")
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(policies,)) as pool:
+            in_flight = []
+            for i, chunk in enumerate(iter_sessions(source, chunk_rows)):
+                rows += len(chunk["session"])
+                chunk["logged_expected_time"] = logged_expected_times(chunk, logged_rules)
+                in_flight.append(pool.submit(_replay_task, chunk, level_logit, seed + i))
+                while len(in_flight) >= 2 * workers:
+                    for total, part in zip(totals, in_flight.pop(0).result()):
+                        total.merge(part)
+            for future in in_flight:
+                for total, part in zip(totals, future.result()):
+                    total.merge(part)
+    except MathsException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Replay failed: {e}")
+        raise MathsException("Replay failed") from e
+
+    seconds = time.perf_counter() - start
+    logger.info(f"✅ Replayed {rows} answers x {len(policies)} policies in {seconds:.2f}s")
+    return {
+        "source": source,
+        "rows": rows,
+        "seconds": seconds,
+        "answers_per_second": rows * len(policies) / seconds if seconds else 0.0,
+        "policies": {policy.name: {"policy": asdict(policy), **total.report()}
+                     for policy, total in zip(policies, totals)},
+    }
+
+
+def compare(report: dict) -> pd.DataFrame:
+    """Headline metrics side by side, one column per policy."""
+    keys = ["agreement_with_log", "predicted_accuracy", "replayed_accuracy", "mean_response_time",
+            "mean_confidence", "moves_up_per_100", "moves_down_per_100", "reached_hard", "label_agreement"]
+    table = {}
+    for name, metrics in report["policies"].items():
+        column = {key: metrics[key] for key in keys if key in metrics}
+        column.update({f"share {level}": share for level, share in metrics["level_share"].items()})
+        column.update({f"time in {level}": steps for level, steps in metrics["mean_time_in_level"].items()})
+        table[name] = column
+    return pd.DataFrame(table)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Counterfactual replay of logged sessions through candidate policies.")
+    parser.add_argument("--source", default="progress.db", help="progress database or CSV")
+    parser.add_argument("--policy", action="append", dest="policies",
+                        help='"name" or "name:model=...,forest=...,table=...,rules=...,confidence=mod:fn,recommend=mod:fn"; '
+                             "repeat to compare (default: the current policy)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    policies = [ReplayPolicy.parse(spec) for spec in (args.policies or ["current"])]
+    report = run_replay(args.source, policies, args.workers, args.chunk_rows, args.seed)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(compare(report).round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import pickle
+import sqlite3
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+from logger import configure_logging, logger
+from exception import MathsException
+from forest_compiler import CompiledForest
+from puzzle_rules import load_puzzle_rules
+from tracker import DIFFICULTY_SCORE, PRAGMAS, ProgressTracker
+
+FEATURES = ["difficulty", "response_time", "correct", "streak", "confidence"]
+
+
+def _on_target(alias: str) -> str:
+    """A correct answer within its puzzle's expected time (the level's normal-band mean if not recorded)."""
+    return (f"{alias}.correct = 1 AND {alias}.response_time <= COALESCE({alias}.expected_time, "
+            f"CASE {alias}.difficulty WHEN 'Easy' THEN :easy WHEN 'Medium' THEN :medium ELSE :hard END)")
+
+
+# Labels come from outcomes, not from what the model served: every answer is
+# labelled with the level of the session's next answer that was correct within
+# the target time. A hit labels the answers from the session's previous hit up
+# to itself, so each answer is labelled once, as soon as its label is known.
+# The features are the answer as recommend_next_level saw it: the streak before
+# the answer is the row before it (1 at session start). Answers after a
+# session's last hit stay unlabelled until a hit follows.
+LABELLED_ROWS = f"""
+    WITH hits AS (
+        SELECT h.id, h.session_id, h.difficulty FROM progress h
+        WHERE h.id > :since_id AND {_on_target("h")}
+        ORDER BY h.id
+        LIMIT :limit
+    )
+    SELECT hits.id, p.difficulty, p.response_time, p.correct,
+           COALESCE((SELECT pp.streak FROM progress pp
+                     WHERE pp.session_id = p.session_id AND pp.id < p.id
+                     ORDER BY pp.id DESC LIMIT 1), 1) AS streak,
+           p.confidence, hits.difficulty AS next_level
+    FROM hits
+    LEFT JOIN progress p ON p.session_id = hits.session_id AND p.id < hits.id
+        AND p.id >= COALESCE((SELECT MAX(q.id) FROM progress q
+                              WHERE q.session_id = hits.session_id AND q.id < hits.id
+                                AND {_on_target("q")}), 0)
+    ORDER BY hits.id, p.id
+"""
+# Parameters of the new trees that are not tree hyperparameters
+FIT_PARAMS = ("n_estimators", "n_jobs", "random_state", "warm_start", "oob_score", "verbose")
+
+
+def _read_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"last_id": 0, "version": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: dict):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def iter_labelled_chunks(db_name: str, since_id: int,
+                         chunk_rows: int) -> Iterator[Tuple[pd.DataFrame, int, bool]]:
+    """
+    (features + next_level, last hit id, full) for the answers labelled by hits newer
+    than since_id, chunk_rows hits at a time (see LABELLED_ROWS).
+
+    full is False for the trailing chunk, which had fewer than chunk_rows hits to read.
+    """
+    ProgressTracker(db_name)  # make sure the expected_time column exists
+    rules = load_puzzle_rules()
+    easy, medium, hard = rules.mean_expected_times(np.arange(1, 4), np.ones(3, dtype=np.int64), np.full(3, 50.0))
+    conn = sqlite3.connect(db_name)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    try:
+        last_id = since_id
+        while True:
+            rows = conn.execute(LABELLED_ROWS, {"since_id": last_id, "limit": chunk_rows,
+                                                "easy": easy, "medium": medium, "hard": hard}).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            df = pd.DataFrame(rows, columns=["id"] + FEATURES + ["next_level"])
+            full = df["id"].nunique() == chunk_rows
+            df["difficulty"] = df["difficulty"].map(DIFFICULTY_SCORE)
+            df["next_level"] = df["next_level"].map(DIFFICULTY_SCORE)
+            yield df.dropna(subset=["difficulty", "next_level"]), last_id, full
+    finally:
+        conn.close()
+
+
+def retrain(db_name: str = "progress.db",
+            model_path: str = "artifacts/level_recommender_model.pkl",
+            forest_path: str = "artifacts/level_recommender_forest",
+            versions_dir: str = "artifacts/versions",
+            checkpoint_path: str = "artifacts/retrain_checkpoint.json",
+            chunk_rows: int = 100_000, trees_per_chunk: int = 10, max_trees: int = 200,
+            min_rows: int = 1_000, n_jobs: int = -1) -> Optional[dict]:
+    """
+    Grows the serving forest with trees fitted on progress rows since the checkpoint.
+
+    Answers are labelled by outcome (see LABELLED_ROWS) and read in chunks of
+    at most chunk_rows hits. Each chunk gets trees_per_chunk new trees with
+    the base forest's hyperparameters, fitted on all cores (warm-started tree
+    additions), so cost follows the new rows, not the table. The base trees,
+    those of the model before its first retrain, are always kept; of the
+    retrained trees only the newest max_trees are. A chunk with fewer than min_rows labelled
+    rows, or missing a level, is merged into the next chunk; if the two
+    together still cannot be fitted they are skipped, so the checkpoint
+    always moves past full chunks. Only the trailing partial chunk is left
+    for the next run. The result is published as artifacts/versions/vNNNN
+    and to the serving paths, where ModelRegistry hot-swaps it. Returns the
+    version metadata, or None if there was not enough new data.
+    """
+    start = time.perf_counter()
+    checkpoint = _read_checkpoint(checkpoint_path)
+    try:
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+    except Exception as e:
+        logger.error(f"❌ Could not load base model {model_path}: {e}")
+        raise MathsException("Failed to load base model for retraining") from e
+
+    classes = np.asarray(model.classes_)
+    tree_params = {k: v for k, v in model.get_params().items() if k not in FIT_PARAMS}
+    # The curated trees the first retrain started from; retrained trees are appended after them
+    base_trees = checkpoint.get("base_trees", len(model.estimators_))
+    trained_rows, last_id, new_trees, skipped_rows = 0, checkpoint["last_id"], 0, 0
+    carry = None  # a full chunk too small or narrow to fit on, merged into the next one
+
+    try:
+        for chunk, chunk_last_id, full in iter_labelled_chunks(db_name, checkpoint["last_id"], chunk_rows):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            if len(chunk) < min_rows or not np.isin(classes, chunk["next_level"].unique()).all():
+                if not full:
+                    break  # the trailing partial chunk waits for more rows
+                if carry is None:
+                    carry = chunk
+                    continue
+                # Two full chunks still cannot be fitted: skip them rather than stall the checkpoint
+                skipped_rows += len(chunk)
+                last_id, carry = chunk_last_id, None
+                logger.warning(
+                    "⚠️ Skipped %d labelled rows up to id %d: fewer than %d rows or a level missing",
+                    len(chunk), last_id, min_rows
+                )
+                continue
+
+            carry = None
+            part = type(model)(
+                **tree_params, n_estimators=trees_per_chunk,
+                random_state=(checkpoint["version"] * 7919 + chunk_last_id) % 2**32, n_jobs=n_jobs,
+            )
+            part.fit(chunk[FEATURES], chunk["next_level"].astype(classes.dtype))
+            retrained = list(model.estimators_[base_trees:]) + list(part.estimators_)
+            model.estimators_ = list(model.estimators_[:base_trees]) + retrained[-max_trees:]
+            model.n_estimators = len(model.estimators_)
+            trained_rows += len(chunk)
+            new_trees += trees_per_chunk
+            last_id = chunk_last_id
+            logger.info("🌲 Added %d trees from %d rows (up to id %d)", trees_per_chunk, len(chunk), last_id)
+    except Exception as e:
+        logger.error(f"❌ Retraining failed: {e}")
+        raise MathsException("Retraining failed") from e
+
+    if not trained_rows:
+        if last_id > checkpoint["last_id"]:
+            _write_json(checkpoint_path, {"last_id": last_id, "version": checkpoint["version"],
+                                          "base_trees": base_trees})
+        logger.info(f"No retrain: fewer than {min_rows} new labelled rows since id {checkpoint['last_id']}")
+        return None
+
+    version = checkpoint["version"] + 1
+    meta = {
+        "version": version,
+        "parent_version": checkpoint["version"],
+        "since_id": checkpoint["last_id"],
+        "last_id": last_id,
+        "trained_rows": trained_rows,
+        "skipped_rows": skipped_rows,
+        "new_trees": new_trees,
+        "base_trees": base_trees,
+        "n_trees": model.n_estimators,
+        "seconds": time.perf_counter() - start,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    publish(model, meta, model_path, forest_path, versions_dir)
+    _write_json(checkpoint_path, {"last_id": last_id, "version": version, "base_trees": base_trees})
+    logger.info(
+        f"✅ Model v{version:04d}: {trained_rows} new rows, {model.n_estimators} trees, {meta['seconds']:.2f}s"
+    )
+    return meta
+
+
+def publish(model, meta: dict, model_path: str, forest_path: str, versions_dir: str):
+    """Writes the versioned artifact, then swaps the serving pickle and compiled forest in place."""
+    try:
+        forest = CompiledForest.from_model(model)
+        version_dir = os.path.join(versions_dir, f"v{meta['version']:04d}")
+        os.makedirs(version_dir, exist_ok=True)
+        with open(os.path.join(version_dir, "model.pkl"), "wb") as f:
+            pickle.dump(model, f)
+        forest.save(os.path.join(version_dir, "forest"))
+        _write_json(os.path.join(version_dir, "meta.json"), meta)
+
+        # The registry serves the forest once its meta.json names the new version
+        with open(model_path + ".tmp", "wb") as f:
+            pickle.dump(model, f)
+        os.replace(model_path + ".tmp", model_path)
+        forest.save(forest_path)
+    except Exception as e:
+        logger.error(f"❌ Failed to publish model v{meta['version']}: {e}")
+        raise MathsException("Failed to publish retrained model") from e
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Incremental retraining from progress.db.")
+    parser.add_argument("--db", default="progress.db")
+    parser.add_argument("--model", default="artifacts/level_recommender_model.pkl")
+    parser.add_argument("--forest", default="artifacts/level_recommender_forest")
+    parser.add_argument("--versions-dir", default="artifacts/versions")
+    parser.add_argument("--checkpoint", default="artifacts/retrain_checkpoint.json")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--trees-per-chunk", type=int, default=10)
+    parser.add_argument("--max-trees", type=int, default=200, help="retrained trees kept besides the base trees")
+    parser.add_argument("--min-rows", type=int, default=1_000)
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    retrain(args.db, args.model, args.forest, args.versions_dir, args.checkpoint,
+            args.chunk_rows, args.trees_per_chunk, args.max_trees, args.min_rows)
+
+
+if __name__ == "__main__":
+    main()
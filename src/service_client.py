@@ -0,0 +1,60 @@
+import os
+from typing import Optional, Union
+from logger import logger
+from exception import MathsException
+from learning_service import LearningService, SessionNotFound, get_service
+
+
+class HttpLearningClient:
+    """
+    LearningService over HTTP, with the same method names and return values.
+
+    Lets the Streamlit app run against a shared `python src/api.py` process
+    instead of loading the model and database in every UI process.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        import requests  # only remote clients pay for it
+
+        self._http = requests.Session()
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        import requests
+
+        try:
+            response = self._http.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            logger.error(f"❌ Learning service unreachable at {self.base_url}: {e}")
+            raise MathsException("Learning service unavailable") from e
+        if response.status_code == 404:
+            raise SessionNotFound(path)
+        if response.status_code >= 400:
+            raise MathsException(response.json().get("detail", response.text))
+        return response.json()
+
+    def create_session(self) -> dict:
+        return self._request("POST", "/sessions")
+
+    def current_puzzle(self, session_id: str) -> dict:
+        return self._request("GET", f"/sessions/{session_id}/puzzle")
+
+    def next_puzzle(self, session_id: str) -> dict:
+        return self._request("POST", f"/sessions/{session_id}/puzzle")
+
+    def submit_answer(self, session_id: str, answer: str, response_time: Optional[float] = None) -> dict:
+        return self._request("POST", f"/sessions/{session_id}/answer",
+                             json={"answer": answer, "response_time": response_time})
+
+    def summary(self, session_id: str) -> dict:
+        return self._request("GET", f"/sessions/{session_id}/summary")
+
+    def progress(self, session_id: str, max_points: int = 200) -> dict:
+        return self._request("GET", f"/sessions/{session_id}/progress", params={"max_points": max_points})
+
+
+def get_client() -> Union[LearningService, HttpLearningClient]:
+    """HTTP client when MATH_API_URL is set, otherwise the in-process service."""
+    base_url = os.getenv("MATH_API_URL")
+    return HttpLearningClient(base_url) if base_url else get_service()
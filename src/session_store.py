@@ -0,0 +1,204 @@
+import atexit
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+from logger import logger
+from exception import MathsException
+from tracker import POOL
+
+CREATE_SESSION_STATE = """
+    CREATE TABLE IF NOT EXISTS session_state (
+        session_id TEXT PRIMARY KEY,
+        difficulty TEXT,
+        recommended_level TEXT,
+        streak INTEGER,
+        confidence REAL,
+        question TEXT,
+        answer REAL,
+        expected_time REAL,
+        issued_at REAL,
+        answered INTEGER,
+        saved_at REAL
+    )
+"""
+
+UPSERT_SESSION_STATE = """
+    INSERT OR REPLACE INTO session_state VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_SESSION_STATE = """
+    SELECT session_id, difficulty, recommended_level, streak, confidence, question, answer,
+           expected_time, issued_at, answered
+    FROM session_state WHERE session_id = ?
+"""
+
+
+class SessionState:
+    """
+    One learner's live state: level, streak, confidence and the open puzzle.
+
+    A __slots__ record of plain attributes (~400 bytes with its store entry,
+    see benchmarks/bench_session_store.py) so a process can hold 100k+ idle
+    sessions. Level strings are the shared "Easy"/"Medium"/"Hard" constants.
+    """
+
+    __slots__ = ("session_id", "difficulty", "recommended_level", "streak", "confidence",
+                 "question", "answer", "expected_time", "issued_at", "answered", "last_seen")
+
+    def __init__(self, session_id: str, difficulty: str = "Easy", recommended_level: str = "Easy",
+                 streak: int = 1, confidence: float = 50.0, question: Optional[str] = None,
+                 answer: float = 0.0, expected_time: float = 0.0, issued_at: float = 0.0,
+                 answered: bool = True):
+        self.session_id = session_id
+        self.difficulty = difficulty
+        self.recommended_level = recommended_level
+        self.streak = streak
+        self.confidence = confidence
+        self.question = question
+        self.answer = answer
+        self.expected_time = expected_time
+        self.issued_at = issued_at
+        self.answered = answered
+        self.last_seen = time.monotonic()
+
+    @property
+    def puzzle(self) -> Optional[Tuple[str, float, float]]:
+        """Open or last puzzle as (question, answer, expected time)."""
+        return None if self.question is None else (self.question, self.answer, self.expected_time)
+
+    @puzzle.setter
+    def puzzle(self, puzzle: Tuple[str, float, float]):
+        self.question, self.answer, self.expected_time = puzzle
+
+    def to_row(self) -> tuple:
+        return (self.session_id, self.difficulty, self.recommended_level, self.streak, self.confidence,
+                self.question, self.answer, self.expected_time, self.issued_at, int(self.answered), time.time())
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "SessionState":
+        state = cls(*row[:9], answered=bool(row[9]))
+        # Share the level constants instead of holding one string per session
+        state.difficulty = _LEVELS.get(state.difficulty, state.difficulty)
+        state.recommended_level = _LEVELS.get(state.recommended_level, state.recommended_level)
+        return state
+
+
+_LEVELS = {level: level for level in ("Easy", "Medium", "Hard")}
+
+
+class SessionStore:
+    """
+    Session states by id with LRU and idle-TTL eviction.
+
+    Lookups are one OrderedDict access plus a move to the end, so the least
+    recently used session is always first and expiry only scans sessions
+    that are actually expired. With db_name set, evicted sessions are
+    snapshotted to a session_state table in that database and restored on
+    their next lookup. Live sessions are also written at exit, so learners
+    survive a restart, and a session evicted by one worker process can be
+    picked up by another. Per-session locks are striped (lock_for) rather
+    than stored on every record.
+    """
+
+    LOCK_STRIPES = 256
+
+    def __init__(self, max_sessions: int = 100_000, ttl_seconds: float = 3600.0,
+                 db_name: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.db_name = db_name
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+        if db_name is not None:
+            try:
+                with POOL.connection(db_name) as conn, conn:
+                    conn.execute(CREATE_SESSION_STATE)
+            except Exception as e:
+                logger.error(f"❌ Failed to create session_state table: {e}")
+                raise MathsException("Failed to initialize session store") from e
+            atexit.register(self.snapshot_all)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def lock_for(self, session_id: str) -> threading.Lock:
+        """Lock serialising updates to one session (shared with ~1/256 of the others)."""
+        return self._stripes[zlib.crc32(session_id.encode()) % self.LOCK_STRIPES]
+
+    def add(self, state: SessionState):
+        with self._lock:
+            self._sessions[state.session_id] = state
+            evicted = self._evict_locked(time.monotonic())
+        self._snapshot(evicted)
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        """The live state, restored from the snapshot table if it was evicted, else None."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+                state.last_seen = now
+            evicted = self._evict_locked(now)
+        if evicted:
+            self._snapshot(evicted)
+        if state is None and self.db_name is not None:
+            state = self._restore(session_id)
+        return state
+
+    def evict_expired(self) -> int:
+        """Drops (and snapshots) sessions idle longer than ttl_seconds; returns how many."""
+        with self._lock:
+            evicted = self._evict_locked(time.monotonic())
+        self._snapshot(evicted)
+        return len(evicted)
+
+    def _evict_locked(self, now: float) -> List[SessionState]:
+        evicted = []
+        sessions = self._sessions
+        while sessions:
+            if len(sessions) <= self.max_sessions:
+                oldest = sessions[next(iter(sessions))]
+                if now - oldest.last_seen <= self.ttl_seconds:
+                    break
+            evicted.append(sessions.popitem(last=False)[1])
+        return evicted
+
+    def _snapshot(self, states: Iterable[SessionState]):
+        rows = [state.to_row() for state in states]
+        if not rows or self.db_name is None:
+            return
+        try:
+            with POOL.connection(self.db_name) as conn, conn:
+                conn.executemany(UPSERT_SESSION_STATE, rows)
+            logger.debug("Snapshotted %d session states", len(rows))
+        except Exception as e:
+            logger.error(f"❌ Session snapshot failed: {e}")
+
+    def _restore(self, session_id: str) -> Optional[SessionState]:
+        try:
+            with POOL.connection(self.db_name) as conn:
+                row = conn.execute(SELECT_SESSION_STATE, (session_id,)).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Session restore failed: {e}")
+            raise MathsException("Failed to restore session state") from e
+        if row is None:
+            return None
+        state = SessionState.from_row(row)
+        with self._lock:
+            # Another thread may have restored it first
+            state = self._sessions.setdefault(session_id, state)
+            self._sessions.move_to_end(session_id)
+            evicted = self._evict_locked(time.monotonic())
+        self._snapshot(evicted)
+        return state
+
+    def snapshot_all(self):
+        """Writes every live session to the snapshot table (run at exit)."""
+        with self._lock:
+            states = list(self._sessions.values())
+        self._snapshot(states)
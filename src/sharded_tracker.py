@@ -0,0 +1,251 @@
+import argparse
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, TypeVar
+from logger import configure_logging, logger
+from exception import MathsException
+from tracker import PRAGMAS, ProgressTracker
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar("T")
+
+SPLIT_COLUMNS = "id, session_id, timestamp, difficulty, correct, response_time, streak, confidence, expected_time"
+
+
+def shard_paths(db_name: str, shards: int) -> List[str]:
+    """Shard files of db_name: progress.db with 4 shards is progress.s00-of-04.db … progress.s03-of-04.db."""
+    root, ext = os.path.splitext(db_name)
+    return [f"{root}.s{i:02d}-of-{shards:02d}{ext or '.db'}" for i in range(shards)]
+
+
+def shard_index(session_id: str, shards: int) -> int:
+    """Stable across processes and restarts (unlike hash(), which is salted per interpreter)."""
+    return zlib.crc32(session_id.encode()) % shards
+
+
+class ShardedProgressTracker:
+    """
+    ProgressTracker spread over N SQLite files by session.
+
+    Each session_id hashes to one shard, which holds all of that session's
+    rows and its session_stats. Per-session calls are routed to that shard's
+    ProgressTracker, so sessions on different shards never wait for the same
+    write lock. Global reports and exports fan out to every shard on a
+    thread pool (fan_out, query) and merge the results; ids are only unique
+    within a shard, so merged rows carry a `shard` column.
+    """
+
+    calculate_confidence = staticmethod(ProgressTracker.calculate_confidence)
+    calculate_confidence_many = staticmethod(ProgressTracker.calculate_confidence_many)
+
+    def __init__(self, db_name: str = "progress.db", shards: int = 4, write_behind: bool = False,
+                 batch_size: int = 100, flush_interval_ms: float = 50.0):
+        if shards < 1:
+            raise MathsException("Shard count must be at least 1")
+        self.db_name = db_name
+        self.paths = shard_paths(db_name, shards)
+        self.trackers = [ProgressTracker(path, write_behind, batch_size, flush_interval_ms) for path in self.paths]
+        self._executor = ThreadPoolExecutor(max_workers=shards, thread_name_prefix="shard")
+
+    @property
+    def shards(self) -> int:
+        return len(self.trackers)
+
+    def shard(self, session_id: str) -> ProgressTracker:
+        return self.trackers[shard_index(session_id, len(self.trackers))]
+
+    # ------------------------------------------------------------------
+    # Per-session calls, routed to one shard
+    # ------------------------------------------------------------------
+    def log_progress(self, session_id: str, difficulty: str, correct: bool,
+                     response_time: float, streak: int, confidence: float,
+                     expected_time: Optional[float] = None):
+        self.shard(session_id).log_progress(
+            session_id, difficulty, correct, response_time, streak, confidence, expected_time
+        )
+
+    def get_progress(self, session_id: str) -> "pd.DataFrame":
+        return self.shard(session_id).get_progress(session_id)
+
+    def get_progress_since(self, session_id: str, last_id: int = 0) -> "pd.DataFrame":
+        return self.shard(session_id).get_progress_since(session_id, last_id)
+
+    def get_session_summary(self, session_id: str) -> dict:
+        return self.shard(session_id).get_session_summary(session_id)
+
+    def get_progress_series(self, session_id: str, max_points: int = 200) -> "pd.DataFrame":
+        return self.shard(session_id).get_progress_series(session_id, max_points)
+
+    def flush(self):
+        self.fan_out(lambda tracker: tracker.flush())
+
+    # ------------------------------------------------------------------
+    # Fan-out across shards
+    # ------------------------------------------------------------------
+    def fan_out(self, fn: Callable[[ProgressTracker], T]) -> List[T]:
+        """fn(tracker) on every shard in parallel; results in shard order."""
+        try:
+            return list(self._executor.map(fn, self.trackers))
+        except MathsException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Shard fan-out failed: {e}")
+            raise MathsException("Failed to query progress shards") from e
+
+    def query(self, sql: str, params: tuple = ()) -> "pd.DataFrame":
+        """Runs one read query on every shard and concatenates the rows, tagged with their shard."""
+        import pandas as pd
+
+        def run(tracker: ProgressTracker) -> "pd.DataFrame":
+            tracker.flush()
+            with tracker._connection() as conn:
+                return pd.read_sql_query(sql, conn, params=params)
+
+        frames = self.fan_out(run)
+        for i, frame in enumerate(frames):
+            frame.insert(0, "shard", i)
+        return pd.concat(frames, ignore_index=True)
+
+    def global_summary(self) -> dict:
+        """Sessions, attempts, accuracy and mean response time over all shards (from session_stats)."""
+        totals = self.query(
+            "SELECT COUNT(*) AS sessions, TOTAL(attempts) AS attempts, TOTAL(correct_count) AS correct, "
+            "TOTAL(response_time_sum) AS time_sum FROM session_stats"
+        ).sum()
+        attempts = totals["attempts"]
+        return {
+            "sessions": int(totals["sessions"]),
+            "attempts": int(attempts),
+            "correct": int(totals["correct"]),
+            "accuracy": totals["correct"] / attempts * 100 if attempts else 0.0,
+            "avg_response_time": totals["time_sum"] / attempts if attempts else 0.0,
+        }
+
+    def export_parquet(self, output_dir: str, chunk_rows: int = 500_000) -> int:
+        """progress_io.export_parquet of every shard in parallel, into output_dir/shard=NN/."""
+        from progress_io import export_parquet
+
+        self.flush()
+        counts = self.fan_out(lambda tracker: export_parquet(
+            tracker.db_name, os.path.join(output_dir, f"shard={self.trackers.index(tracker):02d}"), chunk_rows
+        ))
+        return sum(counts)
+
+
+def make_tracker(db_name: str = "progress.db", shards: int = 1, write_behind: bool = False):
+    """A plain ProgressTracker for one shard, otherwise a ShardedProgressTracker."""
+    if shards > 1:
+        return ShardedProgressTracker(db_name, shards, write_behind=write_behind)
+    return ProgressTracker(db_name, write_behind=write_behind)
+
+
+def split_database(source: str, shards: int, db_name: Optional[str] = None, chunk_rows: int = 200_000,
+                   since_id: Optional[int] = None) -> List[int]:
+    """
+    Copies the progress rows of an existing database into shard files.
+
+    Rows keep their ids and go to the shard of their session_id; the shards'
+    session_stats are built by their insert trigger. The source is only
+    read, so the app can keep running on it while the bulk of the rows is
+    copied, but rows it writes meanwhile are not in the shards. Catch them
+    up with since_id set to the last id copied (logged at the end of each
+    pass): that pass only copies newer rows, into shards that may already
+    hold rows, and skips ids already there. Stop writes to the source
+    before the final catch-up pass, then switch. Without since_id, refuses
+    to write into shards that already hold rows. Returns rows copied per shard.
+    """
+    start = time.perf_counter()
+    trackers = [ProgressTracker(path) for path in shard_paths(db_name or source, shards)]
+    with ExitStack() as stack:
+        targets = [stack.enter_context(tracker._connection()) for tracker in trackers]
+        counts, last_id = _copy_into_shards(source, trackers, targets, chunk_rows, since_id)
+
+    logger.info(
+        f"🔀 Split {sum(counts)} progress rows from {source} into {shards} shards "
+        f"({', '.join(map(str, counts))}) in {time.perf_counter() - start:.2f}s; "
+        f"catch up later writes with --since-id {last_id}"
+    )
+    return counts
+
+
+def _copy_into_shards(source: str, trackers: List[ProgressTracker], targets: List[sqlite3.Connection],
+                      chunk_rows: int, since_id: Optional[int]) -> Tuple[List[int], int]:
+    """split_database's copy loop; returns rows copied per shard and the last id read."""
+    shards = len(trackers)
+    if since_id is None:
+        for tracker, conn in zip(trackers, targets):
+            if conn.execute("SELECT 1 FROM progress LIMIT 1").fetchone():
+                raise MathsException(f"Shard {tracker.db_name} already has progress rows; not splitting into it")
+
+    counts = [0] * shards
+    conn = sqlite3.connect(source)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    try:
+        # A source that predates the expected_time column is read with NULLs in its place
+        source_columns = {row[1] for row in conn.execute("PRAGMA table_info(progress)")}
+        select = ", ".join(c if c in source_columns else f"NULL AS {c}" for c in SPLIT_COLUMNS.split(", "))
+        last_id = since_id or 0
+        while True:
+            rows = conn.execute(
+                f"SELECT {select} FROM progress WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_rows)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            buckets = [[] for _ in range(shards)]
+            for row in rows:
+                buckets[shard_index(row[1] or "", shards)].append(row)
+            for i, bucket in enumerate(buckets):
+                if bucket:
+                    with targets[i]:
+                        # OR IGNORE: a catch-up pass may overlap rows already copied (the trigger
+                        # does not fire for ignored rows, so session_stats counts them once)
+                        cursor = targets[i].executemany(f"INSERT OR IGNORE INTO progress ({SPLIT_COLUMNS}) "
+                                                        f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", bucket)
+                    counts[i] += cursor.rowcount
+            logger.debug("Split progress rows up to id %d", last_id)
+    except Exception as e:
+        logger.error(f"❌ Splitting {source} into {shards} shards failed: {e}")
+        raise MathsException("Failed to split progress database") from e
+    finally:
+        conn.close()
+    return counts, last_id
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Sharded progress databases.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    split = sub.add_parser("split", help="copy an existing progress.db into shard files")
+    split.add_argument("source")
+    split.add_argument("--shards", type=int, required=True)
+    split.add_argument("--db", help="base name of the shard files (default: the source name)")
+    split.add_argument("--chunk-rows", type=int, default=200_000)
+    split.add_argument("--since-id", type=int, default=None,
+                       help="catch-up pass: copy only rows above this id into the existing shards")
+    summary = sub.add_parser("summary", help="global totals across shards")
+    summary.add_argument("--db", default="progress.db")
+    summary.add_argument("--shards", type=int, required=True)
+    export = sub.add_parser("export", help="Parquet export of every shard")
+    export.add_argument("output_dir")
+    export.add_argument("--db", default="progress.db")
+    export.add_argument("--shards", type=int, required=True)
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.command == "split":
+        split_database(args.source, args.shards, args.db, args.chunk_rows, args.since_id)
+    elif args.command == "summary":
+        print(ShardedProgressTracker(args.db, args.shards).global_summary())
+    else:
+        ShardedProgressTracker(args.db, args.shards).export_parquet(args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
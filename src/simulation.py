@@ -0,0 +1,233 @@
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+import numpy as np
+import psutil
+from logger import configure_logging, logger
+from exception import MathsException
+
+STAGES = ("generate", "confidence", "recommend", "log", "read")
+
+
+@dataclass
+class LearnerProfile:
+    """
+    Distributions synthetic learners are drawn from.
+
+    skill ~ Beta(skill_alpha, skill_beta) is the chance of answering an Easy
+    puzzle correctly; each level above Easy subtracts difficulty_penalty.
+    Response time is lognormal around expected_time * speed, with speed ~
+    LogNormal(0, speed_sigma) per learner and time_sigma per answer.
+    """
+
+    skill_alpha: float = 4.0
+    skill_beta: float = 2.0
+    difficulty_penalty: float = 0.15
+    speed_sigma: float = 0.3
+    time_sigma: float = 0.35
+
+
+@dataclass
+class SimulationConfig:
+    learners: int = 200
+    questions: int = 30
+    workers: int = os.cpu_count() or 1
+    db_name: str = "simulation.db"
+    seed: int = 0
+    write_behind: bool = False
+    profile: LearnerProfile = field(default_factory=LearnerProfile)
+
+
+def _simulate_chunk(config: SimulationConfig, learner_ids: List[int]) -> dict:
+    """Runs a slice of learners in one worker process; returns raw stage latencies."""
+    logging.disable(logging.INFO)
+    setup_start = time.perf_counter()
+    from adaptive_engine import AdaptiveEngine
+    from puzzle_generator import PuzzleGenerator
+    from tracker import ProgressTracker
+
+    generator = PuzzleGenerator()
+    engine = AdaptiveEngine()
+    tracker = ProgressTracker(config.db_name, write_behind=config.write_behind)
+    engine.model  # load outside the timed loop
+    profile = config.profile
+    penalty = {"Easy": 0.0, "Medium": profile.difficulty_penalty, "Hard": 2 * profile.difficulty_penalty}
+
+    latencies = {stage: [] for stage in STAGES}
+    clock = time.perf_counter
+    answers = 0
+    start = clock()
+    setup_seconds = start - setup_start
+    for learner_id in learner_ids:
+        rng = np.random.default_rng([config.seed, learner_id])
+        skill = rng.beta(profile.skill_alpha, profile.skill_beta)
+        speed = rng.lognormal(0.0, profile.speed_sigma)
+        session_id = f"sim_{config.seed}_{learner_id:08x}"
+        level, streak, confidence = "Easy", 1, 50.0
+
+        for _ in range(config.questions):
+            t0 = clock()
+            _, _, expected_time = generator.generate_puzzle(level, streak, confidence)
+            t1 = clock()
+            correct = bool(rng.random() < min(0.98, max(0.02, skill - penalty[level])))
+            response_time = float(expected_time * speed * rng.lognormal(0.0, profile.time_sigma))
+            confidence = tracker.calculate_confidence(correct, level, response_time, streak, expected_time)
+            t2 = clock()
+            next_level, streak = engine.recommend_next_level(level, correct, response_time, streak, confidence)
+            t3 = clock()
+            tracker.log_progress(session_id, level, correct, response_time, streak, confidence, expected_time)
+            t4 = clock()
+            tracker.get_session_summary(session_id)
+            tracker.get_progress_series(session_id)
+            t5 = clock()
+
+            for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                latencies[stage].append(seconds)
+            level = next_level
+            answers += 1
+
+    tracker.flush()
+    return {
+        "answers": answers,
+        "busy_seconds": clock() - start,
+        "setup_seconds": setup_seconds,
+        "latencies": {stage: np.asarray(values, dtype=np.float32) for stage, values in latencies.items()},
+        "rss_bytes": psutil.Process().memory_info().rss,
+    }
+
+
+def _db_bytes(db_name: str) -> int:
+    return sum(os.path.getsize(db_name + suffix) for suffix in ("", "-wal") if os.path.exists(db_name + suffix))
+
+
+def run_simulation(config: SimulationConfig) -> dict:
+    """
+    Simulates config.learners learners across a process pool against one progress DB.
+
+    Returns a JSON-serialisable report: steady-state throughput (summed over
+    workers, excluding process start and model load), per-stage p50/p95/p99
+    in milliseconds, DB growth and per-worker resident memory.
+    """
+    workers = max(1, min(config.workers, config.learners))
+    chunks = [list(range(i, config.learners, workers)) for i in range(workers)]
+    db_before = _db_bytes(config.db_name)
+
+    logger.info(f"🏃 Simulating {config.learners} learners x {config.questions} questions on {workers} workers")
+    # spawn: workers must not inherit the parent's pooled SQLite connections
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with context.Pool(workers) as pool:
+        results = pool.starmap(_simulate_chunk, [(config, chunk) for chunk in chunks])
+    wall = time.perf_counter() - start
+
+    answers = sum(r["answers"] for r in results)
+    stages = {}
+    for stage in STAGES:
+        ms = np.concatenate([r["latencies"][stage] for r in results]).astype(np.float64) * 1000
+        stages[stage] = {
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+        }
+    db_after = _db_bytes(config.db_name)
+
+    return {
+        "config": asdict(config),
+        "answers": answers,
+        "wall_seconds": wall,
+        "worker_setup_seconds": max(r["setup_seconds"] for r in results),
+        "answers_per_second": sum(r["answers"] / r["busy_seconds"] for r in results if r["busy_seconds"] > 0),
+        "stages": stages,
+        "db_growth_bytes": db_after - db_before,
+        "db_bytes_per_answer": (db_after - db_before) / answers if answers else 0.0,
+        "worker_rss_mb": max(r["rss_bytes"] for r in results) / 2**20,
+    }
+
+
+# (report key path, higher is better)
+BASELINE_METRICS = [(("answers_per_second",), True)] + [
+    (("stages", stage, q), False) for stage in STAGES for q in ("p50_ms", "p99_ms")
+]
+
+
+# Config fields that must match for a baseline comparison to mean anything
+BASELINE_CONFIG = ("learners", "questions", "workers", "seed", "write_behind", "profile")
+
+
+def load_baseline(path: str) -> dict:
+    """A report recorded with bench_simulation.py --update-baseline."""
+    if not os.path.exists(path):
+        logger.error(f"❌ No simulation baseline at {path}")
+        raise MathsException(
+            f"No simulation baseline at {path}; record one with benchmarks/bench_simulation.py --update-baseline"
+        )
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = 0.2) -> List[str]:
+    """Human-readable regressions of report against baseline beyond the relative tolerance."""
+    differing = [key for key in BASELINE_CONFIG if report["config"].get(key) != baseline["config"].get(key)]
+    if differing:
+        logger.warning(f"⚠️ Baseline was recorded with a different {', '.join(differing)}; the comparison is rough")
+    regressions = []
+    for path, higher_is_better in BASELINE_METRICS:
+        current, reference = report, baseline
+        for key in path:
+            current, reference = current[key], reference[key]
+        if reference <= 0 or not math.isfinite(reference):
+            continue
+        change = (current - reference) / reference
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{'.'.join(path)}: {reference:.4g} -> {current:.4g} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Headless simulation of the adaptive learning loop.")
+    parser.add_argument("--learners", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--db", default="simulation.db")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--skill", type=float, nargs=2, default=[4.0, 2.0], metavar=("ALPHA", "BETA"))
+    parser.add_argument("--speed-sigma", type=float, default=0.3)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this baseline report; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    config = SimulationConfig(
+        learners=args.learners, questions=args.questions, workers=args.workers, db_name=args.db,
+        seed=args.seed, write_behind=args.write_behind,
+        profile=LearnerProfile(skill_alpha=args.skill[0], skill_beta=args.skill[1], speed_sigma=args.speed_sigma),
+    )
+    report = run_simulation(config)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, load_baseline(args.baseline), args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%} of {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"Within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
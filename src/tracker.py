@@ -1,105 +1,625 @@
+import atexit
+import queue
 import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+import numpy as np
 from logger import logger
 from exception import MathsException
+from metrics import timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Applied to every pooled connection. WAL lets readers run alongside the single
+# writer, and synchronous=NORMAL is durable across app crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+CREATE_PROGRESS = """
+    CREATE TABLE IF NOT EXISTS progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        timestamp TEXT,
+        difficulty TEXT,
+        correct INTEGER,
+        response_time REAL,
+        streak INTEGER,
+        confidence REAL,
+        expected_time REAL
+    )
+"""
+
+# Serves per-session reads, and get_progress_since range scans, without a table scan
+CREATE_PROGRESS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_progress_session_id ON progress (session_id, id)
+"""
+
+# Materialized per-session aggregates, maintained by a trigger so every insert
+# path (log_progress, write-behind, bulk loads) updates them in the same transaction
+CREATE_SESSION_STATS = """
+    CREATE TABLE IF NOT EXISTS session_stats (
+        session_id TEXT PRIMARY KEY,
+        attempts INTEGER NOT NULL,
+        correct_count INTEGER NOT NULL,
+        response_time_sum REAL NOT NULL,
+        last_id INTEGER,
+        last_streak INTEGER,
+        last_confidence REAL,
+        last_timestamp TEXT
+    )
+"""
+
+CREATE_SESSION_STATS_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS trg_progress_session_stats AFTER INSERT ON progress
+    BEGIN
+        INSERT INTO session_stats (
+            session_id, attempts, correct_count, response_time_sum,
+            last_id, last_streak, last_confidence, last_timestamp
+        ) VALUES (
+            NEW.session_id, 1, COALESCE(NEW.correct, 0), COALESCE(NEW.response_time, 0),
+            NEW.id, NEW.streak, NEW.confidence, NEW.timestamp
+        )
+        ON CONFLICT(session_id) DO UPDATE SET
+            attempts = attempts + 1,
+            correct_count = correct_count + excluded.correct_count,
+            response_time_sum = response_time_sum + excluded.response_time_sum,
+            last_id = excluded.last_id,
+            last_streak = excluded.last_streak,
+            last_confidence = excluded.last_confidence,
+            last_timestamp = excluded.last_timestamp;
+    END
+"""
+
+# Folds progress rows with id > ? into session_stats in one pass: used to seed
+# databases created before session_stats existed and after bulk loads that
+# bypass the trigger. With MAX(id), SQLite takes the bare columns from the
+# row holding that maximum.
+MERGE_SESSION_STATS = """
+    INSERT INTO session_stats (
+        session_id, attempts, correct_count, response_time_sum,
+        last_id, last_streak, last_confidence, last_timestamp
+    )
+    SELECT session_id, COUNT(*), TOTAL(correct), TOTAL(response_time),
+           MAX(id), streak, confidence, timestamp
+    FROM progress
+    WHERE id > ?
+    GROUP BY session_id
+    ON CONFLICT(session_id) DO UPDATE SET
+        attempts = attempts + excluded.attempts,
+        correct_count = correct_count + excluded.correct_count,
+        response_time_sum = response_time_sum + excluded.response_time_sum,
+        last_id = excluded.last_id,
+        last_streak = excluded.last_streak,
+        last_confidence = excluded.last_confidence,
+        last_timestamp = excluded.last_timestamp
+"""
+
+DIFFICULTY_SCORE = {"Easy": 1, "Medium": 2, "Hard": 3}
+
+INSERT_PROGRESS = """
+    INSERT INTO progress (
+        session_id, timestamp, difficulty, correct, response_time, streak, confidence, expected_time
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of open, pre-configured SQLite connections per database.
+
+    Connections are not tied to a thread (check_same_thread=False); a thread
+    checks one out for a block of work and returns it, so short-lived threads
+    such as Streamlit's per-rerun script threads reuse idle connections
+    instead of opening and configuring new ones. At most max_connections are
+    open per database; checkouts beyond that wait up to timeout seconds.
+    """
+
+    def __init__(self, max_connections: int = 8, timeout: float = 30.0):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle: Dict[str, "queue.LifoQueue"] = {}
+        self._open: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, db_name: str) -> Iterator[sqlite3.Connection]:
+        """Checks out a connection for the with block; an open transaction is rolled back on return."""
+        conn = self._checkout(db_name)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle[db_name].put(conn)
+
+    def _checkout(self, db_name: str) -> sqlite3.Connection:
+        with self._lock:
+            idle = self._idle.setdefault(db_name, queue.LifoQueue())
+            try:
+                return idle.get_nowait()
+            except queue.Empty:
+                pass
+            opening = self._open.get(db_name, 0) < self.max_connections
+            if opening:
+                self._open[db_name] = self._open.get(db_name, 0) + 1
+        if not opening:
+            try:
+                return idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise MathsException(f"No free connection to {db_name} within {self.timeout:g}s") from None
+        try:
+            conn = sqlite3.connect(db_name, check_same_thread=False)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            return conn
+        except Exception:
+            with self._lock:
+                self._open[db_name] -= 1
+            raise
+
+    def close(self):
+        """Closes every idle connection; connections still checked out are closed with the process."""
+        with self._lock:
+            for db_name, idle in self._idle.items():
+                while True:
+                    try:
+                        conn = idle.get_nowait()
+                    except queue.Empty:
+                        break
+                    conn.close()
+                    self._open[db_name] -= 1
+
+
+# Shared by everything in the process that opens the progress database
+POOL = ConnectionPool()
+atexit.register(POOL.close)
+
+
+class WriteBehindWriter:
+    """
+    Background writer that group-commits queued progress rows.
+
+    Rows are committed in one transaction once batch_size rows are waiting or
+    flush_interval_ms has passed since the first queued row, whichever comes
+    first. flush() blocks until everything queued so far is on disk.
+
+    A failed commit is retried up to max_retries times with exponential
+    backoff. If it still fails, its rows are kept and retried with the next
+    batch (or after retry_interval_s when nothing else arrives), and put() and
+    flush() raise until they are committed, so callers learn about rows that
+    are not on disk instead of losing them silently.
+    """
+
+    def __init__(self, db_name: str, batch_size: int = 100, flush_interval_ms: float = 50.0,
+                 max_retries: int = 5, retry_interval_s: float = 1.0):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval_s
+        self.commit_latencies = deque(maxlen=10_000)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: list = []  # rows whose commit failed every retry, oldest first
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"write-behind:{db_name}", daemon=True)
+        self._thread.start()
+
+    def _raise_if_failing(self):
+        error = self._error
+        if error is not None:
+            raise MathsException(
+                f"Progress rows are not being saved: {len(self._pending)} rows wait for a retry"
+            ) from error
+
+    def put(self, row: tuple):
+        if self._closed:
+            raise MathsException("Write-behind queue is closed")
+        self._raise_if_failing()
+        self._queue.put(row)
+
+    def flush(self):
+        """Waits until every row queued before this call is committed; raises if they could not be."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._raise_if_failing()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_name)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.retry_interval if self._pending else None)
+                except queue.Empty:
+                    self._commit(conn, [])  # retry the kept rows
+                    continue
+                if item is None:
+                    if self._pending:
+                        self._commit(conn, [])
+                    return
+                rows, waiters, stop = [], [], False
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                        # Nothing more is expected soon; commit what we have now
+                        deadline = 0
+                    elif item is None:
+                        stop = True
+                        break
+                    else:
+                        rows.append(item)
+                    if len(rows) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if rows or self._pending:
+                    self._commit(conn, rows)
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, rows: list):
+        """Commits kept rows plus rows in one transaction, with retries; keeps them all on failure."""
+        rows = self._pending + rows
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                with conn:
+                    conn.executemany(INSERT_PROGRESS, rows)
+                self.commit_latencies.append(time.perf_counter() - start)
+                logger.debug("Group-committed %d progress rows", len(rows))
+                if self._error is not None:
+                    logger.info(f"✅ Write-behind commits recovered; {len(rows)} kept rows saved")
+                self._pending, self._error = [], None
+                return
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries:
+                    time.sleep(min(0.05 * 2 ** attempt, self.retry_interval))
+
+        logger.error(f"❌ Write-behind commit of {len(rows)} rows failed after {self.max_retries} retries: {error}")
+        self._pending, self._error = rows, error
+
+
+class SessionHistory:
+    """
+    Progress rows of one session in growable per-column arrays.
+
+    Capacity doubles as rows arrive, so appends are O(1) amortized, and
+    frame() wraps the filled prefix without copying. Rows past that prefix
+    are only ever written after it, so frames handed out earlier stay valid.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, np.ndarray] = {}
+        self.rows = 0
+        self.last_id = 0
+
+    def extend(self, df: "pd.DataFrame"):
+        """Appends rows in id order; rows already added are skipped."""
+        df = df[df["id"] > self.last_id]
+        if df.empty:
+            return
+        needed = self.rows + len(df)
+        for name in df.columns:
+            values = df[name].to_numpy()
+            column = self.columns.get(name)
+            dtype = values.dtype if column is None else np.result_type(column.dtype, values.dtype)
+            if column is None or len(column) < needed or column.dtype != dtype:
+                grown = np.empty(max(needed, 2 * self.rows, 16), dtype=dtype)
+                if column is not None:
+                    grown[:self.rows] = column[:self.rows]
+                column = self.columns[name] = grown
+            column[self.rows:needed] = values
+        self.rows = needed
+        self.last_id = int(df["id"].iloc[-1])
+
+    def frame(self) -> "pd.DataFrame":
+        """Read-only DataFrame over the rows added so far."""
+        import pandas as pd
+
+        views = {}
+        for name, column in self.columns.items():
+            view = column[:self.rows]
+            view.flags.writeable = False
+            views[name] = view
+        return pd.DataFrame(views, copy=False)
+
+
+class ProgressSeries:
+    """
+    Running score/streak series of one session, thinned to at most
+    max_points points. When full, every other point is dropped and the
+    sampling stride doubles, so appends stay O(1) amortized.
+    """
+
+    def __init__(self, max_points: int = 200):
+        self.max_points = max(2, max_points)
+        self.last_id = 0
+        self.attempts = 0
+        self.score = 0
+        self.stride = 1
+        self.points = []  # (attempt, score, streak)
+        self.latest = None
+
+    def extend(self, rows):
+        """Adds (id, correct, streak) rows in id order; rows already added are skipped."""
+        for row_id, correct, streak in rows:
+            if row_id <= self.last_id:
+                continue  # a concurrent reader fetched the same rows first
+            self.attempts += 1
+            self.score += int(correct or 0)
+            self.last_id = row_id
+            self.latest = (self.attempts, self.score, streak)
+            if self.attempts % self.stride == 0:
+                self.points.append(self.latest)
+                if len(self.points) > self.max_points:
+                    self.stride *= 2
+                    self.points = [p for p in self.points if p[0] % self.stride == 0]
+
+    def to_frame(self) -> "pd.DataFrame":
+        import pandas as pd
+
+        points = list(self.points)
+        if self.latest is not None and (not points or points[-1][0] != self.latest[0]):
+            points.append(self.latest)
+        return pd.DataFrame(points, columns=["attempt", "score", "streak"]).set_index("attempt")
+
 
 class ProgressTracker:
-    def __init__(self, db_name: str = "progress.db"):
+    # Shared by every tracker in the process; main.py builds one per rerun.
+    _initialized = set()
+    _writers: Dict[str, WriteBehindWriter] = {}
+    _lock = threading.Lock()
+    # Per-session caches, least recently used sessions evicted first. Histories
+    # are capped by their total rows, chart series by their number.
+    CACHE_MAX_ROWS = 1_000_000
+    CACHE_MAX_SESSIONS = 1024
+    _session_cache: "OrderedDict[tuple, SessionHistory]" = OrderedDict()
+    _cached_rows = 0
+    _series_cache: "OrderedDict[tuple, ProgressSeries]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, db_name: str = "progress.db", write_behind: bool = False,
+                 batch_size: int = 100, flush_interval_ms: float = 50.0):
         self.db_name = db_name
         try:
-            self._init_db()
-            logger.info(f"✅ Database initialized: {db_name}")
+            with self._lock:
+                if db_name not in self._initialized:
+                    self._init_db()
+                    self._initialized.add(db_name)
+                    logger.info(f"✅ Database initialized: {db_name}")
         except Exception as e:
             logger.error(f"❌ Failed to initialize database: {e}")
             raise MathsException("Database initialization failed") from e
 
-    def _connect(self):
-        """Internal method to connect to SQLite database."""
-        try:
-            return sqlite3.connect(self.db_name)
-        except Exception as e:
-            logger.error(f"❌ DB connection failed: {e}")
-            raise MathsException("Failed to connect to database") from e
+        self.writer: Optional[WriteBehindWriter] = None
+        if write_behind:
+            self.writer = self._get_writer(db_name, batch_size, flush_interval_ms)
+
+    @classmethod
+    def _get_writer(cls, db_name: str, batch_size: int, flush_interval_ms: float) -> WriteBehindWriter:
+        """One background writer per database, flushed at interpreter exit."""
+        with cls._lock:
+            writer = cls._writers.get(db_name)
+            if writer is None or writer._closed:
+                writer = WriteBehindWriter(db_name, batch_size, flush_interval_ms)
+                cls._writers[db_name] = writer
+                atexit.register(writer.close)
+        return writer
+
+    def _connection(self):
+        """A connection to this tracker's database from the shared pool, for a with block."""
+        return POOL.connection(self.db_name)
 
     def _init_db(self):
-        """Create the progress table if it doesn’t exist."""
-        conn = None
+        """Create the progress and session_stats tables if they don’t exist."""
         try:
-            conn = self._connect()
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS progress (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT,
-                    timestamp TEXT,
-                    difficulty TEXT,
-                    correct INTEGER,
-                    response_time REAL,
-                    streak INTEGER,
-                    confidence REAL
-                )
-            """)
-            conn.commit()
+            with self._connection() as conn, conn:
+                # Take the write lock before checking for session_stats: another process
+                # opening the same legacy database waits here and then finds the table,
+                # so the seeding merge runs exactly once
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(CREATE_PROGRESS)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(progress)")}
+                if "expected_time" not in columns:
+                    # Older databases: rows logged before this column read back as NULL
+                    conn.execute("ALTER TABLE progress ADD COLUMN expected_time REAL")
+                conn.execute(CREATE_PROGRESS_INDEX)
+                stats_exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'session_stats'"
+                ).fetchone()
+                conn.execute(CREATE_SESSION_STATS)
+                if not stats_exists:
+                    conn.execute(MERGE_SESSION_STATS, (0,))
+                conn.execute(CREATE_SESSION_STATS_TRIGGER)
         except Exception as e:
             logger.error(f"❌ Error creating database table: {e}")
             raise MathsException("Failed to initialize tables") from e
-        finally:
-            if conn:
-                conn.close()
 
+    @timed("tracker.log_progress")
     def log_progress(self, session_id: str, difficulty: str, correct: bool,
-                     response_time: float, streak: int, confidence: float):
-        """Insert a new progress record with error handling."""
-        conn = None
+                     response_time: float, streak: int, confidence: float,
+                     expected_time: Optional[float] = None):
+        """Insert a new progress record with error handling.
+
+        expected_time is the puzzle's expected answer time that the confidence
+        was scored against; it lets rescore_confidence replay the formula exactly.
+        """
+        row = (
+            session_id,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            difficulty,
+            int(correct),
+            response_time,
+            streak,
+            confidence,
+            expected_time
+        )
         try:
-            conn = self._connect()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO progress (
-                    session_id, timestamp, difficulty, correct, response_time, streak, confidence
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                session_id,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                difficulty,
-                int(correct),
-                response_time,
-                streak,
-                confidence
-            ))
-            conn.commit()
+            if self.writer is not None:
+                self.writer.put(row)
+            else:
+                with self._connection() as conn, conn:
+                    conn.execute(INSERT_PROGRESS, row)
             logger.info(
-                f"🧩 Logged progress → {session_id} | {difficulty} | Correct: {correct} | "
-                f"Time: {response_time:.2f}s | Streak: {streak} | Confidence: {confidence}"
+                "🧩 Logged progress → %s | %s | Correct: %s | Time: %.2fs | Streak: %s | Confidence: %s",
+                session_id, difficulty, correct, response_time, streak, confidence
             )
         except Exception as e:
             logger.error(f"❌ Error logging progress: {e}")
             raise MathsException("Failed to log progress") from e
-        finally:
-            if conn:
-                conn.close()
 
-    def get_progress(self, session_id: str) -> pd.DataFrame:
-        """Retrieve progress safely and prevent SQL injection."""
-        conn = None
+    def flush(self):
+        """Blocks until queued write-behind rows are committed."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def get_progress_since(self, session_id: str, last_id: int = 0) -> "pd.DataFrame":
+        """Rows of a session with id greater than last_id, oldest first."""
+        import pandas as pd
+
         try:
-            conn = self._connect()
-            df = pd.read_sql_query(
-                "SELECT * FROM progress WHERE session_id = ?",
-                conn,
-                params=(session_id,)
-            )
-            logger.info(f"📊 Retrieved {len(df)} progress entries for session: {session_id}")
+            self.flush()  # read-your-writes when write-behind is on
+            with self._connection() as conn:
+                df = pd.read_sql_query(
+                    "SELECT * FROM progress WHERE session_id = ? AND id > ? ORDER BY id",
+                    conn,
+                    params=(session_id, int(last_id))
+                )
+            logger.debug("Fetched %d new progress entries for session: %s", len(df), session_id)
             return df
         except Exception as e:
             logger.error(f"❌ Failed retrieving progress: {e}")
             raise MathsException("Failed to retrieve progress data") from e
-        finally:
-            if conn:
-                conn.close()
+
+    @timed("tracker.get_progress")
+    def get_progress(self, session_id: str) -> "pd.DataFrame":
+        """
+        Full progress of a session, served from a per-session cache.
+
+        Only rows newer than the last cached id are read from the database and
+        appended to the cached history, so the cost follows the rows added
+        since the previous call rather than the size of the session or table.
+        Returns a read-only view; copy it before modifying values.
+        """
+        key = (self.db_name, session_id)
+        with self._cache_lock:
+            history = self._session_cache.get(key)
+            last_id = history.last_id if history is not None else 0
+
+        new_rows = self.get_progress_since(session_id, last_id)
+
+        with self._cache_lock:
+            history = self._session_cache.get(key)
+            if history is None:
+                history = self._session_cache[key] = SessionHistory()
+            self._session_cache.move_to_end(key)
+            before = history.rows
+            history.extend(new_rows)
+            ProgressTracker._cached_rows += history.rows - before
+            while self._cached_rows > self.CACHE_MAX_ROWS and len(self._session_cache) > 1:
+                _, evicted = self._session_cache.popitem(last=False)
+                ProgressTracker._cached_rows -= evicted.rows
+            df = history.frame() if history.rows else new_rows
+
+        logger.info("📊 Retrieved %d progress entries for session: %s", len(df), session_id)
+        return df
+
+    @timed("tracker.get_session_summary")
+    def get_session_summary(self, session_id: str) -> dict:
+        """Live Tracker metrics for a session from session_stats (one key lookup)."""
+        try:
+            self.flush()  # read-your-writes when write-behind is on
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT attempts, correct_count, response_time_sum, last_streak, last_confidence "
+                    "FROM session_stats WHERE session_id = ?",
+                    (session_id,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Failed retrieving session summary: {e}")
+            raise MathsException("Failed to retrieve session summary") from e
+
+        attempts, correct, time_sum, last_streak, last_confidence = row or (0, 0, 0.0, None, None)
+        return {
+            "attempts": attempts,
+            "correct": int(correct),
+            "accuracy": correct / attempts * 100 if attempts else 0.0,
+            "avg_response_time": time_sum / attempts if attempts else 0.0,
+            "score": int(correct),
+            "last_streak": last_streak,
+            "last_confidence": last_confidence,
+        }
+
+    @timed("tracker.get_progress_series")
+    def get_progress_series(self, session_id: str, max_points: int = 200) -> "pd.DataFrame":
+        """
+        Downsampled running score and streak for the progress chart.
+
+        Each session keeps an in-memory series that is extended with rows newer
+        than the last one seen and thinned as it grows, so the chart never
+        re-reads or redraws the session's full history.
+        """
+        key = (self.db_name, session_id)
+        with self._cache_lock:
+            series = self._series_cache.get(key)
+            if series is None or series.max_points != max_points:
+                series = self._series_cache[key] = ProgressSeries(max_points)
+            self._series_cache.move_to_end(key)
+            while len(self._series_cache) > self.CACHE_MAX_SESSIONS:
+                self._series_cache.popitem(last=False)
+            last_id = series.last_id
+
+        try:
+            self.flush()  # read-your-writes when write-behind is on
+            with self._connection() as conn:
+                rows = conn.execute(
+                    "SELECT id, correct, streak FROM progress WHERE session_id = ? AND id > ? ORDER BY id",
+                    (session_id, last_id)
+                ).fetchall()
+        except Exception as e:
+            logger.error(f"❌ Failed retrieving progress series: {e}")
+            raise MathsException("Failed to retrieve progress data") from e
+
+        with self._cache_lock:
+            series.extend(rows)
+            return series.to_frame()
 
     @staticmethod
+    @timed("tracker.calculate_confidence")
     def calculate_confidence(correct: bool, difficulty: str, response_time: float,
                              streak: int, expected_time: float) -> float:
         """Calculate learner confidence score with safe guards."""
@@ -113,18 +633,56 @@ class ProgressTracker:
             time_effect = max(-15, min(15, time_effect))
             confidence += time_effect
 
-            difficulty_score = {"Easy": 1, "Medium": 2, "Hard": 3}.get(difficulty, 1)
+            difficulty_score = DIFFICULTY_SCORE.get(difficulty, 1)
             confidence += 3 * difficulty_score * int(correct)
 
             confidence = max(0, min(100, confidence))
             final_score = round(confidence, 2)
 
             logger.info(
-                f"💡 Confidence calculated: {final_score} ({difficulty}, streak={streak}, "
-                f"response={response_time:.2f}s)"
+                "💡 Confidence calculated: %s (%s, streak=%s, response=%.2fs)",
+                final_score, difficulty, streak, response_time
             )
             return final_score
 
         except Exception as e:
             logger.error(f"❌ Confidence calculation failed: {e}")
             raise MathsException("Failed to calculate confidence") from e
+
+    @staticmethod
+    def calculate_confidence_many(correct, difficulty, response_time, streak, expected_time) -> np.ndarray:
+        """
+        calculate_confidence over whole columns (NumPy arrays or pandas Series).
+
+        Same terms, clamping and rounding as the scalar version, and equal to
+        it element for element: values whose 2-decimal rounding is within
+        float error of a tie are re-rounded with Python's round(). Logs once
+        per call rather than per row.
+        """
+        try:
+            correct = np.asarray(correct).astype(np.int64)
+            streak = np.asarray(streak, dtype=np.float64)
+            response_time = np.asarray(response_time, dtype=np.float64)
+            expected_time = np.asarray(expected_time, dtype=np.float64)
+            difficulty = np.asarray(difficulty, dtype=object)
+            difficulty_score = np.ones(difficulty.shape)  # unknown levels score as Easy
+            for name, score in DIFFICULTY_SCORE.items():
+                difficulty_score[difficulty == name] = score
+
+            confidence = 50 + 20 * (2 * correct - 1) + 2 * np.minimum(streak, 20)
+            confidence = confidence + np.clip(2 * (expected_time - response_time), -15, 15)
+            confidence = confidence + 3 * difficulty_score * correct
+            confidence = np.clip(confidence, 0, 100)
+
+            scaled = confidence * 100
+            scores = np.rint(scaled) / 100
+            near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+            if near_tie.any():
+                scores[near_tie] = [round(float(v), 2) for v in confidence[near_tie]]
+
+            logger.info("💡 Confidence calculated for %d rows", len(scores))
+            return scores
+
+        except Exception as e:
+            logger.error(f"❌ Batch confidence calculation failed: {e}")
+            raise MathsException("Failed to calculate confidence") from e
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics import UNKNOWN, CohortAnalytics  # noqa: E402
+from tracker import INSERT_PROGRESS, ProgressTracker  # noqa: E402
+
+ROWS = [
+    ("s1", "2025-01-01 09:00:00", "Easy", 1, 2.5, 2, 60.0, 6.0),
+    ("s1", "2025-01-01 09:01:00", "Medium", 0, 7.0, 0, 45.0, 7.5),
+    ("s1", None, "Medium", 1, 4.0, 1, 55.0, 7.5),
+    ("s1", "2025-01-01 09:03:00", None, 1, 3.0, 2, 60.0, None),
+    ("s2", "", "Easy", 1, 1.5, 2, 62.0, 6.0),
+    (None, "2025-01-02 10:00:00", "Hard", 0, 12.0, 0, 40.0, 9.0),
+]
+
+
+def make_db(tmp_path):
+    db_name = str(tmp_path / "progress.db")
+    ProgressTracker(db_name)
+    conn = sqlite3.connect(db_name)
+    with conn:
+        conn.executemany(INSERT_PROGRESS, ROWS)
+    conn.close()
+    return db_name
+
+
+def test_refresh_keeps_rows_with_null_keys(tmp_path):
+    analytics = CohortAnalytics(make_db(tmp_path))
+    assert analytics.refresh(batch_rows=4) == len(ROWS)
+
+    for grain in ("hourly", "daily"):
+        accuracy = analytics.accuracy_over_time(grain)
+        assert accuracy["attempts"].sum() == len(ROWS)
+        assert accuracy["correct"].sum() == sum(row[3] for row in ROWS)
+
+    daily = analytics.accuracy_over_time("daily").set_index(["period", "difficulty"])["attempts"]
+    assert daily[(UNKNOWN, "Medium")] == 1
+    assert daily[(UNKNOWN, "Easy")] == 1
+    assert daily[("2025-01-01", UNKNOWN)] == 1
+    assert daily[("2025-01-02", "Hard")] == 1
+
+    times = analytics.response_times().set_index("difficulty")
+    assert times["attempts"].sum() == len(ROWS)
+
+    cohort = analytics.accuracy_over_time(sessions=[UNKNOWN])
+    assert cohort["attempts"].sum() == 1
+
+
+def test_transitions_include_null_levels(tmp_path):
+    analytics = CohortAnalytics(make_db(tmp_path))
+    analytics.refresh(batch_rows=2)  # s1 spans batches, so its first row per batch is carried over
+
+    matrix = analytics.level_transitions()
+    # s1: Easy -> Medium -> Medium -> unknown; no transitions for s2's single row or the session-less row
+    assert matrix.to_numpy().sum() == 3
+    assert matrix.loc["Easy", "Medium"] == 1
+    assert matrix.loc["Medium", "Medium"] == 1
+    assert matrix.loc["Medium", UNKNOWN] == 1